@@ -0,0 +1,465 @@
+"""
+On-disk store of generated sites with content-addressed deduplication
+Every generated file is kept once under its SHA-256, so the styles.css or
+script.js shared by many sites takes the space of one copy; an artifact is a
+small manifest listing its files. ZIPs are assembled on first download and
+kept next to the blobs, with a fixed timestamp so re-assembling them always
+gives the same bytes (and the same ETag).
+Size-bounded LRU: reads touch the manifest's mtime, and garbage collection
+evicts the least recently used artifacts, then the blobs nothing refers to.
+The store lives on disk only, so every worker process sees every artifact
+"""
+
+import errno
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from zip_stream import iter_zip
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+# Size of each body chunk sent from a memory-mapped file
+CHUNK_SIZE = 256 * 1024
+
+
+class ArtifactNotFound(Exception):
+    """Raised for unknown, evicted or damaged artifacts"""
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header selects no byte of the file"""
+
+
+class Artifact:
+    """A stored site: its id and the (name, sha256, size) of each file, in ZIP order"""
+
+    def __init__(
+        self,
+        artifact_id: str,
+        files: List[dict],
+        created_at: float,
+        filename: Optional[str] = None,
+        metadata: Optional[dict] = None
+    ):
+        self.id = artifact_id
+        self.files = files
+        self.created_at = created_at
+        self.filename = filename
+        # Free-form data stored with the files (e.g. the generation request); part of the id
+        self.metadata = metadata or {}
+
+    @property
+    def size(self) -> int:
+        return sum(entry["size"] for entry in self.files)
+
+    def file(self, name: str) -> Optional[dict]:
+        return next((entry for entry in self.files if entry["name"] == name), None)
+
+    def to_dict(self) -> dict:
+        return {
+            "artifact_id": self.id,
+            "created_at": self.created_at,
+            "filename": self.filename,
+            "size": self.size,
+            "files": self.files
+        }
+
+
+def make_artifact_id(
+    entries: List[Tuple[str, str]],
+    filename: Optional[str] = None,
+    metadata: Optional[dict] = None
+) -> str:
+    """Id of an artifact from its (name, sha256) list, download name and metadata
+
+    The same site stored again with the same metadata shares one id; the same
+    files stored for another request get their own manifest (but not their own blobs).
+    """
+    canonical = json.dumps(
+        {"files": entries, "filename": filename, "metadata": metadata or {}},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+class ArtifactStore:
+    """Content-addressed blobs, per-artifact manifests and on-demand ZIPs under one directory"""
+
+    # Evict down to this fraction of max_bytes, so collections do not run back to back
+    LOW_WATERMARK = 0.9
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int = 1024 * 1024 * 1024,
+        compression: str = "deflate",
+        store_threshold: int = 0,
+        grace_seconds: float = 300
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.store_threshold = store_threshold
+        # Blobs younger than this survive collection even when unreferenced:
+        # another worker may be writing the manifest that refers to them
+        self.grace_seconds = grace_seconds
+        # Assembled ZIPs depend on the compression settings as well as the files
+        self.zip_variant = f"auto{store_threshold}" if compression == "auto" else compression
+        # Guards the counters only; collection holds _gc_lock, so stats() never waits for a disk scan
+        self._lock = threading.Lock()
+        self._gc_lock = threading.Lock()
+        self._written_since_gc = 0
+        self.stored = 0
+        self.deduplicated = 0
+        self.bytes_written = 0
+        self.bytes_deduplicated = 0
+        self.zips_assembled = 0
+        self.evicted = 0
+        self.collections = 0
+        self.last_size = 0
+
+        for name in ("blobs", "manifests", "zips"):
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+
+    # Paths
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], digest)
+
+    def _manifest_path(self, artifact_id: str) -> str:
+        return os.path.join(self.root, "manifests", f"{artifact_id}.json")
+
+    def _zip_path(self, artifact_id: str) -> str:
+        return os.path.join(self.root, "zips", f"{artifact_id}-{self.zip_variant}.zip")
+
+    def zip_etag(self, artifact: Artifact) -> str:
+        return f'"{artifact.id}-{self.zip_variant}"'
+
+    # Writing
+
+    def put(
+        self,
+        files: Iterable[Tuple[str, bytes]],
+        filename: Optional[str] = None,
+        metadata: Optional[dict] = None
+    ) -> Artifact:
+        """Store (name, bytes) pairs as an artifact, writing only the blobs not already stored"""
+        entries = []
+        written = 0
+        for name, data in files:
+            digest = hashlib.sha256(data).hexdigest()
+            if self._write_blob(digest, data):
+                written += len(data)
+            else:
+                with self._lock:
+                    self.bytes_deduplicated += len(data)
+            entries.append({"name": name, "sha256": digest, "size": len(data)})
+        if not entries:
+            raise ValueError("An artifact needs at least one file")
+
+        artifact_id = make_artifact_id([(entry["name"], entry["sha256"]) for entry in entries], filename, metadata)
+        path = self._manifest_path(artifact_id)
+        try:
+            # Already stored (the same site generated again for the same request): just mark it as used
+            artifact = self._read_manifest(artifact_id)
+            os.utime(path)
+            with self._lock:
+                self.deduplicated += 1
+            return artifact
+        except ArtifactNotFound:
+            pass
+
+        artifact = Artifact(artifact_id, entries, time.time(), filename, metadata)
+        self._write_file(path, json.dumps({
+            "id": artifact.id,
+            "created_at": artifact.created_at,
+            "filename": artifact.filename,
+            "files": artifact.files,
+            "metadata": artifact.metadata
+        }).encode("utf-8"))
+        with self._lock:
+            self.stored += 1
+        self._wrote(written)
+        return artifact
+
+    def _write_blob(self, digest: str, data: bytes) -> bool:
+        """Write a blob unless it exists; returns whether it was written"""
+        path = self.blob_path(digest)
+        try:
+            # Refresh the mtime so collection treats a blob reused right now as new
+            os.utime(path)
+            return False
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write_file(path, data)
+        return True
+
+    def _write_file(self, path: str, data: bytes) -> None:
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _wrote(self, size: int) -> None:
+        with self._lock:
+            self.bytes_written += size
+            self._written_since_gc += size
+            due = self._written_since_gc >= self.max_bytes * (1 - self.LOW_WATERMARK)
+            if due:
+                self._written_since_gc = 0
+        if due:
+            self.collect()
+
+    # Reading
+
+    def get(self, artifact_id: str) -> Artifact:
+        """Artifact by id, marked as recently used; raises ArtifactNotFound"""
+        if not ARTIFACT_ID_PATTERN.fullmatch(artifact_id):
+            raise ArtifactNotFound(artifact_id)
+        artifact = self._read_manifest(artifact_id)
+        try:
+            os.utime(self._manifest_path(artifact_id))
+        except OSError:
+            pass
+        return artifact
+
+    def _read_manifest(self, artifact_id: str) -> Artifact:
+        try:
+            with open(self._manifest_path(artifact_id), "rb") as f:
+                data = json.loads(f.read())
+            return Artifact(data["id"], data["files"], data["created_at"], data.get("filename"), data.get("metadata"))
+        except FileNotFoundError:
+            raise ArtifactNotFound(artifact_id)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Damaged artifact manifest {artifact_id}: {e}")
+            raise ArtifactNotFound(artifact_id)
+
+    def read_blob(self, digest: str) -> bytes:
+        try:
+            with open(self.blob_path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise ArtifactNotFound(digest)
+
+    def zip_path(self, artifact: Artifact) -> str:
+        """Path of the artifact's ZIP, assembling it from the blobs the first time"""
+        path = self._zip_path(artifact.id)
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+
+        entries = [(entry["name"], self.read_blob(entry["sha256"])) for entry in artifact.files]
+        data = b"".join(iter_zip(
+            entries,
+            compression=self.compression,
+            store_threshold=self.store_threshold,
+            timestamp=artifact.created_at
+        ))
+        self._write_file(path, data)
+        with self._lock:
+            self.zips_assembled += 1
+        self._wrote(len(data))
+        return path
+
+    # Garbage collection
+
+    def collect(self) -> dict:
+        """Evict least recently used artifacts until the store fits, then sweep unreferenced blobs and ZIPs"""
+        # One collector at a time across threads and worker processes; the others skip
+        if not self._gc_lock.acquire(blocking=False):
+            return {"skipped": True}
+        try:
+            with open(os.path.join(self.root, ".gc.lock"), "w") as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError as e:
+                    if e.errno in (errno.EAGAIN, errno.EACCES):
+                        return {"skipped": True}
+                    raise
+                return self._collect()
+        finally:
+            self._gc_lock.release()
+
+    def _collect(self) -> dict:
+        now = time.time()
+        manifests = []
+        for artifact_id, path, size, mtime in self._scan("manifests", ".json"):
+            try:
+                manifests.append((mtime, artifact_id, [entry["sha256"] for entry in self._read_manifest(artifact_id).files]))
+            except ArtifactNotFound:
+                self._remove(path)
+        blobs = {digest: (path, size, mtime) for digest, path, size, mtime in self._scan("blobs", "")}
+        zips = {}
+        removed = 0
+        for name, path, size, mtime in self._scan("zips", ".zip"):
+            artifact_id, _, variant = name.partition("-")
+            if variant != self.zip_variant:
+                # Built with other compression settings: never served again
+                removed += self._remove(path)
+            else:
+                zips[artifact_id] = (path, size)
+
+        refs = {}
+        for _, _, digests in manifests:
+            for digest in set(digests):
+                refs[digest] = refs.get(digest, 0) + 1
+        total = sum(size for _, size, _ in blobs.values()) + sum(size for _, size in zips.values())
+
+        def release(digest: str) -> int:
+            refs[digest] -= 1
+            if refs[digest] or digest not in blobs or now - blobs[digest][2] <= self.grace_seconds:
+                return 0
+            return self._remove(blobs.pop(digest)[0])
+
+        evicted = 0
+        manifests.sort()
+        target = self.max_bytes * self.LOW_WATERMARK
+        remaining = {artifact_id for _, artifact_id, _ in manifests}
+        for mtime, artifact_id, digests in manifests:
+            if total <= self.max_bytes and evicted == 0 or total <= target:
+                break
+            if now - mtime <= self.grace_seconds:
+                # Just created or downloaded: its id may not even have reached the client yet
+                break
+            self._remove(self._manifest_path(artifact_id))
+            remaining.discard(artifact_id)
+            evicted += 1
+            freed = self._remove(zips.pop(artifact_id)[0]) if artifact_id in zips else 0
+            freed += sum(release(digest) for digest in set(digests))
+            total -= freed
+            removed += freed
+
+        # Blobs left over by crashed writes or by artifacts other workers evicted
+        for digest, (path, size, mtime) in list(blobs.items()):
+            if not refs.get(digest) and now - mtime > self.grace_seconds:
+                freed = self._remove(path)
+                total -= freed
+                removed += freed
+        for artifact_id, (path, size) in list(zips.items()):
+            if artifact_id not in remaining:
+                freed = self._remove(path)
+                total -= freed
+                removed += freed
+
+        with self._lock:
+            self.evicted += evicted
+            self.collections += 1
+            self.last_size = max(0, total)
+        if evicted or removed:
+            logger.info(f"Artifact store: evicted {evicted} artifacts, freed {removed / (1024 * 1024):.1f}MB")
+        return {"evicted": evicted, "freed_bytes": removed, "size": self.last_size}
+
+    def _scan(self, folder: str, suffix: str) -> Iterator[tuple]:
+        """(name without suffix, path, size, mtime) of the files in a store folder"""
+        for dirpath, _, filenames in os.walk(os.path.join(self.root, folder)):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if filename.endswith(".tmp"):
+                    # Left behind by a crashed write; recent ones may still be in progress
+                    try:
+                        if time.time() - os.path.getmtime(path) > self.grace_seconds:
+                            self._remove(path)
+                    except OSError:
+                        pass
+                    continue
+                if not filename.endswith(suffix):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield filename[:len(filename) - len(suffix)], path, stat.st_size, stat.st_mtime
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        """Delete a file, returning the bytes freed"""
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            return size
+        except FileNotFoundError:
+            return 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "root": self.root,
+                "max_bytes": self.max_bytes,
+                "size": self.last_size,
+                "artifacts_stored": self.stored,
+                "artifacts_deduplicated": self.deduplicated,
+                "bytes_written": self.bytes_written,
+                "bytes_deduplicated": self.bytes_deduplicated,
+                "zips_assembled": self.zips_assembled,
+                "evicted": self.evicted,
+                "collections": self.collections
+            }
+
+
+class MappedFile:
+    """Read-only memory map of a file; stays readable if the file is deleted while it is being sent"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.size = os.fstat(f.fileno()).st_size
+            # mmap cannot map an empty file
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        if self._map is not None and hasattr(mmap, "MADV_SEQUENTIAL"):
+            self._map.madvise(mmap.MADV_SEQUENTIAL)
+
+    def iter_range(self, start: int, end: int, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Bytes start..end-1 in chunks, closing the map when done"""
+        try:
+            for offset in range(start, end, chunk_size):
+                yield self._map[offset:min(end, offset + chunk_size)]
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(start, end inclusive) of a single "bytes=" range, or None to send the whole file
+
+    Malformed and multi-range headers are ignored, as RFC 9110 allows;
+    raises RangeNotSatisfiable when the range starts past the end.
+    """
+    match = re.fullmatch(r"\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*", header)
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, end
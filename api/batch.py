@@ -0,0 +1,126 @@
+"""
+Batch generation scheduling
+Parses a batch body (a JSON array, {"sites": [...]} or NDJSON, one entry per
+line) and runs its entries with a per-batch concurrency cap: identical entries
+run once and share the outcome, and every entry succeeds or fails on its own.
+Progress comes out as an ordered stream of events for the caller to render
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+STARTED = "started"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class BatchError(ValueError):
+    """The batch body as a whole is unusable"""
+
+
+class InvalidEntry:
+    """A line or item of the batch that could not be read as an object"""
+
+    def __init__(self, detail: str):
+        self.detail = detail
+
+
+def parse_batch_body(body: bytes, content_type: str, max_entries: int) -> List[Any]:
+    """Entries of a batch body: dicts, or InvalidEntry for NDJSON lines that do not parse"""
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError:
+        raise BatchError("Batch body must be UTF-8")
+
+    if content_type.split(";")[0].strip().lower() in NDJSON_TYPES:
+        entries = []
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                entries.append(InvalidEntry(f"Line {number} is not valid JSON: {e.msg}"))
+    else:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise BatchError(f"Batch body is not valid JSON: {e.msg}")
+        entries = data.get("sites") if isinstance(data, dict) else data
+        if not isinstance(entries, list):
+            raise BatchError('Batch body must be a JSON array or an object with a "sites" array')
+
+    if not entries:
+        raise BatchError("Batch is empty")
+    if len(entries) > max_entries:
+        raise BatchError(f"Maximum {max_entries} sites per batch")
+    return [entry if isinstance(entry, (dict, InvalidEntry)) else InvalidEntry("Entry must be a JSON object") for entry in entries]
+
+
+class BatchRunner:
+    """Runs unique entries at most concurrency at a time and reports them for every index they cover"""
+
+    def __init__(self, concurrency: int):
+        self.concurrency = max(1, concurrency)
+
+    async def run(
+        self,
+        items: List[Tuple[int, str, Any]],
+        func: Callable[[Any], Awaitable[Any]]
+    ) -> AsyncIterator[Tuple[str, List[int], Any]]:
+        """Yield (STARTED | COMPLETED | FAILED, indices, result or exception) for (index, key, item) triples
+
+        Items sharing a key run once, with the first item; the exception of a
+        failed item is yielded instead of raised.
+        """
+        groups: Dict[str, List[int]] = {}
+        unique = []
+        for index, key, item in items:
+            if key not in groups:
+                groups[key] = []
+                unique.append((key, item))
+            groups[key].append(index)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def run_one(key: str, item: Any) -> None:
+            async with semaphore:
+                await events.put((STARTED, groups[key], None))
+                try:
+                    result = await func(item)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    await events.put((FAILED, groups[key], e))
+                    return
+                await events.put((COMPLETED, groups[key], result))
+
+        tasks = [asyncio.create_task(run_one(key, item)) for key, item in unique]
+        try:
+            finished = 0
+            while finished < len(tasks):
+                event = await events.get()
+                if event[0] != STARTED:
+                    finished += 1
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def first_indices(items: List[Tuple[int, str, Any]]) -> Dict[int, Optional[int]]:
+    """For each index, the index of the earlier identical entry it duplicates (or None)"""
+    first: Dict[str, int] = {}
+    duplicates = {}
+    for index, key, _ in items:
+        duplicates[index] = first.get(key)
+        first.setdefault(key, index)
+    return duplicates
@@ -0,0 +1,128 @@
+"""
+Adaptive generation budgets
+Sizes num_predict for each model reply from the eval_count of past replies of
+the same model, kind and size (e.g. a single-mode site of 2 pages), falling back to a
+prior until enough replies have been seen, so a one-page site does not reserve
+the decode budget of a five-page one. Also picks the code model from a ladder
+of smaller, faster models by page count and quality tier
+"""
+
+import logging
+import math
+import re
+from collections import deque
+from typing import Callable, Deque, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+TIERS = ("fast", "balanced", "quality")
+
+# Margin over the observed percentile, by tier: a tighter budget frees the GPU sooner
+TIER_HEADROOM = {"fast": 1.15, "balanced": 1.3, "quality": 1.6}
+
+
+def parse_model_ladder(text: str) -> List[Tuple[str, int]]:
+    """Parse "small-model@1,medium-model@3" into (model, max_pages) rungs, smallest first"""
+    ladder = []
+    for item in text.split(","):
+        if not item.strip():
+            continue
+        match = re.fullmatch(r"\s*(\S+)@(\d+)\s*", item)
+        if not match:
+            raise ValueError(f"Invalid model ladder entry: {item!r} (use model@max_pages)")
+        ladder.append((match.group(1), int(match.group(2))))
+    return ladder
+
+
+def select_model(
+    ladder: List[Tuple[str, int]],
+    default: str,
+    pages: int,
+    tier: str,
+    available: Callable[[str], bool]
+) -> str:
+    """Model for a site of pages pages: quality always uses default, fast the smallest
+    available rung, balanced the first available rung whose max_pages covers the site
+    """
+    if tier == "quality":
+        return default
+    for model, max_pages in ladder:
+        if (tier == "fast" or pages <= max_pages) and available(model):
+            return model
+    return default
+
+
+class ReplySizes:
+    """eval_count of recent replies of one model, kind and size"""
+
+    def __init__(self, window: int):
+        self.samples: Deque[int] = deque(maxlen=window)
+        self.truncated = 0
+
+    def percentile(self, fraction: float) -> int:
+        ordered = sorted(self.samples)
+        return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class TokenBudget:
+    """num_predict per (model, kind, units) learnt from past replies, with a prior of base + per_unit * units"""
+
+    # A reply cut off by num_predict needed at least this much more
+    TRUNCATION_FACTOR = 1.5
+
+    def __init__(
+        self,
+        priors: Dict[str, Tuple[int, int]],
+        minimum: int = 512,
+        maximum: int = 8192,
+        window: int = 200,
+        min_samples: int = 5,
+        percentile: float = 0.9
+    ):
+        self.priors = priors
+        self.minimum = minimum
+        self.maximum = maximum
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self._sizes: Dict[Tuple[str, str, int], ReplySizes] = {}
+
+    def prior(self, kind: str, units: int = 1) -> int:
+        base, per_unit = self.priors[kind]
+        return base + per_unit * units
+
+    def estimate(self, model: str, kind: str, units: int = 1, tier: str = "balanced") -> int:
+        """num_predict for a reply of model: the percentile of its past replies plus the tier's headroom, or the prior"""
+        sizes = self._sizes.get((model, kind, units))
+        if sizes is None or len(sizes.samples) < self.min_samples:
+            tokens = self.prior(kind, units)
+        else:
+            tokens = sizes.percentile(self.percentile) * TIER_HEADROOM.get(tier, TIER_HEADROOM["balanced"])
+        return int(min(self.maximum, max(self.minimum, math.ceil(tokens / 256) * 256)))
+
+    def record(self, model: str, kind: str, units: int, eval_tokens: int, truncated: bool = False) -> None:
+        """Account a finished reply of model; a truncated one counts as larger than it got to be"""
+        if eval_tokens <= 0:
+            return
+        sizes = self._sizes.setdefault((model, kind, units), ReplySizes(self.window))
+        if truncated:
+            sizes.truncated += 1
+            eval_tokens = int(eval_tokens * self.TRUNCATION_FACTOR)
+        sizes.samples.append(eval_tokens)
+
+    def stats(self) -> dict:
+        return {
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "percentile": self.percentile,
+            "replies": {
+                f"{model}:{kind}:{units}": {
+                    "samples": len(sizes.samples),
+                    "truncated": sizes.truncated,
+                    "p50": sizes.percentile(0.5),
+                    f"p{round(self.percentile * 100)}": sizes.percentile(self.percentile),
+                    "num_predict": {tier: self.estimate(model, kind, units, tier) for tier in TIERS}
+                }
+                for (model, kind, units), sizes in sorted(self._sizes.items())
+            }
+        }
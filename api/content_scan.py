@@ -0,0 +1,166 @@
+"""
+Single-pass content security scanning for generated code
+All rules are compiled into one regex run over the lowercased text (plus one
+over the original text for the few case-sensitive rules), so each file (or each
+streamed chunk) is read once and every finding is reported with its offset.
+StreamScanner carries a short overlap between chunks so matches split across
+chunk boundaries are still found, and never reported twice
+"""
+
+import re
+from typing import Iterable, List, Optional
+
+# Substrings that should not appear in generated static sites
+DANGEROUS_KEYWORDS = (
+    "eval(",
+    "exec(",
+    "__import__",
+    "subprocess",
+    "<script>alert",
+    "document.cookie",
+    "window.location",
+)
+
+# Substrings matched as written: lowercased, "new Function(" would match every "function("
+CASE_SENSITIVE_KEYWORDS = (
+    "new Function(",
+)
+
+# Elements whose whole block is removed by sanitize_html, and other removed markup
+_SANITIZE_PATTERN = re.compile(
+    r"<(?P<block>script|iframe|object)\b[^>]*>|<embed\b[^>]*>|javascript:|\bon\w+\s*=",
+    re.IGNORECASE
+)
+_BLOCK_CLOSE = {
+    name: re.compile(rf"</{name}\s*>", re.IGNORECASE) for name in ("script", "iframe", "object")
+}
+
+
+class Finding:
+    """One rule match; offset counts characters from the start of the scanned text or stream"""
+
+    def __init__(self, rule: str, offset: int, text: str, filename: Optional[str] = None):
+        self.rule = rule
+        self.offset = offset
+        self.text = text
+        self.filename = filename
+
+    def to_dict(self) -> dict:
+        return {"rule": self.rule, "offset": self.offset, "text": self.text, "filename": self.filename}
+
+    def __repr__(self) -> str:
+        return f"Finding({self.rule!r}, offset={self.offset}{f', file={self.filename}' if self.filename else ''})"
+
+
+class ContentScanner:
+    """Precompiled multi-keyword matcher"""
+
+    def __init__(
+        self,
+        keywords: Iterable[str] = DANGEROUS_KEYWORDS,
+        case_sensitive: Iterable[str] = CASE_SENSITIVE_KEYWORDS
+    ):
+        self.case_sensitive = list(case_sensitive)
+        self.rules = list(keywords) + self.case_sensitive
+        if not self.rules:
+            raise ValueError("ContentScanner needs at least one keyword")
+        self._by_lower = {rule.lower(): rule for rule in self.rules if rule not in self.case_sensitive}
+        # Longest keywords first, so a keyword that prefixes another does not shadow it.
+        # A plain case-sensitive alternation over lowercased text lets the regex engine
+        # skip ahead on the set of first characters, several times faster than re.IGNORECASE
+        alternation = "|".join(re.escape(rule) for rule in sorted(self._by_lower, key=len, reverse=True))
+        self.pattern = re.compile(alternation) if self._by_lower else None
+        self._ignorecase_pattern = re.compile(alternation, re.IGNORECASE) if self._by_lower else None
+        self._case_sensitive_pattern = re.compile(
+            "|".join(re.escape(rule) for rule in sorted(self.case_sensitive, key=len, reverse=True))
+        ) if self.case_sensitive else None
+        self.max_length = max(len(rule) for rule in self.rules)
+
+    def scan(self, text: str, filename: Optional[str] = None, base: int = 0) -> List[Finding]:
+        """Every match in text, in order"""
+        findings = []
+        if self.pattern is not None:
+            lowered = text.lower()
+            # A few characters change length when lowercased; keep offsets exact for those texts
+            if len(lowered) == len(text):
+                matches = self.pattern.finditer(lowered)
+            else:
+                matches = self._ignorecase_pattern.finditer(text)
+            findings = [
+                Finding(self._by_lower[match.group().lower()], base + match.start(), text[match.start():match.end()], filename)
+                for match in matches
+            ]
+        if self._case_sensitive_pattern is not None:
+            exact = [
+                Finding(match.group(), base + match.start(), match.group(), filename)
+                for match in self._case_sensitive_pattern.finditer(text)
+            ]
+            if exact:
+                findings = sorted(findings + exact, key=lambda finding: finding.offset)
+        return findings
+
+    def scan_files(self, files: dict) -> List[Finding]:
+        """Findings for every file of a generated site"""
+        findings = []
+        for filename, content in files.items():
+            if isinstance(content, str):
+                findings.extend(self.scan(content, filename))
+        return findings
+
+    def stream(self, filename: Optional[str] = None) -> "StreamScanner":
+        return StreamScanner(self, filename)
+
+
+class StreamScanner:
+    """Incremental scan of text arriving in chunks"""
+
+    def __init__(self, scanner: ContentScanner, filename: Optional[str] = None):
+        self.scanner = scanner
+        self.filename = filename
+        self.findings: List[Finding] = []
+        # End of the stream so far (to catch matches split across chunks) and its offset
+        self._tail = ""
+        self._tail_offset = 0
+        self._reported_until = 0
+
+    def feed(self, chunk: str) -> List[Finding]:
+        """New findings whose match ends in this chunk"""
+        text = self._tail + chunk
+        new = [
+            finding for finding in self.scanner.scan(text, self.filename, self._tail_offset)
+            if finding.offset >= self._reported_until
+        ]
+        if new:
+            self._reported_until = new[-1].offset + len(new[-1].text)
+            self.findings.extend(new)
+        # A match split across chunks starts at most max_length - 1 characters before the end
+        keep = min(len(text), self.scanner.max_length - 1)
+        self._tail_offset += len(text) - keep
+        self._tail = text[len(text) - keep:] if keep else ""
+        return new
+
+
+# Module-level scanner for the default rules
+default_scanner = ContentScanner()
+
+
+def sanitize_html(html: str) -> str:
+    """Remove script/iframe/object blocks, embeds, javascript: URLs and inline handlers in one pass
+
+    Blocks are cut up to their closing tag (or the end of the document when it
+    is missing) with plain searches, so there is no backtracking over the document.
+    """
+    parts = []
+    pos = 0
+    while True:
+        match = _SANITIZE_PATTERN.search(html, pos)
+        if match is None:
+            break
+        parts.append(html[pos:match.start()])
+        pos = match.end()
+        block = match.group("block")
+        if block:
+            close = _BLOCK_CLOSE[block.lower()].search(html, pos)
+            pos = close.end() if close else len(html)
+    parts.append(html[pos:])
+    return "".join(parts)
@@ -0,0 +1,107 @@
+"""
+Executor for CPU-bound pipeline stages (image validation/decoding, ZIP building)
+Keeps Pillow and DEFLATE work off the event loop and records per-stage queue
+depth, wait time and execution time so the pool can be sized
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _timed_call(func: Callable, args: tuple) -> tuple:
+    """Run func in the worker and report when it actually started and finished"""
+    started = time.time()
+    result = func(*args)
+    return result, started, time.time()
+
+
+class StageStats:
+    """Counters for one pipeline stage"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.wait_seconds = 0.0
+        self.exec_seconds = 0.0
+        self.max_exec_seconds = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "avg_wait_seconds": round(self.wait_seconds / self.completed, 6) if self.completed else 0.0,
+            "avg_exec_seconds": round(self.exec_seconds / self.completed, 6) if self.completed else 0.0,
+            "max_exec_seconds": round(self.max_exec_seconds, 6)
+        }
+
+
+class CpuExecutor:
+    """Thread or process pool with per-stage instrumentation"""
+
+    def __init__(self, kind: str = "thread", workers: int = 4):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.stages: Dict[str, StageStats] = {}
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cpu-stage")
+            logger.info(f"Started {self.kind} executor with {self.workers} workers")
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        """Submitted calls that are not yet running (approximate)"""
+        in_flight = sum(stats.in_flight for stats in self.stages.values())
+        return max(0, in_flight - self.workers)
+
+    async def run(self, stage: str, func: Callable, *args: Any) -> Any:
+        """Run func(*args) in the pool, accounting the time to the given stage"""
+        stats = self.stages.setdefault(stage, StageStats())
+        stats.submitted += 1
+        stats.in_flight += 1
+        submitted_at = time.time()
+        loop = asyncio.get_running_loop()
+        try:
+            result, started, finished = await loop.run_in_executor(self.executor, _timed_call, func, args)
+        except Exception:
+            stats.failed += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+
+        stats.completed += 1
+        elapsed = finished - started
+        stats.wait_seconds += max(0.0, started - submitted_at)
+        stats.exec_seconds += elapsed
+        stats.max_exec_seconds = max(stats.max_exec_seconds, elapsed)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "stages": {name: stats.to_dict() for name, stats in self.stages.items()}
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,241 @@
+"""
+Content-addressed caches for generated website ZIPs and image analyses
+In-memory LRU tier with size/TTL eviction plus an optional on-disk tier,
+bounded in bytes: reads touch a file's mtime and garbage collection removes
+expired files, then the least recently used ones. Disk I/O runs in a thread
+"""
+
+import asyncio
+import errno
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(request_data: dict, model: str, prompt_version: str, image_hashes: Iterable[str] = ()) -> str:
+    """Build a canonical hash for a validated generation request"""
+    payload = {
+        "request": request_data,
+        "model": model,
+        "prompt_version": prompt_version,
+        "images": sorted(image_hashes),
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """LRU cache of bytes (ZIPs, serialized analyses) keyed by content hash"""
+
+    # Disk collection brings the tier down to this fraction of disk_max_bytes
+    LOW_WATERMARK = 0.9
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl: float = 3600,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 1024 * 1024 * 1024
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._written_since_gc = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        self.disk_size = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or bool(self.disk_dir)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return cached bytes for key, or None on miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, data = entry
+                if now - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return data
+                self._remove(key)
+                self.evictions += 1
+
+        data = await asyncio.to_thread(self._read_disk, key, now) if self.disk_dir else None
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+        self._put_memory(key, data, now)
+        return data
+
+    async def set(self, key: str, data: bytes) -> None:
+        """Store bytes in memory and, if configured, on disk"""
+        now = time.time()
+        self._put_memory(key, data, now)
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "disk_enabled": bool(self.disk_dir),
+                "disk_max_bytes": self.disk_max_bytes,
+                "disk_bytes": self.disk_size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+            }
+
+    # Memory tier
+
+    def _put_memory(self, key: str, data: bytes, now: float) -> None:
+        if self.max_entries <= 0 or len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (now, data)
+            self._size += len(data)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, data = self._entries.pop(key)
+        self._size -= len(data)
+
+    # Disk tier
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.zip")
+
+    def _read_disk(self, key: str, now: float) -> Optional[bytes]:
+        path = self._disk_path(key)
+        try:
+            if now - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                with self._lock:
+                    self.disk_evictions += 1
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+            # Reads keep an entry recent for the LRU collection
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Generation cache disk read failed: {e}")
+            return None
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Generation cache disk write failed: {e}")
+            return
+        with self._lock:
+            self._written_since_gc += len(data)
+            due = self._written_since_gc >= self.disk_max_bytes * (1 - self.LOW_WATERMARK)
+            if due:
+                self._written_since_gc = 0
+        if due:
+            self.collect_disk()
+
+    def collect_disk(self) -> dict:
+        """Remove expired files, then the least recently used ones until the disk tier fits"""
+        if not self.disk_dir:
+            return {"skipped": True}
+        with open(os.path.join(self.disk_dir, ".gc.lock"), "w") as lock_file:
+            try:
+                # One collector at a time across worker processes; the others skip
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EACCES):
+                    return {"skipped": True}
+                raise
+            return self._collect_disk()
+
+    def _collect_disk(self) -> dict:
+        now = time.time()
+        files = []
+        removed = 0
+        for entry in os.scandir(self.disk_dir):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith(".tmp"):
+                # Left behind by a crashed write; recent ones may still be in progress
+                if now - stat.st_mtime > 3600:
+                    removed += self._remove_file(entry.path)
+            elif entry.name.endswith(".zip"):
+                if now - stat.st_mtime > self.ttl:
+                    removed += self._remove_file(entry.path)
+                else:
+                    files.append((stat.st_mtime, entry.path, stat.st_size))
+
+        total = sum(size for _, _, size in files)
+        evicted = 0
+        if total > self.disk_max_bytes:
+            target = self.disk_max_bytes * self.LOW_WATERMARK
+            for _, path, size in sorted(files):
+                if total <= target:
+                    break
+                freed = self._remove_file(path)
+                total -= freed
+                removed += freed
+                evicted += 1
+        with self._lock:
+            self.disk_evictions += evicted
+            self.disk_size = total
+        if removed:
+            logger.info(f"Generation cache disk collection freed {removed} bytes ({evicted} evicted, {total} bytes kept)")
+        return {"evicted": evicted, "bytes_freed": removed, "size": total}
+
+    @staticmethod
+    def _remove_file(path: str) -> int:
+        """Delete a file, returning the bytes freed"""
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            return size
+        except FileNotFoundError:
+            return 0
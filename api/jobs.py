@@ -0,0 +1,265 @@
+"""
+Bounded generation job queue with a fixed-size worker pool
+Workers are matched to Ollama's parallelism; when the queue is full new work
+is rejected with a Retry-After estimate instead of piling up until it times out.
+Finished results are kept for result_ttl, within a byte limit: past it the
+least recently requested ones are dropped first
+"""
+
+import asyncio
+import logging
+import math
+import secrets
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue cannot accept more work"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Job:
+    """A unit of generation work and its outcome"""
+
+    def __init__(self, func: Callable[[], Awaitable[bytes]], metadata: Optional[dict] = None):
+        self.id = secrets.token_hex(12)
+        self.func = func
+        self.metadata = metadata or {}
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[bytes] = None
+        self.size = 0
+        self.result_dropped = False
+        self.error_status: Optional[int] = None
+        self.error_detail: Optional[str] = None
+        self._done = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+    def complete(self, result: bytes) -> None:
+        self.status = COMPLETED
+        self.result = result
+        self.size = len(result)
+        self.finished_at = time.time()
+        self.func = None
+        self._done.set()
+
+    def fail(self, status_code: int, detail: str) -> None:
+        self.status = FAILED
+        self.error_status = status_code
+        self.error_detail = detail
+        self.finished_at = time.time()
+        self.func = None
+        self._done.set()
+
+    def drop_result(self) -> None:
+        """Free the result bytes, keeping the job's status"""
+        self.result = None
+        self.result_dropped = True
+
+    async def wait(self) -> bytes:
+        """Wait for the job and return its result, re-raising its error"""
+        await self._done.wait()
+        if self.status == FAILED:
+            raise HTTPException(status_code=self.error_status, detail=self.error_detail)
+        if self.result_dropped:
+            raise HTTPException(status_code=410, detail="Job result is no longer available")
+        return self.result
+
+    def to_dict(self) -> dict:
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            **self.metadata
+        }
+        if self.status == COMPLETED:
+            data["size"] = self.size
+            if self.result_dropped:
+                data["result_dropped"] = True
+        if self.status == FAILED:
+            data["error"] = {"status_code": self.error_status, "detail": self.error_detail}
+        return data
+
+
+class JobQueue:
+    """Bounded FIFO of jobs served by a fixed number of async workers"""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue: int = 20,
+        result_ttl: float = 3600,
+        max_result_bytes: int = 512 * 1024 * 1024,
+        default_duration: float = 60.0
+    ):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.max_result_bytes = max_result_bytes
+        self.jobs: Dict[str, Job] = {}
+        # Completed jobs still holding their result, least recently requested first
+        self._results: "OrderedDict[str, Job]" = OrderedDict()
+        self._result_bytes = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.dropped_results = 0
+        self._avg_duration = default_duration
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._loop = None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up"""
+        waves = (self.depth + self.running) / self.workers
+        return max(1, math.ceil(waves * self._avg_duration))
+
+    def check_capacity(self) -> None:
+        """Raise JobQueueFull if a new job would be rejected"""
+        if self.depth >= self.max_queue:
+            self.rejected += 1
+            raise JobQueueFull(self.retry_after())
+
+    def submit(self, func: Callable[[], Awaitable[bytes]], metadata: Optional[dict] = None) -> Job:
+        """Queue a job, raising JobQueueFull when the queue is at capacity"""
+        self._ensure_workers()
+        self._purge_expired()
+        self.check_capacity()
+
+        job = Job(func, metadata)
+        self.jobs[job.id] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def add_completed(self, result: bytes, metadata: Optional[dict] = None) -> Job:
+        """Register a job whose result is already known (e.g. a cache hit)"""
+        self._purge_expired()
+        job = Job(None, metadata)
+        job.started_at = job.created_at
+        job.complete(result)
+        self.jobs[job.id] = job
+        self._retain_result(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._purge_expired()
+        if job_id in self._results:
+            self._results.move_to_end(job_id)
+        return self.jobs.get(job_id)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.depth,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "result_bytes": self._result_bytes,
+            "max_result_bytes": self.max_result_bytes,
+            "dropped_results": self.dropped_results,
+            "avg_duration_seconds": round(self._avg_duration, 3),
+            "retry_after_seconds": self.retry_after()
+        }
+
+    async def start(self) -> None:
+        self._ensure_workers()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+
+    # Internal helpers
+
+    def _ensure_workers(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Started {self.workers} job workers (max queue {self.max_queue})")
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            self.running += 1
+            job.status = RUNNING
+            job.started_at = time.time()
+            try:
+                job.complete(await job.func())
+                self._retain_result(job)
+                self.completed += 1
+            except asyncio.CancelledError:
+                job.fail(503, "Server shutting down")
+                raise
+            except HTTPException as e:
+                job.fail(e.status_code, e.detail)
+                self.failed += 1
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {e}")
+                job.fail(500, "Internal server error during generation")
+                self.failed += 1
+            finally:
+                self.running -= 1
+                self._queue.task_done()
+                duration = time.time() - job.started_at
+                self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished and now - job.finished_at > self.result_ttl
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+            self._release_result(job_id)
+
+    def _retain_result(self, job: Job) -> None:
+        """Account a completed job's result, dropping the least recently requested ones over the limit"""
+        self._results[job.id] = job
+        self._result_bytes += job.size
+        # The newest result is always kept, even alone over the limit: its caller is about to read it
+        while self._result_bytes > self.max_result_bytes and len(self._results) > 1:
+            job_id, oldest = next(iter(self._results.items()))
+            self._release_result(job_id)
+            oldest.drop_result()
+            self.dropped_results += 1
+            logger.info(f"Dropped result of job {job_id} ({oldest.size} bytes) over the job result limit")
+
+    def _release_result(self, job_id: str) -> None:
+        job = self._results.pop(job_id, None)
+        if job is not None:
+            self._result_bytes -= job.size
@@ -0,0 +1,239 @@
+"""
+Incremental parser for the model's JSON reply
+Consumes the reply chunk by chunk and yields filename -> content pairs as
+soon as each string value closes, skipping code fences and surrounding prose
+"""
+
+import json
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Next character that ends or escapes a JSON string
+_STRING_SPECIAL = re.compile(r'["\\]')
+# Trailing incomplete escape sequence (e.g. "\", "\u00") left by a truncated reply
+_INCOMPLETE_ESCAPE = re.compile(r'\\(u[0-9a-fA-F]{0,3})?$')
+
+# Parser states
+SEEK_OBJECT = "seek_object"
+EXPECT_KEY = "expect_key"
+IN_KEY = "in_key"
+EXPECT_COLON = "expect_colon"
+EXPECT_VALUE = "expect_value"
+IN_VALUE = "in_value"
+SKIP_VALUE = "skip_value"
+AFTER_VALUE = "after_value"
+DONE = "done"
+
+
+def decode_json_string(raw: str) -> str:
+    """Decode the body of a JSON string, tolerating raw control characters"""
+    return json.loads(f'"{raw}"', strict=False)
+
+
+class StreamingFilesParser:
+    """Incremental parser for {"filename": "content", ...} replies"""
+
+    def __init__(self):
+        self.state = SEEK_OBJECT
+        self.files: Dict[str, str] = {}
+        self.current_key: Optional[str] = None
+        self.truncated = False
+        self.chars = 0
+        # Time spent parsing, for the json_extraction stage metric
+        self.parse_seconds = 0.0
+        # The whole reply, for a repair pass when it turns out not to be valid JSON
+        self._chunks: List[str] = []
+        self._depth = 0
+        self._buffer: List[str] = []
+        self._escape_pending = False
+        self._skip_depth = 0
+        self._skip_in_string = False
+        self._skip_escape = False
+
+    @property
+    def done(self) -> bool:
+        return self.state == DONE
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Consume a chunk and return the (filename, content) pairs it completed"""
+        started = time.perf_counter()
+        try:
+            return self._feed(chunk)
+        finally:
+            self.parse_seconds += time.perf_counter() - started
+
+    def finish(self) -> Dict[str, str]:
+        """Return all parsed files, recovering a value cut off mid-string"""
+        started = time.perf_counter()
+        try:
+            return self._finish()
+        finally:
+            self.parse_seconds += time.perf_counter() - started
+
+    # Internal helpers
+
+    def _feed(self, chunk: str) -> List[Tuple[str, str]]:
+        completed = []
+        self.chars += len(chunk)
+        self._chunks.append(chunk)
+        pos = 0
+        length = len(chunk)
+
+        while pos < length and self.state != DONE:
+            if self.state in (IN_KEY, IN_VALUE):
+                pos = self._read_string(chunk, pos, completed)
+                continue
+
+            if self.state == SKIP_VALUE:
+                pos = self._skip_value(chunk, pos)
+                continue
+
+            char = chunk[pos]
+            pos += 1
+            if char.isspace():
+                continue
+
+            if self.state == SEEK_OBJECT:
+                if char == '{':
+                    self._depth = 1
+                    self.state = EXPECT_KEY
+            elif self.state == EXPECT_KEY:
+                if char == '"':
+                    self._start_string(IN_KEY)
+                elif char == '}':
+                    self._close_object()
+                elif char != ',':
+                    # Not a JSON object after all (e.g. a brace in prose): keep looking
+                    self._reset()
+            elif self.state == EXPECT_COLON:
+                if char == ':':
+                    self.state = EXPECT_VALUE
+                else:
+                    self._reset()
+            elif self.state == EXPECT_VALUE:
+                if char == '"':
+                    self._start_string(IN_VALUE)
+                elif char == '{':
+                    # Nested object such as {"files": {...}}: its keys are files too
+                    self._depth += 1
+                    self.current_key = None
+                    self.state = EXPECT_KEY
+                else:
+                    self.current_key = None
+                    self._skip_depth = 1 if char == '[' else 0
+                    self._skip_in_string = False
+                    self._skip_escape = False
+                    self.state = SKIP_VALUE
+            elif self.state == AFTER_VALUE:
+                if char == ',':
+                    self.state = EXPECT_KEY
+                elif char == '}':
+                    self._close_object()
+
+        return completed
+
+    def _finish(self) -> Dict[str, str]:
+        if self.state == IN_VALUE and self.current_key:
+            raw = _INCOMPLETE_ESCAPE.sub('', ''.join(self._buffer))
+            try:
+                self.files[self.current_key] = decode_json_string(raw)
+            except json.JSONDecodeError:
+                pass
+        self.truncated = self.state not in (DONE, SEEK_OBJECT)
+        self.current_key = None
+        return self.files
+
+    def _start_string(self, state: str) -> None:
+        self.state = state
+        self._buffer = []
+        self._escape_pending = False
+
+    def _read_string(self, chunk: str, pos: int, completed: list) -> int:
+        if self._escape_pending:
+            self._buffer.append(chunk[pos])
+            self._escape_pending = False
+            pos += 1
+
+        while pos < len(chunk):
+            match = _STRING_SPECIAL.search(chunk, pos)
+            if match is None:
+                self._buffer.append(chunk[pos:])
+                return len(chunk)
+
+            index = match.start()
+            if chunk[index] == '\\':
+                if index + 1 < len(chunk):
+                    self._buffer.append(chunk[pos:index + 2])
+                    pos = index + 2
+                else:
+                    self._buffer.append(chunk[pos:])
+                    self._escape_pending = True
+                    return len(chunk)
+                continue
+
+            self._buffer.append(chunk[pos:index])
+            self._end_string(completed)
+            return index + 1
+
+        return pos
+
+    def _end_string(self, completed: list) -> None:
+        raw = ''.join(self._buffer)
+        self._buffer = []
+        try:
+            text = decode_json_string(raw)
+        except json.JSONDecodeError:
+            text = raw
+
+        if self.state == IN_KEY:
+            self.current_key = text
+            self.state = EXPECT_COLON
+        else:
+            self.files[self.current_key] = text
+            completed.append((self.current_key, text))
+            self.current_key = None
+            self.state = AFTER_VALUE
+
+    def _skip_value(self, chunk: str, pos: int) -> int:
+        """Skip a non-string value (number, literal or array)"""
+        while pos < len(chunk):
+            char = chunk[pos]
+            if self._skip_escape:
+                self._skip_escape = False
+            elif self._skip_in_string:
+                if char == '\\':
+                    self._skip_escape = True
+                elif char == '"':
+                    self._skip_in_string = False
+            elif char == '"':
+                self._skip_in_string = True
+            elif char in '[{':
+                self._skip_depth += 1
+            elif char in ']}':
+                if self._skip_depth == 0:
+                    # End of the enclosing object: let the main loop close it
+                    self.state = AFTER_VALUE
+                    return pos
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self.state = AFTER_VALUE
+                    return pos + 1
+            elif char == ',' and self._skip_depth == 0:
+                self.state = AFTER_VALUE
+                return pos
+            pos += 1
+        return pos
+
+    def _close_object(self) -> None:
+        self._depth -= 1
+        self.state = DONE if self._depth <= 0 else AFTER_VALUE
+
+    def _reset(self) -> None:
+        self.state = SEEK_OBJECT
+        self._depth = 0
+        self.current_key = None
@@ -0,0 +1,84 @@
+"""
+Ollama timing statistics
+Aggregates the durations and token counts Ollama reports in its final response
+chunk, so prompt evaluation can be told apart from generation (and from model
+loading) per model
+"""
+
+import logging
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+NANOSECONDS = 1e9
+
+
+class ModelTimings:
+    """Counters for one model"""
+
+    def __init__(self):
+        self.requests = 0
+        self.loads = 0
+        self.load_seconds = 0.0
+        self.prompt_tokens = 0
+        self.prompt_eval_seconds = 0.0
+        self.eval_tokens = 0
+        self.eval_seconds = 0.0
+        self.total_seconds = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "loads": self.loads,
+            "load_seconds": round(self.load_seconds, 3),
+            "prompt_tokens": self.prompt_tokens,
+            "prompt_eval_seconds": round(self.prompt_eval_seconds, 3),
+            "avg_prompt_tokens": round(self.prompt_tokens / self.requests, 1) if self.requests else 0.0,
+            "avg_prompt_eval_seconds": round(self.prompt_eval_seconds / self.requests, 3) if self.requests else 0.0,
+            "prompt_tokens_per_second": round(self.prompt_tokens / self.prompt_eval_seconds, 1) if self.prompt_eval_seconds else 0.0,
+            "eval_tokens": self.eval_tokens,
+            "eval_seconds": round(self.eval_seconds, 3),
+            "eval_tokens_per_second": round(self.eval_tokens / self.eval_seconds, 1) if self.eval_seconds else 0.0,
+            "avg_total_seconds": round(self.total_seconds / self.requests, 3) if self.requests else 0.0
+        }
+
+
+class LlmStats:
+    """Per-model prompt-eval / eval timings from Ollama responses"""
+
+    # A load_duration above this means the model was (re)loaded for the request
+    LOAD_THRESHOLD_SECONDS = 1.0
+
+    def __init__(self):
+        self.models: Dict[str, ModelTimings] = {}
+
+    def record(self, model: str, response: dict) -> dict:
+        """Account a final (done) response chunk; returns the timings in seconds"""
+        timings = {
+            "load_seconds": response.get("load_duration", 0) / NANOSECONDS,
+            "prompt_tokens": response.get("prompt_eval_count", 0),
+            "prompt_eval_seconds": response.get("prompt_eval_duration", 0) / NANOSECONDS,
+            "eval_tokens": response.get("eval_count", 0),
+            "eval_seconds": response.get("eval_duration", 0) / NANOSECONDS,
+            "total_seconds": response.get("total_duration", 0) / NANOSECONDS
+        }
+        stats = self.models.setdefault(model, ModelTimings())
+        stats.requests += 1
+        if timings["load_seconds"] >= self.LOAD_THRESHOLD_SECONDS:
+            stats.loads += 1
+        stats.load_seconds += timings["load_seconds"]
+        stats.prompt_tokens += timings["prompt_tokens"]
+        stats.prompt_eval_seconds += timings["prompt_eval_seconds"]
+        stats.eval_tokens += timings["eval_tokens"]
+        stats.eval_seconds += timings["eval_seconds"]
+        stats.total_seconds += timings["total_seconds"]
+
+        logger.info(
+            f"Ollama {model}: prompt {timings['prompt_tokens']} tokens in {timings['prompt_eval_seconds']:.2f}s, "
+            f"eval {timings['eval_tokens']} tokens in {timings['eval_seconds']:.2f}s, "
+            f"load {timings['load_seconds']:.2f}s"
+        )
+        return timings
+
+    def stats(self) -> dict:
+        return {model: timings.to_dict() for model, timings in self.models.items()}
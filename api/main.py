@@ -1,21 +1,43 @@
 import asyncio
+import base64
+import copy
+import hashlib
 import io
 import json
 import logging
+import mimetypes
 import os
 import re
+import time
 import zipfile
-from typing import List, Optional
+from typing import AsyncIterator, Awaitable, Callable, Iterator, List, Optional, Tuple
 
 import httpx
-from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi import Depends, FastAPI, File, Form, Header, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
 from PIL import Image
-from pydantic import BaseModel, Field, validator
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from slowapi.util import get_remote_address
+from pydantic import BaseModel, Field, ValidationError, validator
+
+from artifact_store import ArtifactNotFound, ArtifactStore, MappedFile, RangeNotSatisfiable, parse_range
+from batch import COMPLETED, FAILED, BatchError, BatchRunner, InvalidEntry, first_indices, parse_batch_body
+from budget import TIERS, TokenBudget, parse_model_ladder, select_model
+from generation_cache import GenerationCache, make_cache_key
+from content_scan import default_scanner
+from cpu_executor import CpuExecutor
+from jobs import Job, JobQueue, JobQueueFull
+from llm_stats import LlmStats
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, MetricsRegistry
+from ollama_pool import NoBackendAvailable, OllamaPool
+from palette import extract_palette, merge_palettes
+from rate_limit import RateLimited, RateLimiter, create_backend, parse_limit, retry_after_header
+from json_stream import StreamingFilesParser
+from structured_output import files_schema, is_valid_json, ollama_format, plan_schema, repair_files_json
+from single_flight import SingleFlight, coalesce_key
+from upload_guard import UploadGuardMiddleware
+from site_editor import add_nav_link, extract_css_classes, extract_nav, mentions_page, remove_nav_link, unlink_page
+from site_templates import CSS_CLASSES, DEFAULT_FONTS, first_hex_color, render_page, render_script, render_styles
+from zip_stream import ZipStreamWriter, compress_entry, iter_zip
 
 # Configure logging
 logging.basicConfig(
@@ -26,14 +48,111 @@ logger = logging.getLogger(__name__)
 
 # Environment variables with defaults
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://ollama:11434")
+# Comma-separated list of Ollama backends; defaults to OLLAMA_HOST alone
+OLLAMA_HOSTS = [host.strip() for host in os.getenv("OLLAMA_HOSTS", OLLAMA_HOST).split(",") if host.strip()]
 CODE_MODEL = os.getenv("CODE_MODEL", "qwen2.5-coder:7b")
 VISION_MODEL = os.getenv("VISION_MODEL", "llama3.2-vision")
 MAX_PAGES = int(os.getenv("MAX_PAGES", "5"))
 MAX_DESCRIPTION_LENGTH = int(os.getenv("MAX_DESCRIPTION_LENGTH", "2000"))
 MAX_IMAGES = int(os.getenv("MAX_IMAGES", "3"))
 MAX_IMAGE_SIZE_MB = int(os.getenv("MAX_IMAGE_SIZE_MB", "5"))
+MAX_FORM_FIELD_KB = int(os.getenv("MAX_FORM_FIELD_KB", "64"))
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "300"))
-RATE_LIMIT = os.getenv("RATE_LIMIT_PER_MINUTE", "10 per minute")
+
+# Rate limiting in cost units: a one-page request without images costs 1, each
+# extra page and each image adds to it. memory | sqlite (one host) | redis (replicas)
+RATE_LIMIT = parse_limit(os.getenv("RATE_LIMIT_PER_MINUTE", "10 per minute"))
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_STORAGE_URL = os.getenv("RATE_LIMIT_STORAGE_URL", "")
+RATE_LIMIT_PAGE_COST = float(os.getenv("RATE_LIMIT_PAGE_COST", "0.25"))
+RATE_LIMIT_IMAGE_COST = float(os.getenv("RATE_LIMIT_IMAGE_COST", "0.5"))
+# Comma-separated API keys (authentication is off when empty) and their quotas;
+# API_KEY_QUOTAS overrides the default per key: "key1=5000/day,key2=100/hour"
+API_KEYS = {key.strip() for key in os.getenv("API_KEYS", "").split(",") if key.strip()}
+API_KEY_QUOTA = parse_limit(os.getenv("API_KEY_QUOTA", "500/day"))
+API_KEY_QUOTAS = {
+    key.strip(): parse_limit(limit)
+    for key, _, limit in (item.partition("=") for item in os.getenv("API_KEY_QUOTAS", "").split(",") if item.strip())
+}
+
+# Shared Ollama HTTP client (connection pool)
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "20"))
+OLLAMA_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OLLAMA_MAX_KEEPALIVE_CONNECTIONS", "10"))
+OLLAMA_KEEPALIVE_EXPIRY = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "60"))
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "10"))
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "10"))
+OLLAMA_PROBE_INTERVAL = float(os.getenv("OLLAMA_PROBE_INTERVAL", "10"))
+OLLAMA_BREAKER_FAILURES = int(os.getenv("OLLAMA_BREAKER_FAILURES", "3"))
+OLLAMA_BREAKER_RESET = float(os.getenv("OLLAMA_BREAKER_RESET", "30"))
+VISION_TIMEOUT = float(os.getenv("VISION_TIMEOUT", "60"))
+PALETTE_COLORS = int(os.getenv("PALETTE_COLORS", "5"))
+VISION_CONCURRENCY = int(os.getenv("VISION_CONCURRENCY", "2"))
+IMAGE_ANALYSIS_CACHE_SIZE = int(os.getenv("IMAGE_ANALYSIS_CACHE_SIZE", "512"))
+IMAGE_ANALYSIS_CACHE_TTL = int(os.getenv("IMAGE_ANALYSIS_CACHE_TTL", "86400"))
+STREAM_HEARTBEAT_INTERVAL = float(os.getenv("STREAM_HEARTBEAT_INTERVAL", "15"))
+# Keep models resident between requests, and send every code-model request with
+# the same context size: a different num_ctx makes Ollama reload the model and
+# discards the cached prompt prefix
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "16384"))
+STREAM_PROGRESS_EVERY = 32
+
+# Generation result cache
+GENERATION_CACHE_SIZE = int(os.getenv("GENERATION_CACHE_SIZE", "128"))
+GENERATION_CACHE_MAX_MB = int(os.getenv("GENERATION_CACHE_MAX_MB", "256"))
+GENERATION_CACHE_TTL = int(os.getenv("GENERATION_CACHE_TTL", "3600"))
+GENERATION_CACHE_DIR = os.getenv("GENERATION_CACHE_DIR", "")
+GENERATION_CACHE_DISK_MAX_MB = int(os.getenv("GENERATION_CACHE_DISK_MAX_MB", "1024"))
+
+# Persistent store of generated sites served on /artifacts (empty ARTIFACT_DIR disables it)
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "/tmp/webgen-artifacts")
+ARTIFACT_MAX_MB = int(os.getenv("ARTIFACT_MAX_MB", "1024"))
+
+# Generation mode: "single" (one prompt for the whole site), "parallel"
+# (site plan + one request per page/asset), "template" (styles, script and page
+# shell rendered locally, one request per page body) or "auto" (parallel above the threshold)
+GENERATION_MODE = os.getenv("GENERATION_MODE", "auto")
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PARALLEL_PAGE_THRESHOLD", "3"))
+PARALLEL_GENERATION_CONCURRENCY = int(os.getenv("PARALLEL_GENERATION_CONCURRENCY", "4"))
+
+# Adaptive generation budget: num_predict sized from past replies of the same kind
+# and page count, within these bounds, and a ladder of smaller code models for
+# smaller sites ("model@max_pages", smallest first; CODE_MODEL is the top rung)
+TOKEN_BUDGET_MIN = int(os.getenv("TOKEN_BUDGET_MIN", "512"))
+TOKEN_BUDGET_MAX = int(os.getenv("TOKEN_BUDGET_MAX", "8192"))
+MODEL_LADDER = parse_model_ladder(os.getenv("MODEL_LADDER", ""))
+# Tier of requests that do not choose one: fast | balanced | quality
+DEFAULT_TIER = os.getenv("DEFAULT_TIER", "balanced")
+
+# Job queue: workers should match Ollama's parallelism (OLLAMA_NUM_PARALLEL)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "20"))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))
+JOB_RESULT_MAX_MB = int(os.getenv("JOB_RESULT_MAX_MB", "512"))
+# /health/ready reports not ready once this many jobs are waiting
+READINESS_MAX_QUEUE_DEPTH = int(os.getenv("READINESS_MAX_QUEUE_DEPTH", str(JOB_QUEUE_SIZE)))
+
+# /generate/batch: sites per batch, and how many of one batch's sites may be queued at once
+BATCH_MAX_SITES = int(os.getenv("BATCH_MAX_SITES", "50"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", str(JOB_WORKERS)))
+
+# Executor for CPU-bound stages (image validation/decoding, ZIP building)
+CPU_EXECUTOR = os.getenv("CPU_EXECUTOR", "thread")
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Security scan of model output as it streams: log (report findings) | reject (abort with 502) | off
+CONTENT_SCAN = os.getenv("CONTENT_SCAN", "log")
+
+# Constrain the code model's JSON replies with Ollama's "format" option:
+# schema (JSON schema of the expected files, Ollama >= 0.5) | json (any JSON) | off
+STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "schema")
+
+# ZIP output: deflate | store | auto (store entries smaller than ZIP_STORE_THRESHOLD bytes)
+ZIP_COMPRESSION = os.getenv("ZIP_COMPRESSION", "auto")
+ZIP_STORE_THRESHOLD = int(os.getenv("ZIP_STORE_THRESHOLD", "1024"))
+
+# Bump whenever the generation prompt changes so cached results are not reused
+PROMPT_VERSION = "3"
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -42,20 +161,181 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Rate limiting
-limiter = Limiter(key_func=get_remote_address)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# Cost-weighted rate limiting, shared across workers/replicas depending on the backend
+rate_limiter = RateLimiter(create_backend(RATE_LIMIT_BACKEND, RATE_LIMIT_STORAGE_URL))
 
 # CORS middleware (configure allowed origins in production)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # TODO: Configure specific origins in production
     allow_credentials=True,
-    allow_methods=["POST", "GET"],
+    allow_methods=["POST", "GET", "DELETE"],
     allow_headers=["*"],
 )
 
+# In-process metrics served on /metrics
+metrics = MetricsRegistry(prefix="webgen_")
+HTTP_REQUESTS = metrics.counter("http_requests_total", "HTTP requests by route and status code", ["method", "path", "status"])
+HTTP_DURATION = metrics.histogram("http_request_duration_seconds", "HTTP request latency including streamed bodies", ["method", "path"])
+HTTP_IN_FLIGHT = metrics.gauge("http_requests_in_flight", "HTTP requests being served")
+STAGE_SECONDS = metrics.histogram("stage_duration_seconds", "Duration of generation pipeline stages", ["stage"])
+LLM_PROMPT_TOKENS = metrics.counter("llm_prompt_tokens_total", "Prompt tokens evaluated by Ollama (prompt_eval_count)", ["model"])
+LLM_COMPLETION_TOKENS = metrics.counter("llm_completion_tokens_total", "Tokens generated by Ollama (eval_count)", ["model"])
+GENERATIONS_IN_FLIGHT = metrics.gauge("generations_in_flight", "Website generations running")
+GENERATION_ERRORS = metrics.counter("generation_errors_total", "Failed generations by status code", ["status"])
+CONTENT_FINDINGS = metrics.counter("content_findings_total", "Dangerous keywords found in model output by rule", ["rule"])
+UPLOADS_REJECTED = metrics.counter("uploads_rejected_total", "Multipart uploads aborted while streaming by reason", ["reason"])
+JSON_REPAIRS = metrics.counter("json_repairs_total", "Model replies that were not valid JSON, by repair outcome", ["outcome"])
+BATCH_ENTRIES = metrics.counter("batch_entries_total", "Batch generation entries by outcome", ["outcome"])
+RATE_LIMITED = metrics.counter("rate_limited_total", "Requests rejected by the rate limiter by scope", ["scope"])
+metrics.gauge("job_queue_depth", "Generation jobs waiting for a worker", function=lambda: job_queue.depth)
+metrics.gauge("cpu_executor_queue_depth", "CPU stage calls waiting for a worker", function=lambda: cpu_executor.queue_depth)
+metrics.gauge(
+    "ollama_outstanding_requests", "Requests in flight per Ollama backend", ["backend"],
+    function=lambda: {(backend.url,): backend.outstanding for backend in ollama_pool.backends}
+)
+metrics.gauge(
+    "ollama_backend_healthy", "Whether the last probe of each Ollama backend succeeded", ["backend"],
+    function=lambda: {(backend.url,): int(bool(backend.healthy)) for backend in ollama_pool.backends}
+)
+
+# Enforce upload limits while the body streams in, before the form parser spools it
+app.add_middleware(
+    UploadGuardMiddleware,
+    max_files=MAX_IMAGES,
+    max_file_size=MAX_IMAGE_SIZE_MB * 1024 * 1024,
+    max_field_size=MAX_FORM_FIELD_KB * 1024,
+    on_reject=lambda reason: UPLOADS_REJECTED.inc(reason=reason)
+)
+app.add_middleware(MetricsMiddleware, requests=HTTP_REQUESTS, duration=HTTP_DURATION, in_flight=HTTP_IN_FLIGHT)
+
+# Cache of generated ZIPs keyed by request content
+generation_cache = GenerationCache(
+    max_entries=GENERATION_CACHE_SIZE,
+    max_bytes=GENERATION_CACHE_MAX_MB * 1024 * 1024,
+    ttl=GENERATION_CACHE_TTL,
+    disk_dir=GENERATION_CACHE_DIR,
+    disk_max_bytes=GENERATION_CACHE_DISK_MAX_MB * 1024 * 1024
+)
+
+# Generated files deduplicated by content hash, with ZIPs assembled on download
+artifact_store = ArtifactStore(
+    ARTIFACT_DIR,
+    max_bytes=ARTIFACT_MAX_MB * 1024 * 1024,
+    compression=ZIP_COMPRESSION,
+    store_threshold=ZIP_STORE_THRESHOLD
+) if ARTIFACT_DIR else None
+
+# Per-image analysis results keyed by image content hash
+image_analysis_cache = GenerationCache(
+    max_entries=IMAGE_ANALYSIS_CACHE_SIZE,
+    max_bytes=16 * 1024 * 1024,
+    ttl=IMAGE_ANALYSIS_CACHE_TTL
+)
+
+# Bounded queue and worker pool for generation jobs
+job_queue = JobQueue(
+    workers=JOB_WORKERS,
+    max_queue=JOB_QUEUE_SIZE,
+    result_ttl=JOB_RESULT_TTL,
+    max_result_bytes=JOB_RESULT_MAX_MB * 1024 * 1024
+)
+
+# Thread/process pool that keeps CPU-bound work off the event loop
+cpu_executor = CpuExecutor(kind=CPU_EXECUTOR, workers=CPU_EXECUTOR_WORKERS)
+
+# Coalesce identical in-flight vision analyses and generations
+vision_flights = SingleFlight("vision")
+generation_flights = SingleFlight("generation")
+
+# Prompt-eval / eval timings reported by Ollama
+llm_stats = LlmStats()
+
+def make_ollama_client(base_url: str) -> httpx.AsyncClient:
+    """Pooled HTTP client for one Ollama backend"""
+    return httpx.AsyncClient(
+        base_url=base_url,
+        limits=httpx.Limits(
+            max_connections=OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=OLLAMA_CONNECT_TIMEOUT)
+    )
+
+
+# Ollama backends: least-outstanding routing, background /api/tags probes, circuit breakers
+ollama_pool = OllamaPool(
+    OLLAMA_HOSTS,
+    client_factory=make_ollama_client,
+    probe_interval=OLLAMA_PROBE_INTERVAL,
+    probe_timeout=HEALTH_CHECK_TIMEOUT,
+    failure_threshold=OLLAMA_BREAKER_FAILURES,
+    reset_timeout=OLLAMA_BREAKER_RESET
+)
+
+
+def ollama_timeout(seconds: float) -> httpx.Timeout:
+    """Per-operation timeout that keeps the shared connect timeout"""
+    return httpx.Timeout(seconds, connect=OLLAMA_CONNECT_TIMEOUT)
+
+
+@app.on_event("startup")
+async def start_ollama_pool():
+    """Start probing the Ollama backends"""
+    await ollama_pool.start()
+    logger.info(
+        f"Ollama backends: {', '.join(OLLAMA_HOSTS)} "
+        f"(max_connections={OLLAMA_MAX_CONNECTIONS}, keepalive={OLLAMA_MAX_KEEPALIVE_CONNECTIONS})"
+    )
+
+
+@app.on_event("startup")
+async def start_job_workers():
+    """Start the generation worker pool"""
+    await job_queue.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    """Cancel the generation workers"""
+    await job_queue.stop()
+
+
+@app.on_event("shutdown")
+async def stop_cpu_executor():
+    """Shut down the CPU-bound stage executor"""
+    cpu_executor.shutdown()
+
+
+@app.on_event("shutdown")
+async def stop_ollama_pool():
+    """Stop the prober and close every backend's connections"""
+    await ollama_pool.stop()
+
+
+@app.on_event("shutdown")
+async def stop_rate_limiter():
+    """Close the rate limit storage"""
+    await rate_limiter.close()
+
+
+@app.on_event("startup")
+async def collect_artifacts():
+    """Bring the artifact store under its size limit and drop leftovers of crashed writes"""
+    if artifact_store is not None:
+        await asyncio.to_thread(artifact_store.collect)
+
+
+@app.on_event("startup")
+async def collect_generation_cache():
+    """Drop expired files from the generation cache's disk tier and bring it under its size limit"""
+    await asyncio.to_thread(generation_cache.collect_disk)
+
+
+GENERATION_MODES = ("single", "parallel", "template", "auto")
+
+
 # Pydantic models
 class GenerateRequest(BaseModel):
     company_name: str = Field(..., min_length=1, max_length=100)
@@ -63,6 +343,8 @@ class GenerateRequest(BaseModel):
     theme_hint: Optional[str] = Field(None, max_length=200)
     pages: Optional[List[str]] = Field(default=None, max_items=MAX_PAGES)
     require_dark_mode: bool = Field(default=False)
+    mode: Optional[str] = Field(default=None)
+    tier: Optional[str] = Field(default=None)
 
     @validator('company_name', 'description', 'theme_hint')
     def sanitize_input(cls, v):
@@ -85,86 +367,154 @@ class GenerateRequest(BaseModel):
                     raise ValueError(f'Page name too long: {page}')
         return v
 
+    @validator('mode')
+    def validate_mode(cls, v):
+        if v and v not in GENERATION_MODES:
+            raise ValueError(f'Invalid mode: {v}. Use one of: {", ".join(GENERATION_MODES)}')
+        return v
+
+    @validator('tier')
+    def validate_tier(cls, v):
+        if v and v not in TIERS:
+            raise ValueError(f'Invalid tier: {v}. Use one of: {", ".join(TIERS)}')
+        return v
+
 
 class HealthResponse(BaseModel):
     status: str
     ollama_connected: bool
+    checked_at: Optional[float] = None
+    age_seconds: Optional[float] = None
+    probe_latency_seconds: Optional[float] = None
+    healthy_backends: int = 0
+    total_backends: int = 0
+    loaded_models: List[str] = []
 
 
 # Utility functions
-async def check_ollama_health() -> bool:
-    """Check if Ollama service is healthy"""
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{OLLAMA_HOST}/api/tags")
-            return response.status_code == 200
-    except Exception as e:
-        logger.error(f"Ollama health check failed: {e}")
-        return False
-
-
-def validate_image(file: UploadFile) -> bool:
-    """Validate uploaded image"""
+def check_image_bytes(data: bytes) -> bool:
+    """Check that bytes decode as a supported image (CPU-bound, runs in the executor)"""
     try:
-        # Check file size
-        file.file.seek(0, 2)  # Seek to end
-        file_size = file.file.tell()
-        file.file.seek(0)  # Reset to start
-        
-        if file_size > MAX_IMAGE_SIZE_MB * 1024 * 1024:
-            return False
-        
         # Check if it's a valid image
-        image = Image.open(file.file)
+        image = Image.open(io.BytesIO(data))
         image.verify()
-        file.file.seek(0)  # Reset for later use
         
         # Check format
-        if image.format not in ['JPEG', 'PNG', 'GIF', 'WEBP']:
-            return False
-        
-        return True
+        return image.format in ['JPEG', 'PNG', 'GIF', 'WEBP']
     except Exception as e:
         logger.error(f"Image validation failed: {e}")
         return False
 
 
-async def analyze_images_with_vision(images: List[UploadFile]) -> dict:
+async def validate_image(file: UploadFile) -> Optional[bytes]:
+    """Validate uploaded image, returning its bytes or None if invalid"""
+    # Check file size
+    file.file.seek(0, 2)  # Seek to end
+    file_size = file.file.tell()
+    file.file.seek(0)  # Reset to start
+    
+    if file_size > MAX_IMAGE_SIZE_MB * 1024 * 1024:
+        return None
+    
+    data = await file.read()
+    await file.seek(0)  # Reset for later use
+    
+    if not await cpu_executor.run("image_validation", check_image_bytes, data):
+        return None
+    return data
+
+
+async def analyze_images_with_vision(images: List[bytes]) -> dict:
     """Analyze images using vision model to extract color palette and design hints"""
+    if not images:
+        return {}
+    
+    # Analyze every image concurrently, bounded so vision calls don't flood Ollama
+    semaphore = asyncio.Semaphore(VISION_CONCURRENCY)
+    
+    async def analyze(image_data: bytes) -> dict:
+        async with semaphore:
+            return await analyze_image_cached(image_data)
+    
+    with STAGE_SECONDS.time(stage="vision_analysis"):
+        results = await asyncio.gather(*(analyze(image_data) for image_data in images))
+    return merge_design_hints([result for result in results if result])
+
+
+async def analyze_image_cached(image_data: bytes) -> dict:
+    """Analyze one image, reusing results for identical image content"""
+    image_hash = hashlib.sha256(image_data).hexdigest()
+    key = coalesce_key(VISION_MODEL, PALETTE_COLORS, image_hash)
+    
+    cached = await image_analysis_cache.get(key)
+    if cached is not None:
+        logger.info(f"Image analysis cache hit: {image_hash[:12]}")
+        return json.loads(cached)
+    
+    result = await vision_flights.do(key, lambda: analyze_image_data(image_data))
+    if result.get("vision_ok"):
+        await image_analysis_cache.set(key, json.dumps(result).encode("utf-8"))
+    return result
+
+
+def merge_design_hints(results: List[dict]) -> dict:
+    """Merge per-image analyses into one weighted hint set
+    
+    Palettes are combined by pixel weight (each image counts equally). For
+    vision hints, earlier images win scalar values and list values are unioned.
+    """
+    if not results:
+        return {}
+    
+    palette = merge_palettes([result["palette"] for result in results], colors=PALETTE_COLORS)
+    design_hints = {}
+    for result in results:
+        for key, value in result["hints"].items():
+            if key not in design_hints:
+                # Analyses are shared with other requests (cache, single-flight): never merge into them
+                design_hints[key] = copy.deepcopy(value)
+            elif isinstance(design_hints[key], list) and isinstance(value, list):
+                design_hints[key] += [item for item in value if item not in design_hints[key]]
+    
+    if palette["primary_color"]:
+        design_hints.setdefault("primary_color", palette["primary_color"])
+        design_hints["extracted_palette"] = [color["hex"] for color in palette["colors"]]
+        design_hints["extracted_palette_weights"] = [color["weight"] for color in palette["colors"]]
+        design_hints["text_pairs"] = palette["pairs"]
+    return design_hints
+
+
+async def analyze_image_data(image_data: bytes) -> dict:
+    """Analyze raw image bytes to extract color palette and design hints
+    
+    Returns {"palette": ..., "hints": ..., "vision_ok": bool}; hints is empty
+    when the vision model did not return usable suggestions.
+    """
     try:
-        # For simplicity, analyze first image only
-        if not images:
-            return {}
-        
-        image = images[0]
-        image_data = await image.read()
-        await image.seek(0)
-        
-        # Convert to base64 or process as needed
-        # For this example, we'll extract basic info
-        img = Image.open(io.BytesIO(image_data))
-        
-        # Get dominant colors (simplified)
-        img_small = img.resize((50, 50))
-        pixels = list(img_small.getdata())
-        
-        # Simple color extraction
-        r_avg = sum(p[0] for p in pixels if len(p) >= 3) // len(pixels)
-        g_avg = sum(p[1] for p in pixels if len(p) >= 3) // len(pixels)
-        b_avg = sum(p[2] for p in pixels if len(p) >= 3) // len(pixels)
-        
-        primary_color = f"#{r_avg:02x}{g_avg:02x}{b_avg:02x}"
-        
-        prompt = f"""Analyze this image and suggest:
+        # Dominant colors from the pixels themselves
+        palette = await cpu_executor.run("image_analysis", extract_palette, image_data, PALETTE_COLORS)
+    except Exception as e:
+        logger.error(f"Image analysis failed: {e}")
+        return {}
+    
+    analysis = {"palette": palette, "hints": {}, "vision_ok": False}
+    primary_color = palette["primary_color"]
+    if not primary_color:
+        return analysis
+    palette_hex = [color["hex"] for color in palette["colors"]]
+    
+    prompt = f"""Analyze this image and suggest:
 1. A complementary color palette (3-5 colors)
 2. Font style suggestions (modern, classic, playful, professional)
 3. Overall design mood
 
-Image has a dominant color of {primary_color}. Provide suggestions in JSON format."""
+Image has a dominant color of {primary_color} and these dominant colors by weight: {', '.join(palette_hex)}. Provide suggestions in JSON format."""
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{OLLAMA_HOST}/api/chat",
+    try:
+        # Only route to backends that have the vision model installed
+        async with ollama_pool.acquire(VISION_MODEL) as lease:
+            response = await lease.client.post(
+                "/api/chat",
                 json={
                     "model": VISION_MODEL,
                     "messages": [
@@ -174,102 +524,89 @@ Image has a dominant color of {primary_color}. Provide suggestions in JSON forma
                         }
                     ],
                     "stream": False,
+                    "keep_alive": OLLAMA_KEEP_ALIVE,
                     "options": {
                         "temperature": 0.7,
                         "top_p": 0.9
                     }
                 },
-                timeout=60.0
+                timeout=ollama_timeout(VISION_TIMEOUT)
             )
+            if response.status_code >= 500:
+                lease.fail()
+        
+        if response.status_code == 200:
+            result = response.json()
+            record_ollama_timings(VISION_MODEL, result)
+            content = result.get('message', {}).get('content', '{}')
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result.get('message', {}).get('content', '{}')
-                
-                # Try to extract JSON from response
-                try:
-                    # Look for JSON in the response
-                    json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                    if json_match:
-                        design_hints = json.loads(json_match.group())
-                    else:
-                        design_hints = {"primary_color": primary_color}
-                except:
-                    design_hints = {"primary_color": primary_color}
-                
-                return design_hints
-            
-        return {"primary_color": primary_color}
+            # Try to extract JSON from response
+            hints = parse_json_object(content)
+            if hints is not None:
+                analysis["hints"] = hints
+                analysis["vision_ok"] = True
+        else:
+            logger.warning(f"Vision model returned {response.status_code}")
         
     except Exception as e:
-        logger.error(f"Image analysis failed: {e}")
-        return {}
+        logger.error(f"Vision analysis failed: {e}")
+    
+    return analysis
 
 
-async def generate_website_with_llm(
-    request: GenerateRequest,
-    design_hints: dict = None
-) -> dict:
-    """Generate website files using code model"""
-    
-    # Theme configurations matching the frontend form
-    theme_configs = {
-        "modern": {
-            "colors": {"primary": "#3B82F6", "secondary": "#1E40AF", "accent": "#60A5FA", "bg": "#F9FAFB"},
-            "description": "Clean, contemporary design with blue tones, card-based layouts, subtle shadows"
-        },
-        "minimalist": {
-            "colors": {"primary": "#1F2937", "secondary": "#6B7280", "accent": "#9CA3AF", "bg": "#FFFFFF"},
-            "description": "Minimal, monochrome palette, generous whitespace, simple typography, no decorations"
-        },
-        "colorful": {
-            "colors": {"primary": "#8B5CF6", "secondary": "#EC4899", "accent": "#F59E0B", "bg": "#FEF3C7"},
-            "description": "Vibrant, playful colors (purple, pink, orange), gradients, bold typography"
-        },
-        "elegant": {
-            "colors": {"primary": "#9333EA", "secondary": "#C084FC", "accent": "#D8B4FE", "bg": "#FAF5FF"},
-            "description": "Sophisticated purple/lavender tones, serif fonts, refined spacing, luxury feel"
-        },
-        "dark": {
-            "colors": {"primary": "#10B981", "secondary": "#059669", "accent": "#34D399", "bg": "#111827"},
-            "description": "Dark backgrounds (#111827), neon green accents, high contrast, modern dark UI"
-        }
+# Theme configurations matching the frontend form
+THEME_CONFIGS = {
+    "modern": {
+        "colors": {"primary": "#3B82F6", "secondary": "#1E40AF", "accent": "#60A5FA", "bg": "#F9FAFB"},
+        "description": "Clean, contemporary design with blue tones, card-based layouts, subtle shadows"
+    },
+    "minimalist": {
+        "colors": {"primary": "#1F2937", "secondary": "#6B7280", "accent": "#9CA3AF", "bg": "#FFFFFF"},
+        "description": "Minimal, monochrome palette, generous whitespace, simple typography, no decorations"
+    },
+    "colorful": {
+        "colors": {"primary": "#8B5CF6", "secondary": "#EC4899", "accent": "#F59E0B", "bg": "#FEF3C7"},
+        "description": "Vibrant, playful colors (purple, pink, orange), gradients, bold typography"
+    },
+    "elegant": {
+        "colors": {"primary": "#9333EA", "secondary": "#C084FC", "accent": "#D8B4FE", "bg": "#FAF5FF"},
+        "description": "Sophisticated purple/lavender tones, serif fonts, refined spacing, luxury feel"
+    },
+    "dark": {
+        "colors": {"primary": "#10B981", "secondary": "#059669", "accent": "#34D399", "bg": "#111827"},
+        "description": "Dark backgrounds (#111827), neon green accents, high contrast, modern dark UI"
     }
-    
-    # Determine theme (default to modern if not specified or invalid)
+}
+
+DEFAULT_PAGES = ["index", "about", "services", "pricing", "contact"]
+
+
+def resolve_theme(request: GenerateRequest) -> tuple:
+    """Return (theme_key, theme) for a request, defaulting to modern"""
     theme_key = (request.theme_hint or "modern").lower()
-    theme = theme_configs.get(theme_key, theme_configs["modern"])
-    
-    # Determine pages to generate
-    default_pages = ["index", "about", "services", "pricing", "contact"]
-    pages_to_generate = request.pages if request.pages else default_pages[:3]
+    return theme_key, THEME_CONFIGS.get(theme_key, THEME_CONFIGS["modern"])
+
+
+def resolve_pages(request: GenerateRequest) -> List[str]:
+    """Return the list of pages to generate for a request"""
+    pages_to_generate = request.pages if request.pages else DEFAULT_PAGES[:3]
     
     # Ensure we don't exceed max pages
-    pages_to_generate = pages_to_generate[:MAX_PAGES]
-    
-    # Build enhanced prompt
-    prompt = f"""You are an expert web developer. Generate a complete, modern, responsive multi-page static website.
+    return pages_to_generate[:MAX_PAGES]
 
-Requirements:
-- Company Name: {request.company_name}
-- Description: {request.description}
-- Theme Style: {theme_key.upper()} - {theme['description']}
-- Color Palette: {json.dumps(theme['colors'])}
-- Pages Required: {', '.join(pages_to_generate)}
 
-{f"Additional Design Hints from Images: {json.dumps(design_hints)}" if design_hints else ""}
+JSON_SYSTEM_PROMPT = "You are an expert web developer who generates complete, production-ready HTML/CSS/JS code. Always return valid JSON only."
 
-THEME REQUIREMENTS FOR '{theme_key.upper()}':
-{theme['description']}
-- Primary Color: {theme['colors']['primary']}
-- Secondary Color: {theme['colors']['secondary']}
-- Accent Color: {theme['colors']['accent']}
-- Background: {theme['colors']['bg']}
+# Static instructions for single-mode generation. They go in the system message,
+# ahead of anything request-specific, so Ollama can reuse the evaluated prefix
+# across requests; keep them free of per-request values and bump PROMPT_VERSION
+# whenever they change.
+SITE_SYSTEM_PROMPT = JSON_SYSTEM_PROMPT + """
 
-Generate a professional, complete website with these files:
+For each website request, generate a complete, modern, responsive multi-page static website with these files:
 1. index.html - Homepage with hero section, company overview, call-to-action
-2. {'.html, '.join(p for p in pages_to_generate if p != 'index')}.html - Additional pages with relevant content
-3. styles.css - Complete responsive styling following the {theme_key} theme
+2. One HTML file per additional requested page - Additional pages with relevant content
+3. styles.css - Complete responsive styling following the requested theme and color palette
 4. script.js - Interactive features, smooth animations, mobile menu
 
 CRITICAL DESIGN REQUIREMENTS:
@@ -288,12 +625,12 @@ CRITICAL DESIGN REQUIREMENTS:
 - Button hover effects and micro-interactions
 
 Return ONLY a valid JSON object with this exact structure (no markdown, no code blocks, no explanations):
-{{
+{
   "index.html": "<!DOCTYPE html>...",
   "about.html": "<!DOCTYPE html>...",
-  "styles.css": "* {{ margin: 0; ...",
+  "styles.css": "* { margin: 0; ...",
   "script.js": "// JavaScript code..."
-}}
+}
 
 Each HTML file must:
 - Be complete and valid
@@ -302,102 +639,311 @@ Each HTML file must:
 - Have consistent navigation
 - Be production-ready
 
-Each page should have meaningful, relevant content related to {request.company_name} and {request.description}.
+Each page should have meaningful, relevant content related to the company and its description.
 
 IMPORTANT: Return ONLY the JSON object, nothing else."""
 
+
+def site_filenames(request: GenerateRequest) -> List[str]:
+    """Files the single-mode reply must contain"""
+    return ["index.html"] + [f"{p}.html" for p in resolve_pages(request) if p != 'index'] + ["styles.css", "script.js"]
+
+
+def build_generation_prompt(request: GenerateRequest, design_hints: dict = None) -> str:
+    """Build the request-specific part of the single-mode prompt (see SITE_SYSTEM_PROMPT)"""
+    theme_key, theme = resolve_theme(request)
+    pages_to_generate = resolve_pages(request)
+    files = site_filenames(request)
+    
+    prompt = f"""Website request:
+- Company Name: {request.company_name}
+- Description: {request.description}
+- Theme Style: {theme_key.upper()} - {theme['description']}
+- Color Palette: {json.dumps(theme['colors'])}
+- Pages Required: {', '.join(pages_to_generate)}
+- Files: {', '.join(files)}
+{"- Dark mode: required" if request.require_dark_mode else ""}
+{f"Additional Design Hints from Images: {json.dumps(design_hints)}" if design_hints else ""}
+
+THEME REQUIREMENTS FOR '{theme_key.upper()}':
+{theme['description']}
+- Primary Color: {theme['colors']['primary']}
+- Secondary Color: {theme['colors']['secondary']}
+- Accent Color: {theme['colors']['accent']}
+- Background: {theme['colors']['bg']}"""
+    return prompt
+
+
+def build_chat_payload(
+    prompt: str,
+    stream: bool = False,
+    system: str = JSON_SYSTEM_PROMPT,
+    num_predict: int = 8192,
+    schema: Optional[dict] = None,
+    model: str = CODE_MODEL
+) -> dict:
+    """Build the Ollama /api/chat payload for the code model
+
+    With a schema, the reply is constrained according to STRUCTURED_OUTPUT.
+    """
+    payload = {
+        "model": model,
+        "messages": [
+            {
+                "role": "system",
+                "content": system
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        "stream": stream,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": {
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "num_ctx": OLLAMA_NUM_CTX,
+            "num_predict": num_predict
+        }
+    }
+    response_format = ollama_format(STRUCTURED_OUTPUT, schema) if schema else None
+    if response_format is not None:
+        payload["format"] = response_format
+    return payload
+
+
+def finalize_generated_files(parser: StreamingFilesParser) -> dict:
+    """Collect the parser's files and check the generated site is usable"""
+    files = parser.finish()
+    started = time.perf_counter()
+    files = repair_generated_files(parser, files)
+    STAGE_SECONDS.observe(parser.parse_seconds + time.perf_counter() - started, stage="json_extraction")
+    
+    if not files:
+        logger.error(f"No files parsed from model output ({parser.chars} chars)")
+        raise HTTPException(
+            status_code=502,
+            detail="AI model returned invalid JSON. Please try again."
+        )
+    
+    if parser.truncated:
+        logger.warning(f"Model output was truncated, recovered {len(files)} files")
+    
+    return validate_generated_files(files)
+
+
+def repair_generated_files(parser: StreamingFilesParser, files: dict) -> dict:
+    """Files from the repair pass when the reply was not valid JSON
+
+    A stray quote makes the streaming parser end a file early and read the
+    rest of it as junk keys; the repair pass splits the reply at filename keys
+    instead, so it wins whenever it recovers anything.
+    """
+    text = parser.text
+    if is_valid_json(text):
+        return files
+    repaired = repair_files_json(text)
+    if not repaired:
+        JSON_REPAIRS.inc(outcome="failed")
+        return files
+    JSON_REPAIRS.inc(outcome="truncated" if parser.truncated else "repaired")
+    logger.warning(f"Model reply was not valid JSON, repaired {len(repaired)} files (parser had {len(files)})")
+    return repaired
+
+
+def validate_generated_files(files: dict) -> dict:
+    """Fill in missing assets and check the generated site is usable"""
+    # Validate that we have the required files
+    required_files = ['styles.css', 'script.js']
+    for file in required_files:
+        if file not in files:
+            logger.warning(f"Missing required file: {file}, adding default")
+            if file == 'styles.css':
+                files[file] = "/* Default styles */\n* { margin: 0; padding: 0; box-sizing: border-box; }"
+            elif file == 'script.js':
+                files[file] = "// Default script\nconsole.log('Website loaded');"
+    
+    # Ensure we have at least index.html
+    if 'index.html' not in files:
+        raise HTTPException(
+            status_code=502,
+            detail="AI model did not generate index.html"
+        )
+    
+    # Validate HTML files
+    html_files = [k for k in files.keys() if k.endswith('.html')]
+    if not html_files:
+        raise HTTPException(
+            status_code=502,
+            detail="No HTML files generated"
+        )
+    
+    logger.info(f"Successfully generated {len(files)} files: {list(files.keys())}")
+    return files
+
+
+def file_event(filename: str, content: str) -> tuple:
+    """file_complete progress event of a finished file; relays drop the content they do not need"""
+    return "file_complete", {"file": filename, "size": len(content), "content": content}
+
+
+async def generate_website_with_llm(
+    request: GenerateRequest,
+    design_hints: dict = None,
+    on_event: Optional[Callable[[str, dict], Awaitable[None]]] = None
+) -> dict:
+    """Generate website files using code model
+
+    on_event is awaited with each progress event (file_start, progress, and
+    file_complete as soon as the model completes a file), also when the call is
+    coalesced onto an identical one already running.
+    """
+    key = coalesce_key(request.dict(), design_hints or {}, generation_model(request), PROMPT_VERSION, resolve_generation_mode(request))
+    files = await generation_flights.stream(
+        key,
+        lambda publish: _generate_website_files(request, design_hints, publish),
+        (lambda item: on_event(*item)) if on_event else None
+    )
+    return dict(files)
+
+
+async def _generate_website_files(
+    request: GenerateRequest,
+    design_hints: dict = None,
+    publish: Optional[Callable[[tuple], None]] = None
+) -> dict:
+    publish = publish or (lambda item: None)
+    if resolve_generation_mode(request) != "single":
+        files = {}
+        async for filename, content in generate_site_files(request, design_hints):
+            files[filename] = content
+            publish(file_event(filename, content))
+        return validate_generated_files(files)
+    
+    parser = StreamingFilesParser()
+    chunks = 0
+    current_file = None
+    async for chunk in stream_website_with_llm(request, design_hints):
+        chunks += 1
+        for filename, content in parser.feed(chunk):
+            publish(file_event(filename, content))
+        if parser.current_key and parser.current_key != current_file:
+            current_file = parser.current_key
+            publish(("file_start", {"file": current_file}))
+        if chunks % STREAM_PROGRESS_EVERY == 0:
+            publish(("progress", {
+                "chunks": chunks,
+                "chars": parser.chars,
+                "current_file": parser.current_key,
+                "completed_files": list(parser.files)
+            }))
+    
+    if not parser.chars:
+        raise HTTPException(status_code=502, detail="Empty response from AI model")
+    
+    logger.info(f"Received response from Ollama, length: {parser.chars}")
+    files = finalize_generated_files(parser)
+    publish(("progress", {
+        "chunks": chunks,
+        "chars": parser.chars,
+        "current_file": None,
+        "completed_files": list(files),
+        "truncated": parser.truncated
+    }))
+    return files
+
+
+async def stream_website_with_llm(
+    request: GenerateRequest,
+    design_hints: dict = None
+) -> AsyncIterator[str]:
+    """Stream content chunks from the code model as Ollama produces them"""
+    prompt = build_generation_prompt(request, design_hints)
+    budget = ("site", len(resolve_pages(request)))
+    payload = build_chat_payload(
+        prompt, stream=True, system=SITE_SYSTEM_PROMPT, schema=files_schema(site_filenames(request)),
+        **reply_options(request, *budget)
+    )
+    async for chunk in stream_ollama_chat(payload, budget):
+        yield chunk
+
+
+def record_ollama_timings(model: str, response: dict) -> dict:
+    """Account Ollama's final-chunk timings in /llm/stats and the token counters"""
+    timings = llm_stats.record(model, response)
+    LLM_PROMPT_TOKENS.inc(timings["prompt_tokens"], model=model)
+    LLM_COMPLETION_TOKENS.inc(timings["eval_tokens"], model=model)
+    return timings
+
+
+def report_content_findings(findings: list, model: str) -> None:
+    """Log and count scanner findings; in reject mode fail the generation"""
+    for finding in findings:
+        CONTENT_FINDINGS.inc(rule=finding.rule)
+        logger.warning(f"Model {model} output contains {finding.rule!r} at offset {finding.offset}")
+    if findings and CONTENT_SCAN == "reject":
+        raise HTTPException(
+            status_code=502,
+            detail="Generated content failed security validation"
+        )
+
+
+async def stream_ollama_chat(payload: dict, budget: Optional[tuple] = None) -> AsyncIterator[str]:
+    """Stream message content chunks for an /api/chat payload, scanning them as they arrive
+
+    budget is the (kind, units) whose reply size token_budget learns from this reply,
+    for the payload's model.
+    """
+    scanner = default_scanner.stream() if CONTENT_SCAN != "off" else None
     try:
-        async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
-            logger.info(f"Sending request to Ollama with model {CODE_MODEL}")
-            
-            response = await client.post(
-                f"{OLLAMA_HOST}/api/chat",
-                json={
-                    "model": CODE_MODEL,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are an expert web developer who generates complete, production-ready HTML/CSS/JS code. Always return valid JSON only."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                        "num_predict": 8192
-                    }
-                },
-                timeout=REQUEST_TIMEOUT
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Ollama API error: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=502, detail="AI model request failed")
-            
-            result = response.json()
-            content = result.get('message', {}).get('content', '')
-            
-            if not content:
-                raise HTTPException(status_code=502, detail="Empty response from AI model")
-            
-            logger.info(f"Received response from Ollama, length: {len(content)}")
+        async with ollama_pool.acquire(payload['model']) as lease:
+            logger.info(f"Streaming request to Ollama {lease.backend.url} with model {payload['model']}")
             
-            # Try to extract JSON from response
-            # Remove markdown code blocks if present
-            content = re.sub(r'^```json\s*', '', content, flags=re.MULTILINE)
-            content = re.sub(r'^```\s*', '', content, flags=re.MULTILINE)
-            content = re.sub(r'\s*```$', '', content, flags=re.MULTILINE)
-            content = content.strip()
-            
-            # Find JSON object
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                content = json_match.group()
-            
-            # Parse JSON
-            try:
-                files = json.loads(content)
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error: {e}\nContent preview: {content[:500]}")
-                raise HTTPException(
-                    status_code=502,
-                    detail="AI model returned invalid JSON. Please try again."
-                )
-            
-            # Validate that we have the required files
-            required_files = ['styles.css', 'script.js']
-            for file in required_files:
-                if file not in files:
-                    logger.warning(f"Missing required file: {file}, adding default")
-                    if file == 'styles.css':
-                        files[file] = "/* Default styles */\n* { margin: 0; padding: 0; box-sizing: border-box; }"
-                    elif file == 'script.js':
-                        files[file] = "// Default script\nconsole.log('Website loaded');"
-            
-            # Ensure we have at least index.html
-            if 'index.html' not in files:
-                raise HTTPException(
-                    status_code=502,
-                    detail="AI model did not generate index.html"
-                )
-            
-            # Validate HTML files
-            html_files = [k for k in files.keys() if k.endswith('.html')]
-            if not html_files:
-                raise HTTPException(
-                    status_code=502,
-                    detail="No HTML files generated"
-                )
-            
-            logger.info(f"Successfully generated {len(files)} files: {list(files.keys())}")
-            return files
+            async with lease.client.stream(
+                "POST",
+                "/api/chat",
+                json=payload,
+                timeout=ollama_timeout(REQUEST_TIMEOUT)
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    logger.error(f"Ollama API error: {response.status_code} - {body[:500]!r}")
+                    if response.status_code >= 500:
+                        lease.fail()
+                    raise HTTPException(status_code=502, detail="AI model request failed")
+                
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('error'):
+                        logger.error(f"Ollama stream error: {chunk['error']}")
+                        lease.fail()
+                        raise HTTPException(status_code=502, detail="AI model request failed")
+                    content = chunk.get('message', {}).get('content', '')
+                    if content:
+                        if scanner is not None:
+                            # Rejecting here stops the model mid-reply instead of after the whole site
+                            report_content_findings(scanner.feed(content), payload['model'])
+                        yield content
+                    if chunk.get('done'):
+                        timings = record_ollama_timings(payload['model'], chunk)
+                        if budget is not None:
+                            token_budget.record(payload['model'], *budget, timings["eval_tokens"], chunk.get("done_reason") == "length")
+                        STAGE_SECONDS.observe(timings["prompt_eval_seconds"], stage="llm_prompt_eval")
+                        STAGE_SECONDS.observe(timings["eval_seconds"], stage="llm_generation")
+                        break
             
+    except NoBackendAvailable as e:
+        logger.error(str(e))
+        raise HTTPException(
+            status_code=503,
+            detail="No AI model backend available. Please retry later.",
+            headers={"Retry-After": str(int(OLLAMA_PROBE_INTERVAL))}
+        )
     except httpx.TimeoutException:
-        logger.error("Request to Ollama timed out")
+        logger.error("Streaming request to Ollama timed out")
         raise HTTPException(
             status_code=504,
             detail="Request timeout. The AI model took too long to respond."
@@ -411,44 +957,866 @@ IMPORTANT: Return ONLY the JSON object, nothing else."""
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in generate_website_with_llm: {e}")
+        logger.error(f"Unexpected error in stream_ollama_chat: {e}")
         raise HTTPException(
             status_code=500,
             detail="Internal server error during generation"
         )
 
 
-def create_zip_file(files: dict) -> io.BytesIO:
-    """Create ZIP file from generated files"""
-    zip_buffer = io.BytesIO()
-    
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for filename, content in files.items():
-            # Sanitize filename
-            safe_filename = re.sub(r'[^a-zA-Z0-9._-]', '', filename)
-            if not safe_filename:
-                safe_filename = 'file.txt'
+async def complete_ollama_chat(payload: dict, budget: Optional[tuple] = None) -> str:
+    """Collect a streamed /api/chat reply into a single string"""
+    return ''.join([chunk async for chunk in stream_ollama_chat(payload, budget)])
+
+
+# ============================================================================
+# Parallel generation: site plan, then one request per page and asset
+# ============================================================================
+
+RAW_SYSTEM_PROMPT = "You are an expert web developer who generates complete, production-ready HTML/CSS/JS code. Return only the requested file content, with no explanations and no markdown."
+
+SITE_PLAN_TOKENS = 768
+PAGE_TOKENS = 3072
+STYLES_TOKENS = 3072
+SCRIPT_TOKENS = 1536
+
+def resolve_generation_mode(request: GenerateRequest) -> str:
+    """Return "single", "parallel" or "template" for a request"""
+    mode = request.mode or GENERATION_MODE
+    if mode == "auto":
+        return "parallel" if len(resolve_pages(request)) > PARALLEL_PAGE_THRESHOLD else "single"
+    return mode
+
+
+def page_filename(page: str) -> str:
+    slug = re.sub(r'[\s_]+', '-', page.strip().lower())
+    return f"{slug}.html"
+
+
+def plan_page_files(pages: List[str]) -> List[tuple]:
+    """Map page names to (page, filename), making the home page index.html"""
+    slugs = [page_filename(page)[:-len('.html')] for page in pages]
+    home = next((i for i, slug in enumerate(slugs) if slug in ("index", "home")), 0)
+    return [
+        (page, "index.html" if i == home else f"{slug}.html")
+        for i, (page, slug) in enumerate(zip(pages, slugs))
+    ]
+
+
+def default_nav(page_files: List[tuple]) -> List[dict]:
+    """Navigation entries for (page, filename) pairs"""
+    return [
+        {"label": page.replace('-', ' ').replace('_', ' ').title(), "href": filename}
+        for page, filename in page_files
+    ]
+
+
+def strip_code_fences(text: str) -> str:
+    """Return the body of the first fenced code block, or the text itself"""
+    start = text.find("```")
+    if start == -1:
+        return text.strip()
+    body_start = text.find("\n", start)
+    if body_start == -1:
+        return ""
+    end = text.find("```", body_start)
+    return text[body_start + 1:end if end != -1 else len(text)].strip()
+
+
+def parse_json_object(text: str) -> Optional[dict]:
+    """Decode the first JSON object in text, or None"""
+    start = text.find("{")
+    if start == -1:
+        return None
+    try:
+        value, _ = json.JSONDecoder(strict=False).raw_decode(text, start)
+    except json.JSONDecodeError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+async def generate_site_plan(
+    request: GenerateRequest,
+    page_files: List[tuple],
+    design_hints: dict = None
+) -> dict:
+    """Produce the shared plan (nav, palette, CSS vocabulary) every page is built against"""
+    theme_key, theme = resolve_theme(request)
+    plan = {
+        "theme": theme_key,
+        "palette": theme["colors"],
+        "nav": default_nav(page_files),
+        "css_classes": CSS_CLASSES,
+        "fonts": DEFAULT_FONTS,
+        "tagline": "",
+        "sections": {}
+    }
+    
+    prompt = f"""Plan a {theme_key} style multi-page website for {request.company_name}: {request.description}
+Theme: {theme['description']}
+Pages: {', '.join(page for page, _ in page_files)}
+{f"Design hints from images: {json.dumps(design_hints)}" if design_hints else ""}
+
+Return ONLY a JSON object with these keys:
+- "tagline": a short headline for the company
+- "fonts": a CSS font-family stack
+- "sections": an object mapping each page name to a list of 3-5 section titles
+- "nav_labels": an object mapping each page name to a short navigation label"""
+    
+    budget = ("plan", len(page_files))
+    try:
+        content = await complete_ollama_chat(
+            build_chat_payload(
+                prompt, stream=True, schema=plan_schema(page for page, _ in page_files),
+                **reply_options(request, *budget)
+            ),
+            budget
+        )
+    except HTTPException as e:
+        logger.warning(f"Site plan request failed ({e.detail}), using default plan")
+        return plan
+    
+    suggested = parse_json_object(content)
+    if not suggested:
+        logger.warning("Site plan was not valid JSON, using default plan")
+        return plan
+    
+    if isinstance(suggested.get("tagline"), str):
+        plan["tagline"] = suggested["tagline"][:200]
+    if isinstance(suggested.get("fonts"), str):
+        plan["fonts"] = suggested["fonts"][:200]
+    if isinstance(suggested.get("sections"), dict):
+        plan["sections"] = suggested["sections"]
+    labels = suggested.get("nav_labels")
+    if isinstance(labels, dict):
+        for item, (page, _) in zip(plan["nav"], page_files):
+            if isinstance(labels.get(page), str):
+                item["label"] = labels[page][:40]
+    return plan
+
+
+def build_page_prompt(request: GenerateRequest, plan: dict, page: str, filename: str) -> str:
+    """Prompt for a single HTML page built against the site plan"""
+    sections = plan["sections"].get(page) if isinstance(plan["sections"], dict) else None
+    return f"""Write the complete {filename} page ("{page}") of the website for {request.company_name}.
+Company description: {request.description}
+Tagline: {plan['tagline'] or request.company_name}
+{f"Sections to include: {json.dumps(sections)}" if sections else ""}
+
+Shared site plan (all pages use it, do not deviate):
+- Navigation (same order on every page, mark {filename} with class "active"): {json.dumps(plan['nav'])}
+- CSS classes available in styles.css: {', '.join(plan['css_classes'])}
+- The mobile menu button has class "nav-toggle" and toggles class "open" on the "nav-menu" list
+
+Requirements:
+- Complete HTML5 document with DOCTYPE, meta charset and viewport tags
+- Link to styles.css and script.js (with defer)
+- Header with the navigation, main content, footer with company info and links
+- Semantic tags and ARIA labels, no inline styles or inline scripts
+{"- A hero section with a compelling headline and call-to-action" if filename == "index.html" else "- Meaningful content specific to this page"}
+
+Return ONLY the HTML document."""
+
+
+def build_styles_prompt(request: GenerateRequest, plan: dict, design_hints: dict = None) -> str:
+    """Prompt for the shared stylesheet"""
+    return f"""Write styles.css for the {plan['theme']} style website of {request.company_name}.
+Color palette: {json.dumps(plan['palette'])}
+Font stack: {plan['fonts']}
+{f"Design hints from images: {json.dumps(design_hints)}" if design_hints else ""}
+
+Style every one of these classes: {', '.join(plan['css_classes'])}
+- Mobile-first responsive design (breakpoints: 768px, 1024px, 1280px)
+- CSS Grid and Flexbox layouts, sticky navbar on desktop
+- ".nav-menu" is hidden on mobile and shown when it has class "open"
+- Smooth transitions, button hover effects, consistent spacing
+
+Return ONLY the CSS."""
+
+
+def build_script_prompt(plan: dict) -> str:
+    """Prompt for the shared script"""
+    return f"""Write script.js for a static website.
+- Toggle class "open" on ".nav-menu" when ".nav-toggle" is clicked and update aria-expanded
+- Smooth scrolling for in-page anchor links
+- Client-side validation for ".contact-form" showing messages in ".form-error"
+- Fade-in animation for ".card" elements using IntersectionObserver
+Pages: {', '.join(item['href'] for item in plan['nav'])}
+
+Return ONLY the JavaScript."""
+
+
+async def generate_site_parallel(
+    request: GenerateRequest,
+    design_hints: dict = None
+) -> AsyncIterator[tuple]:
+    """Generate pages and assets concurrently, yielding (filename, content) as each completes"""
+    page_files = plan_page_files(resolve_pages(request))
+    plan = await generate_site_plan(request, page_files, design_hints)
+    semaphore = asyncio.Semaphore(PARALLEL_GENERATION_CONCURRENCY)
+    
+    async def generate_file(filename: str, prompt: str, kind: str) -> tuple:
+        async with semaphore:
+            content = await complete_ollama_chat(
+                build_chat_payload(prompt, stream=True, system=RAW_SYSTEM_PROMPT, **reply_options(request, kind)),
+                (kind, 1)
+            )
+        return filename, strip_code_fences(content)
+    
+    jobs = [
+        generate_file(filename, build_page_prompt(request, plan, page, filename), "page")
+        for page, filename in page_files
+    ]
+    jobs.append(generate_file("styles.css", build_styles_prompt(request, plan, design_hints), "styles"))
+    jobs.append(generate_file("script.js", build_script_prompt(plan), "script"))
+    
+    logger.info(f"Generating {len(jobs)} files in parallel (concurrency {PARALLEL_GENERATION_CONCURRENCY})")
+    tasks = [asyncio.create_task(job) for job in jobs]
+    try:
+        for next_file in asyncio.as_completed(tasks):
+            yield await next_file
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# ============================================================================
+# Template generation: local styles, script and page shell, model writes page bodies
+# ============================================================================
+
+BODY_TOKENS = 2048
+
+
+def extract_main_content(text: str) -> str:
+    """Page body from a model reply, unwrapping a full document or <main> if returned"""
+    content = strip_code_fences(text)
+    for tag in ("main", "body"):
+        match = re.search(rf'<{tag}\b[^>]*>(.*)</{tag}>', content, re.DOTALL | re.IGNORECASE)
+        if match:
+            return match.group(1).strip()
+    return content
+
+
+BODY_SYSTEM_PROMPT = RAW_SYSTEM_PROMPT + f"""
+
+You write the main content of one page of a multi-page website. The header, navigation, footer, styles.css and script.js already exist.
+- Output only the HTML that goes inside <main>: no DOCTYPE, <head>, <body>, header, navigation, footer or <main> tag
+- Use <section class="section"> blocks with a <div class="container"> and an <h2 class="section-title">
+- Use only these CSS classes: {', '.join(CSS_CLASSES)}
+- Cards go in a <div class="grid"> as <article class="card"> with "card-title" and "card-text"
+- No inline styles or scripts
+Return ONLY the HTML fragment."""
+
+
+def build_body_prompt(request: GenerateRequest, page: str, filename: str, nav: List[dict], design_hints: dict = None) -> str:
+    """Request-specific prompt for the main content of one page (see BODY_SYSTEM_PROMPT)"""
+    if filename == "index.html":
+        page_hint = '- Start with a <section class="hero"> containing an h1.hero-title, a p.hero-subtitle and an a.btn.btn-primary call-to-action'
+    else:
+        page_hint = "- Meaningful content specific to this page"
+    form_hint = ""
+    if "contact" in filename:
+        form_hint = "- Include a form.contact-form whose fields are each wrapped in div.form-group with a span.form-error after the field"
+    return f"""Write the main content of the {filename} page ("{page}") of the website for {request.company_name}.
+Company description: {request.description}
+Other pages (link to them where relevant): {', '.join(item['href'] for item in nav if item['href'] != filename)}
+{f"Design hints from images: {json.dumps(design_hints)}" if design_hints else ""}
+{page_hint}
+{form_hint}"""
+
+
+async def generate_site_templated(
+    request: GenerateRequest,
+    design_hints: dict = None
+) -> AsyncIterator[tuple]:
+    """Render assets locally and generate page bodies concurrently, yielding (filename, content)"""
+    page_files = plan_page_files(resolve_pages(request))
+    nav = default_nav(page_files)
+    theme_key, theme = resolve_theme(request)
+    colors = theme["colors"]
+    # A color from the uploaded images takes over the primary color: the vision
+    # model's suggestion if it is a plain hex color, else the extracted palette's
+    hints = design_hints or {}
+    primary = first_hex_color(
+        [hints.get("primary_color"), *(hints.get("extracted_palette") or [])[:1]], colors["primary"]
+    )
+    
+    yield "styles.css", render_styles(
+        theme_key, primary, colors["secondary"], colors["accent"], colors["bg"], request.require_dark_mode
+    )
+    yield "script.js", render_script()
+    
+    semaphore = asyncio.Semaphore(PARALLEL_GENERATION_CONCURRENCY)
+    
+    async def generate_page(page: str, filename: str) -> tuple:
+        async with semaphore:
+            content = await complete_ollama_chat(build_chat_payload(
+                build_body_prompt(request, page, filename, nav, design_hints),
+                stream=True, system=BODY_SYSTEM_PROMPT, **reply_options(request, "body")
+            ), ("body", 1))
+        title = next(item["label"] for item in nav if item["href"] == filename)
+        return filename, render_page(
+            request.company_name, title, filename, nav, extract_main_content(content), request.description
+        )
+    
+    logger.info(f"Generating {len(page_files)} page bodies from templates (concurrency {PARALLEL_GENERATION_CONCURRENCY})")
+    tasks = [asyncio.create_task(generate_page(page, filename)) for page, filename in page_files]
+    try:
+        for next_file in asyncio.as_completed(tasks):
+            yield await next_file
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def generate_site_files(
+    request: GenerateRequest,
+    design_hints: dict = None
+) -> AsyncIterator[tuple]:
+    """Per-file generator for the parallel and template modes"""
+    if resolve_generation_mode(request) == "template":
+        return generate_site_templated(request, design_hints)
+    return generate_site_parallel(request, design_hints)
+
+
+# ============================================================================
+# Generation budget: code model and num_predict per reply
+# ============================================================================
+
+# Priors (base, per page) used until enough replies of a model, kind and size have been seen;
+# a single-mode reply holds every page plus styles.css and script.js
+token_budget = TokenBudget({
+    "site": (1536, 1280),
+    "plan": (SITE_PLAN_TOKENS, 0),
+    "page": (PAGE_TOKENS, 0),
+    "styles": (STYLES_TOKENS, 0),
+    "script": (SCRIPT_TOKENS, 0),
+    "body": (BODY_TOKENS, 0)
+}, minimum=TOKEN_BUDGET_MIN, maximum=TOKEN_BUDGET_MAX)
+
+
+def resolve_tier(request: GenerateRequest) -> str:
+    return request.tier or DEFAULT_TIER
+
+
+def generation_model(request: GenerateRequest) -> str:
+    """Code model for a request, from MODEL_LADDER by page count and tier (CODE_MODEL without a ladder)"""
+    return select_model(MODEL_LADDER, CODE_MODEL, len(resolve_pages(request)), resolve_tier(request), ollama_pool.has_model)
+
+
+def reply_options(request: GenerateRequest, kind: str, units: int = 1) -> dict:
+    """model and num_predict for one reply of a generation (build_chat_payload arguments)"""
+    model = generation_model(request)
+    return {"model": model, "num_predict": token_budget.estimate(model, kind, units, resolve_tier(request))}
+
+
+def safe_zip_name(filename: str) -> str:
+    """Sanitize a generated filename for use inside the ZIP"""
+    safe_filename = re.sub(r'[^a-zA-Z0-9._-]', '', filename)
+    if not safe_filename:
+        safe_filename = 'file.txt'
+    return safe_filename
+
+
+def zip_entries(files: dict) -> Iterator[tuple]:
+    """(safe name, bytes) pairs for the archive, skipping names that collide after sanitizing"""
+    seen = set()
+    for filename, content in files.items():
+        safe_filename = safe_zip_name(filename)
+        if safe_filename in seen:
+            logger.warning(f"Skipping duplicate ZIP entry: {safe_filename}")
+            continue
+        seen.add(safe_filename)
+        yield safe_filename, content.encode('utf-8')
+
+
+def create_zip_file(files: dict) -> io.BytesIO:
+    """Create ZIP file from generated files"""
+    return io.BytesIO(build_zip_bytes(files))
+
+
+def build_zip_bytes(files: dict) -> bytes:
+    """ZIP archive bytes for generated files (CPU-bound, runs in the executor)"""
+    return b"".join(iter_zip(zip_entries(files), compression=ZIP_COMPRESSION, store_threshold=ZIP_STORE_THRESHOLD))
+
+
+async def store_artifact(
+    files: dict,
+    gen_request: GenerateRequest,
+    mode: Optional[str] = None
+) -> Optional[str]:
+    """Keep the generated files in the artifact store; returns the artifact id, or None if disabled or failed
+
+    The request and generation mode are stored with them, so the site can be edited page by page later.
+    """
+    if artifact_store is None:
+        return None
+    metadata = {"site": {"request": gen_request.dict(), "mode": mode or resolve_generation_mode(gen_request)}}
+    try:
+        artifact = await asyncio.to_thread(
+            artifact_store.put, list(zip_entries(files)), zip_download_name(gen_request.company_name), metadata
+        )
+    except (OSError, ValueError) as e:
+        # The download in hand is unaffected; only the later /artifacts link is lost
+        logger.warning(f"Could not store artifact: {e}")
+        return None
+    return artifact.id
+
+
+def read_zip_files(zip_bytes: bytes) -> dict:
+    """Files of a generated site's ZIP (CPU-bound)"""
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as archive:
+        return {name: archive.read(name).decode("utf-8") for name in archive.namelist()}
+
+
+async def store_cached_artifact(zip_bytes: bytes, gen_request: GenerateRequest) -> Optional[str]:
+    """Artifact id for a cache hit, so it gets the same links (and edits) as a fresh generation
+
+    The site was normally stored when it was generated, so this finds that
+    artifact again; it is only written anew if it has been evicted since.
+    """
+    if artifact_store is None:
+        return None
+    try:
+        files = await asyncio.to_thread(read_zip_files, zip_bytes)
+    except (zipfile.BadZipFile, UnicodeDecodeError) as e:
+        logger.warning(f"Could not read cached ZIP for the artifact store: {e}")
+        return None
+    return await store_artifact(files, gen_request)
+
+
+def validation_detail(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors())
+
+
+def build_generate_request(
+    company_name: str,
+    description: str,
+    theme_hint: Optional[str],
+    pages: Optional[str],
+    require_dark_mode: bool,
+    mode: Optional[str] = None,
+    tier: Optional[str] = None
+) -> GenerateRequest:
+    """Build a validated GenerateRequest from form fields; invalid fields are a 400"""
+    with STAGE_SECONDS.time(stage="validation"):
+        # Parse pages
+        pages_list = None
+        if pages:
+            pages_list = [p.strip() for p in pages.split(',')][:MAX_PAGES]
+        
+        try:
+            return GenerateRequest(
+                company_name=company_name,
+                description=description,
+                theme_hint=theme_hint,
+                pages=pages_list,
+                require_dark_mode=require_dark_mode,
+                mode=mode,
+                tier=tier
+            )
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=validation_detail(e))
+
+
+async def filter_valid_images(images: Optional[List[UploadFile]]) -> List[bytes]:
+    """Enforce the image count limit and return the bytes of images that pass validation"""
+    if not images:
+        return []
+    
+    if len(images) > MAX_IMAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {MAX_IMAGES} images allowed"
+        )
+    
+    valid_images = []
+    with STAGE_SECONDS.time(stage="image_validation"):
+        for img in images:
+            data = await validate_image(img)
+            if data is not None:
+                valid_images.append(data)
+            else:
+                logger.warning(f"Invalid image: {img.filename}")
+    return valid_images
+
+
+async def verify_api_key(x_api_key: Optional[str] = Header(None)) -> Optional[str]:
+    """Require a valid X-API-Key header when API_KEYS is configured"""
+    if not API_KEYS:
+        return None
+    if not x_api_key or x_api_key not in API_KEYS:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or missing API key",
+            headers={"WWW-Authenticate": "ApiKey"}
+        )
+    return x_api_key
+
+
+def request_cost(pages: int, images: int) -> float:
+    """Rate limit cost of a request: 1 for one page without images"""
+    return 1 + max(0, pages - 1) * RATE_LIMIT_PAGE_COST + images * RATE_LIMIT_IMAGE_COST
+
+
+def rate_limit_checks(request: Request, api_key: Optional[str]) -> tuple:
+    """(client id, [(scope, key, limit)]) for the rate limiter"""
+    # Never store raw API keys in the (possibly shared) limiter storage
+    key_id = hashlib.sha256(api_key.encode()).hexdigest()[:16] if api_key else None
+    client = f"key:{key_id}" if key_id else f"ip:{request.client.host if request.client else 'unknown'}"
+    checks = [("client", client, RATE_LIMIT)]
+    if key_id:
+        checks.append(("quota", key_id, API_KEY_QUOTAS.get(api_key, API_KEY_QUOTA)))
+    return client, checks
+
+
+def rate_limited_error(e: RateLimited) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=f"{'API key quota' if e.scope == 'quota' else 'Rate limit'} exceeded: {e.limit}",
+        headers={"Retry-After": retry_after_header(e.retry_after), "X-RateLimit-Limit": str(e.limit)}
+    )
+
+
+async def enforce_rate_limit(request: Request, cost: float, api_key: Optional[str]) -> None:
+    """Charge cost to the client's rate limit and the API key's quota, or reject with 429"""
+    client, checks = rate_limit_checks(request, api_key)
+    try:
+        await rate_limiter.hit(checks, cost)
+    except RateLimited as e:
+        RATE_LIMITED.inc(scope=e.scope)
+        logger.warning(f"Rate limited {client} ({e.scope}, cost {cost:g})")
+        raise rate_limited_error(e)
+
+
+def generation_cost(gen_request: GenerateRequest, images: Optional[List[UploadFile]]) -> float:
+    """Rate limit cost of a generation, from its page count and submitted images"""
+    return request_cost(len(resolve_pages(gen_request)), min(len(images or []), MAX_IMAGES))
+
+
+def generation_cache_key(gen_request: GenerateRequest, image_payloads: List[bytes]) -> Optional[str]:
+    """Cache key for a request, or None when the cache is disabled"""
+    if not generation_cache.enabled:
+        return None
+    image_hashes = [hashlib.sha256(data).hexdigest() for data in image_payloads]
+    return make_cache_key(gen_request.dict(), generation_model(gen_request), PROMPT_VERSION, image_hashes)
+
+
+def zip_download_name(company_name: str) -> str:
+    return f"{company_name.replace(' ', '_')}_website.zip"
+
+
+async def run_generation(
+    gen_request: GenerateRequest,
+    image_payloads: List[bytes],
+    cache_key: Optional[str],
+    metadata: Optional[dict] = None,
+    on_event: Optional[Callable[[str, dict], Awaitable[None]]] = None
+) -> bytes:
+    """Full pipeline: image analysis, generation and ZIP; returns the ZIP bytes
+
+    The stored artifact's id and URL are added to metadata (the job's) when given.
+    on_event is awaited with the progress events of the pipeline (stage changes and
+    those of generate_website_with_llm), then with file_complete for every file of
+    the final site (including defaults added for missing assets).
+    """
+    with GENERATIONS_IN_FLIGHT.track():
+        try:
+            design_hints = {}
+            if image_payloads:
+                logger.info(f"Analyzing {len(image_payloads)} images")
+                if on_event:
+                    await on_event("stage", {"stage": "analyzing_images"})
+                design_hints = await analyze_images_with_vision(image_payloads)
+            
+            # Generate website
+            logger.info("Calling AI model to generate website")
+            if on_event:
+                stage = "planning" if resolve_generation_mode(gen_request) == "parallel" else "generating"
+                await on_event("stage", {"stage": stage})
+            files = await generate_website_with_llm(gen_request, design_hints, on_event)
+            if on_event:
+                for filename, content in files.items():
+                    await on_event(*file_event(filename, content))
             
-            # Write file to zip
-            zip_file.writestr(safe_filename, content)
+            # Create ZIP
+            logger.info("Creating ZIP file")
+            with STAGE_SECONDS.time(stage="zip_build"):
+                zip_bytes = await cpu_executor.run("zip_build", build_zip_bytes, files)
+        except HTTPException as e:
+            GENERATION_ERRORS.inc(status=e.status_code)
+            raise
+        except Exception:
+            GENERATION_ERRORS.inc(status=500)
+            raise
+    
+    if cache_key:
+        await generation_cache.set(cache_key, zip_bytes)
+    artifact_id = await store_artifact(files, gen_request)
+    if artifact_id and metadata is not None:
+        metadata.update(artifact_links(artifact_id))
+    return zip_bytes
+
+
+def artifact_links(artifact_id: str) -> dict:
+    return {"artifact_id": artifact_id, "artifact_url": f"/artifacts/{artifact_id}"}
+
+
+def queue_generation(
+    gen_request: GenerateRequest,
+    image_payloads: List[bytes],
+    cache_key: Optional[str],
+    on_event: Optional[Callable[[str, dict], Awaitable[None]]] = None
+) -> Job:
+    """Queue a generation on the shared worker pool; raises JobQueueFull
+
+    on_event (see run_generation) finally gets a "finished" event when the job
+    ends, whatever its outcome.
+    """
+    metadata = {"filename": zip_download_name(gen_request.company_name)}
+    
+    async def generate() -> bytes:
+        try:
+            return await run_generation(gen_request, image_payloads, cache_key, metadata, on_event)
+        finally:
+            if on_event:
+                await on_event("finished", {})
+    
+    return job_queue.submit(generate, metadata=metadata)
+
+
+def submit_generation_job(
+    gen_request: GenerateRequest,
+    image_payloads: List[bytes],
+    cache_key: Optional[str],
+    on_event: Optional[Callable[[str, dict], Awaitable[None]]] = None
+) -> Job:
+    """Queue a generation, rejecting with 503 and Retry-After when the queue is full"""
+    try:
+        return queue_generation(gen_request, image_payloads, cache_key, on_event)
+    except JobQueueFull as e:
+        logger.warning(f"Job queue full, rejecting request (retry after {e.retry_after}s)")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy. Please retry later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+def submit_relayed_generation(
+    gen_request: GenerateRequest,
+    image_payloads: List[bytes],
+    cache_key: Optional[str]
+) -> Tuple[Job, AsyncIterator[tuple]]:
+    """Queue a generation (503 when the queue is full) and relay its (event, data) progress
+
+    The relay ends when the job does; await job.wait() for its outcome.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    
+    async def on_event(event: str, data: dict) -> None:
+        events.put_nowait((event, data))
     
-    zip_buffer.seek(0)
-    return zip_buffer
+    async def relay() -> AsyncIterator[tuple]:
+        while True:
+            event, data = await events.get()
+            if event == "finished":
+                return
+            yield event, data
+    
+    return submit_generation_job(gen_request, image_payloads, cache_key, on_event), relay()
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format a Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def iter_with_heartbeat(source: AsyncIterator, interval: float) -> AsyncIterator:
+    """Yield items from source, yielding None whenever it stays idle for interval seconds"""
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in source:
+                await queue.put(item)
+            await queue.put(done)
+        except Exception as e:
+            await queue.put(e)
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=interval)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        task.cancel()
+
+
+async def await_single(awaitable) -> AsyncIterator:
+    """Wrap an awaitable as a one-item async iterator"""
+    yield await awaitable
 
 
 # API Endpoints
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint"""
-    ollama_healthy = await check_ollama_health()
+    """Health check endpoint (last background probe, no outbound call)"""
+    snapshot = ollama_pool.snapshot()
+    if snapshot["checked_at"] is None:
+        status = "starting"
+    elif snapshot["connected"] and not snapshot["stale"]:
+        status = "healthy"
+    else:
+        status = "degraded"
     return HealthResponse(
-        status="healthy" if ollama_healthy else "degraded",
-        ollama_connected=ollama_healthy
+        status=status,
+        ollama_connected=snapshot["connected"] and not snapshot["stale"],
+        checked_at=snapshot["checked_at"],
+        age_seconds=snapshot["age_seconds"],
+        probe_latency_seconds=snapshot.get("probe_latency_seconds"),
+        healthy_backends=snapshot.get("healthy_backends", 0),
+        total_backends=snapshot.get("total_backends", len(ollama_pool)),
+        loaded_models=snapshot.get("loaded_models", [])
     )
 
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness: the process and its event loop are responding"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness: a backend can serve the code model and the job queue has room"""
+    snapshot = ollama_pool.snapshot()
+    reasons = []
+    if snapshot["checked_at"] is None:
+        reasons.append("Ollama backends not probed yet")
+    elif snapshot["stale"]:
+        reasons.append("Ollama health data is stale")
+    elif not ollama_pool.has_model(CODE_MODEL):
+        reasons.append(f"No healthy Ollama backend with {CODE_MODEL}")
+    if job_queue.depth >= READINESS_MAX_QUEUE_DEPTH:
+        reasons.append(f"Job queue depth {job_queue.depth} >= {READINESS_MAX_QUEUE_DEPTH}")
+    
+    body = {
+        "status": "not_ready" if reasons else "ready",
+        "reasons": reasons,
+        "queue_depth": job_queue.depth,
+        "max_queue_depth": READINESS_MAX_QUEUE_DEPTH,
+        "healthy_backends": snapshot.get("healthy_backends", 0)
+    }
+    return JSONResponse(status_code=503 if reasons else 200, content=body)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Metrics in the Prometheus text format"""
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Generation and image analysis cache hit/miss/eviction counters"""
+    return {
+        "generation": generation_cache.stats(),
+        "image_analysis": image_analysis_cache.stats()
+    }
+
+
+@app.get("/executor/stats")
+async def executor_stats():
+    """Queue depth and per-stage wait/execution time of the CPU executor"""
+    return cpu_executor.stats()
+
+
+@app.get("/backends/stats")
+async def backend_stats():
+    """Health, installed models, circuit state and outstanding requests per Ollama backend"""
+    return ollama_pool.stats()
+
+
+@app.get("/rate-limit/stats")
+async def rate_limit_stats():
+    """Rate limiter backend, limits and allowed/rejected requests and cost per scope"""
+    return {
+        **rate_limiter.stats(),
+        "client_limit": str(RATE_LIMIT),
+        "api_key_quota": str(API_KEY_QUOTA) if API_KEYS else None,
+        "page_cost": RATE_LIMIT_PAGE_COST,
+        "image_cost": RATE_LIMIT_IMAGE_COST
+    }
+
+
+@app.get("/coalescing/stats")
+async def coalescing_stats():
+    """How many identical in-flight requests shared a single execution"""
+    return {
+        "vision": vision_flights.stats(),
+        "generation": generation_flights.stats()
+    }
+
+
+@app.get("/llm/stats")
+async def llm_timing_stats():
+    """Prompt-eval vs. eval timings and model loads reported by Ollama, per model"""
+    return {
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "num_ctx": OLLAMA_NUM_CTX,
+        "prompt_version": PROMPT_VERSION,
+        "models": llm_stats.stats(),
+        "model_ladder": [{"model": model, "max_pages": max_pages} for model, max_pages in MODEL_LADDER] + [{"model": CODE_MODEL}],
+        "default_tier": DEFAULT_TIER,
+        "budget": token_budget.stats()
+    }
+
+
+@app.post("/analyze-image")
+async def analyze_image(
+    request: Request,
+    image: UploadFile = File(...),
+    colors: int = Form(PALETTE_COLORS),
+    api_key: Optional[str] = Depends(verify_api_key)
+):
+    """
+    Extract the dominant color palette of an image
+    
+    Parameters:
+    - image: JPEG, PNG, GIF or WEBP image
+    - colors: Number of dominant colors to return (1-12)
+    """
+    if not 1 <= colors <= 12:
+        raise HTTPException(status_code=400, detail="colors must be between 1 and 12")
+    
+    await enforce_rate_limit(request, request_cost(0, 1), api_key)
+    image_data = await validate_image(image)
+    if image_data is None:
+        raise HTTPException(status_code=400, detail="Invalid image")
+    
+    try:
+        return await cpu_executor.run("image_analysis", extract_palette, image_data, colors)
+    except Exception as e:
+        logger.error(f"Palette extraction failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error"
+        )
+
+
 @app.post("/generate")
-@limiter.limit(RATE_LIMIT)
 async def generate_website(
     request: Request,
     company_name: str = Form(...),
@@ -456,7 +1824,11 @@ async def generate_website(
     theme_hint: Optional[str] = Form(None),
     pages: Optional[str] = Form(None),
     require_dark_mode: bool = Form(False),
-    images: Optional[List[UploadFile]] = File(None)
+    mode: Optional[str] = Form(None),
+    tier: Optional[str] = Form(None),
+    stream_zip: bool = Form(False),
+    images: List[UploadFile] = File(default=[]),
+    api_key: Optional[str] = Depends(verify_api_key)
 ):
     """
     Generate a multi-page static website
@@ -467,60 +1839,55 @@ async def generate_website(
     - theme_hint: Optional theme guidance (e.g., "modern", "elegant")
     - pages: Comma-separated list of pages to generate (max 5)
     - require_dark_mode: Whether to use dark mode
+    - mode: Optional generation mode ("single", "parallel", "template" or "auto")
+    - tier: Optional "fast", "balanced" or "quality": code model and output budget
+    - stream_zip: Send ZIP entries as each file is generated instead of after the whole site
     - images: Optional images for design inspiration (max 3)
     """
     try:
-        # Parse pages
-        pages_list = None
-        if pages:
-            pages_list = [p.strip() for p in pages.split(',')][:MAX_PAGES]
-        
-        # Create request object
-        gen_request = GenerateRequest(
-            company_name=company_name,
-            description=description,
-            theme_hint=theme_hint,
-            pages=pages_list,
-            require_dark_mode=require_dark_mode
+        gen_request = build_generate_request(
+            company_name, description, theme_hint, pages, require_dark_mode, mode, tier
         )
+        await enforce_rate_limit(request, generation_cost(gen_request, images), api_key)
         
         logger.info(f"Generating website for: {company_name}")
         
         # Validate images if provided
-        design_hints = {}
-        if images:
-            if len(images) > MAX_IMAGES:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Maximum {MAX_IMAGES} images allowed"
+        valid_images = await filter_valid_images(images)
+        
+        download_headers = {
+            "Content-Disposition": f"attachment; filename={zip_download_name(company_name)}"
+        }
+        
+        # Serve identical submissions from the cache
+        cache_key = generation_cache_key(gen_request, valid_images)
+        if cache_key:
+            cached_zip = await generation_cache.get(cache_key)
+            if cached_zip is not None:
+                logger.info(f"Generation cache hit: {cache_key[:12]}")
+                artifact_id = await store_cached_artifact(cached_zip, gen_request)
+                if artifact_id:
+                    download_headers["X-Artifact-Id"] = artifact_id
+                return Response(
+                    content=cached_zip,
+                    media_type="application/zip",
+                    headers={**download_headers, "X-Cache": "HIT"}
                 )
-            
-            valid_images = []
-            for img in images:
-                if validate_image(img):
-                    valid_images.append(img)
-                else:
-                    logger.warning(f"Invalid image: {img.filename}")
-            
-            if valid_images:
-                logger.info(f"Analyzing {len(valid_images)} images")
-                design_hints = await analyze_images_with_vision(valid_images)
         
-        # Generate website
-        logger.info("Calling AI model to generate website")
-        files = await generate_website_with_llm(gen_request, design_hints)
+        if stream_zip:
+            return await stream_zip_response(gen_request, valid_images, cache_key, download_headers)
         
-        # Create ZIP
-        logger.info("Creating ZIP file")
-        zip_buffer = create_zip_file(files)
+        # Run through the shared worker pool so Ollama is never oversubscribed
+        job = submit_generation_job(gen_request, valid_images, cache_key)
+        zip_bytes = await job.wait()
+        if "artifact_id" in job.metadata:
+            download_headers["X-Artifact-Id"] = job.metadata["artifact_id"]
         
         # Return ZIP file
-        return StreamingResponse(
-            zip_buffer,
+        return Response(
+            content=zip_bytes,
             media_type="application/zip",
-            headers={
-                "Content-Disposition": f"attachment; filename={company_name.replace(' ', '_')}_website.zip"
-            }
+            headers={**download_headers, "X-Cache": "MISS"}
         )
         
     except HTTPException:
@@ -533,6 +1900,850 @@ async def generate_website(
         )
 
 
+async def stream_zip_response(
+    gen_request: GenerateRequest,
+    image_payloads: List[bytes],
+    cache_key: Optional[str],
+    download_headers: dict
+) -> StreamingResponse:
+    """Stream the ZIP while it is generated; failures before the first entry are normal HTTP errors
+
+    The generation runs as a queued job like any other, so it shares the worker
+    pool, coalescing, cache, artifact store and metrics; its files are relayed
+    into ZIP entries as the job produces them.
+    """
+    job, events = submit_relayed_generation(gen_request, image_payloads, cache_key)
+    
+    async def completed_files() -> AsyncIterator[tuple]:
+        async for event, data in events:
+            if event == "file_complete":
+                yield data["file"], data["content"]
+    
+    writer = ZipStreamWriter(compression=ZIP_COMPRESSION, store_threshold=ZIP_STORE_THRESHOLD)
+    
+    async def add_entry(filename: str, content: str) -> bytes:
+        safe_filename = safe_zip_name(filename)
+        if writer.has_entry(safe_filename):
+            # Files of the final site the stream already relayed
+            return b""
+        data = content.encode('utf-8')
+        method = writer.method_for(len(data))
+        payload, crc = await cpu_executor.run("zip_build", compress_entry, data, method, writer.level)
+        return writer.add_compressed(safe_filename, payload, crc, len(data), method)
+    
+    files = completed_files()
+    first = await anext(files, None)
+    if first is None:
+        # Failed before any file: raise the job's error as a normal response
+        await job.wait()
+    
+    async def body():
+        try:
+            if first is not None:
+                yield await add_entry(*first)
+                async for item in files:
+                    yield await add_entry(*item)
+            # Raises if the site turned out unusable, which aborts the response
+            # before the central directory is written
+            await job.wait()
+            yield writer.finish()
+        except Exception as e:
+            # Headers are already sent; dropping the connection leaves an invalid archive
+            logger.error(f"Streaming ZIP aborted: {getattr(e, 'detail', e)}")
+            raise
+    
+    return StreamingResponse(
+        body(),
+        media_type="application/zip",
+        headers={**download_headers, "X-Cache": "MISS"}
+    )
+
+
+@app.post("/generate/stream")
+async def generate_website_stream(
+    request: Request,
+    company_name: str = Form(...),
+    description: str = Form(...),
+    theme_hint: Optional[str] = Form(None),
+    pages: Optional[str] = Form(None),
+    require_dark_mode: bool = Form(False),
+    mode: Optional[str] = Form(None),
+    tier: Optional[str] = Form(None),
+    inline_zip: bool = Form(False),
+    images: List[UploadFile] = File(default=[]),
+    api_key: Optional[str] = Depends(verify_api_key)
+):
+    """
+    Generate a website and stream progress as Server-Sent Events
+    
+    Accepts the same parameters as /generate. The generation runs as a queued
+    job like any other, so it shares the worker pool, coalescing, cache and
+    metrics; its progress is relayed as the job produces it. Events:
+    - start: pages being generated
+    - stage: pipeline stage changes (queued, image analysis, generation)
+    - file_start / file_complete: file boundaries in the model output
+    - progress: model chunks and characters received so far
+    - complete: final event with a download link for the ZIP (artifact_url, or
+      result_url of the completed job without an artifact store); the ZIP itself
+      is only included base64-encoded with inline_zip=true
+    - error: generation failed (status_code, detail)
+    """
+    try:
+        gen_request = build_generate_request(
+            company_name, description, theme_hint, pages, require_dark_mode, mode, tier
+        )
+        await enforce_rate_limit(request, generation_cost(gen_request, images), api_key)
+        valid_images = await filter_valid_images(images)
+        cache_key = generation_cache_key(gen_request, valid_images)
+        cached_zip = await generation_cache.get(cache_key) if cache_key else None
+        job = events = None
+        if cached_zip is None:
+            job, events = submit_relayed_generation(gen_request, valid_images, cache_key)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in generate_website_stream: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error"
+        )
+    
+    logger.info(f"Streaming website generation for: {company_name}")
+    filename = zip_download_name(company_name)
+    
+    def complete_event(zip_bytes: bytes, cached: bool, artifact_id: Optional[str] = None, job: Optional[Job] = None) -> str:
+        data = {"filename": filename, "size": len(zip_bytes), "cached": cached}
+        if artifact_id:
+            data.update(artifact_links(artifact_id))
+        else:
+            # Without an artifact the ZIP is downloadable as a completed job until its result expires
+            job = job or job_queue.add_completed(zip_bytes, metadata={"filename": filename})
+            data.update({"job_id": job.id, "result_url": f"/jobs/{job.id}/result"})
+        if inline_zip:
+            data["zip_base64"] = base64.b64encode(zip_bytes).decode("ascii")
+        return sse_event("complete", data)
+    
+    async def event_stream():
+        yield sse_event("start", {"pages": resolve_pages(gen_request)})
+        try:
+            if job is None:
+                logger.info(f"Generation cache hit: {cache_key[:12]}")
+                yield complete_event(cached_zip, cached=True, artifact_id=await store_cached_artifact(cached_zip, gen_request))
+                return
+            
+            if job_queue.depth + job_queue.running > job_queue.workers:
+                # Every worker is busy: the job waits for its turn
+                yield sse_event("stage", {"stage": "queued", "queue_depth": job_queue.depth})
+            sent_files = set()
+            async for item in iter_with_heartbeat(events, STREAM_HEARTBEAT_INTERVAL):
+                if item is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                event, data = item
+                if event == "file_complete":
+                    # The final site repeats the files the model already completed
+                    if data["file"] in sent_files:
+                        continue
+                    sent_files.add(data["file"])
+                    data = {"file": data["file"], "size": data["size"]}
+                yield sse_event(event, data)
+            
+            zip_bytes = await job.wait()
+            yield complete_event(zip_bytes, cached=False, artifact_id=job.metadata.get("artifact_id"), job=job)
+            
+        except HTTPException as e:
+            yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.error(f"Unexpected error in generation stream: {e}")
+            yield sse_event("error", {"status_code": 500, "detail": "Internal server error"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    request: Request,
+    company_name: str = Form(...),
+    description: str = Form(...),
+    theme_hint: Optional[str] = Form(None),
+    pages: Optional[str] = Form(None),
+    require_dark_mode: bool = Form(False),
+    mode: Optional[str] = Form(None),
+    tier: Optional[str] = Form(None),
+    images: List[UploadFile] = File(default=[]),
+    api_key: Optional[str] = Depends(verify_api_key)
+):
+    """
+    Queue a website generation and return its job id immediately
+    
+    Accepts the same parameters as /generate. Poll GET /jobs/{job_id} and
+    download the ZIP from GET /jobs/{job_id}/result once completed.
+    Returns 503 with Retry-After when the queue is full.
+    """
+    try:
+        gen_request = build_generate_request(
+            company_name, description, theme_hint, pages, require_dark_mode, mode, tier
+        )
+        await enforce_rate_limit(request, generation_cost(gen_request, images), api_key)
+        valid_images = await filter_valid_images(images)
+        cache_key = generation_cache_key(gen_request, valid_images)
+        
+        cached_zip = await generation_cache.get(cache_key) if cache_key else None
+        if cached_zip is not None:
+            logger.info(f"Generation cache hit: {cache_key[:12]}")
+            artifact_id = await store_cached_artifact(cached_zip, gen_request)
+            job = job_queue.add_completed(
+                cached_zip,
+                metadata={"filename": zip_download_name(company_name), **(artifact_links(artifact_id) if artifact_id else {})}
+            )
+        else:
+            job = submit_generation_job(gen_request, valid_images, cache_key)
+        
+        logger.info(f"Queued job {job.id} for: {company_name}")
+        return {
+            **job.to_dict(),
+            "queue_depth": job_queue.depth,
+            "status_url": f"/jobs/{job.id}",
+            "result_url": f"/jobs/{job.id}/result"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in create_job: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error"
+        )
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {**job.to_dict(), "queue_depth": job_queue.depth}
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Download the ZIP of a completed job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if not job.finished:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job is {job.status}",
+            headers={"Retry-After": str(job_queue.retry_after())}
+        )
+    
+    if job.result_dropped and "artifact_url" in job.metadata:
+        # Dropped over JOB_RESULT_MAX_MB, but the site is still in the artifact store
+        return RedirectResponse(job.metadata["artifact_url"], status_code=303)
+    
+    zip_bytes = await job.wait()
+    return Response(
+        content=zip_bytes,
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename={job.metadata['filename']}"
+        }
+    )
+
+
+@app.get("/jobs")
+async def job_queue_stats():
+    """Job queue depth, worker count and outcome counters"""
+    return job_queue.stats()
+
+
+# ============================================================================
+# Batch generation
+# ============================================================================
+
+# Request body allowance per batch site (a full entry is about 3KB)
+BATCH_BYTES_PER_SITE = 16 * 1024
+
+
+def batch_generate_request(entry: dict) -> GenerateRequest:
+    """GenerateRequest from a batch entry; pages may also be a comma-separated string (e.g. from a CSV)"""
+    pages = entry.get("pages")
+    if isinstance(pages, str):
+        entry = {**entry, "pages": [p.strip() for p in pages.split(',') if p.strip()] or None}
+    return GenerateRequest(**entry)
+
+
+def batch_folder(index: int, company_name: str) -> str:
+    """ZIP folder of a batch site, numbered by its position in the batch"""
+    return f"{index + 1:03d}-{safe_zip_name(company_name.replace(' ', '_'))}"
+
+
+async def charge_batch_site(request: Request, gen_request: GenerateRequest, api_key: Optional[str]) -> None:
+    """Take a site's cost from the rate limit, waiting for the client's bucket to refill instead of failing
+
+    An exhausted API key quota still fails the site with 429.
+    """
+    client, checks = rate_limit_checks(request, api_key)
+    cost = generation_cost(gen_request, None)
+    while True:
+        try:
+            await rate_limiter.hit(checks, cost)
+            return
+        except RateLimited as e:
+            if e.scope == "quota":
+                RATE_LIMITED.inc(scope=e.scope)
+                raise rate_limited_error(e)
+            logger.info(f"Batch of {client} waiting {e.retry_after:.1f}s for the rate limit")
+            await asyncio.sleep(e.retry_after)
+
+
+async def generate_batch_site(request: Request, gen_request: GenerateRequest, api_key: Optional[str]) -> dict:
+    """One batch site from the cache or through the shared job queue: its ZIP and artifact links
+
+    Only sites that are actually generated are charged to the rate limit.
+    """
+    cache_key = generation_cache_key(gen_request, [])
+    cached_zip = await generation_cache.get(cache_key) if cache_key else None
+    if cached_zip is not None:
+        artifact_id = await store_cached_artifact(cached_zip, gen_request)
+        return {"zip": cached_zip, "cached": True, **(artifact_links(artifact_id) if artifact_id else {})}
+    await charge_batch_site(request, gen_request, api_key)
+    while True:
+        try:
+            job = queue_generation(gen_request, [], cache_key)
+            break
+        except JobQueueFull as e:
+            # The batch waits for room; its concurrency cap keeps it from filling the queue
+            await asyncio.sleep(min(e.retry_after, STREAM_HEARTBEAT_INTERVAL))
+    zip_bytes = await job.wait()
+    links = {key: job.metadata[key] for key in ("artifact_id", "artifact_url") if key in job.metadata}
+    return {"zip": zip_bytes, "cached": False, **links}
+
+
+async def iter_batch(
+    request: Request,
+    entries: List,
+    concurrency: int,
+    api_key: Optional[str]
+) -> AsyncIterator[tuple]:
+    """(events, site ZIP or None) as batch sites start and finish, ending with a "done" summary
+
+    Identical sites are generated once; their events come together with the
+    shared ZIP, each marked with duplicate_of.
+    """
+    started_at = time.time()
+    items = []
+    invalid = []
+    for index, entry in enumerate(entries):
+        if isinstance(entry, InvalidEntry):
+            invalid.append((index, entry.detail))
+            continue
+        try:
+            gen_request = batch_generate_request(entry)
+        except ValidationError as e:
+            invalid.append((index, validation_detail(e)))
+            continue
+        except (TypeError, ValueError) as e:
+            invalid.append((index, str(e)))
+            continue
+        items.append((index, coalesce_key(gen_request.dict()), gen_request))
+    requests = {index: gen_request for index, _, gen_request in items}
+    duplicates = first_indices(items)
+    
+    unique = len({key for _, key, _ in items})
+    
+    logger.info(f"Batch of {len(entries)} sites ({unique} unique, concurrency {concurrency})")
+    yield [{
+        "event": "batch",
+        "total": len(entries),
+        "unique": unique,
+        "invalid": len(invalid),
+        "concurrency": concurrency
+    }], None
+    
+    outcomes = {COMPLETED: 0, FAILED: 0}
+    if invalid:
+        outcomes[FAILED] += len(invalid)
+        BATCH_ENTRIES.inc(len(invalid), outcome="invalid")
+        yield [{"event": FAILED, "index": index, "status_code": 400, "detail": detail} for index, detail in invalid], None
+    
+    runner = BatchRunner(concurrency)
+    async for kind, indices, result in runner.run(items, lambda gen_request: generate_batch_site(request, gen_request, api_key)):
+        if kind == FAILED and not isinstance(result, HTTPException):
+            logger.error(f"Batch site {indices[0]} failed: {result}")
+            result = HTTPException(status_code=500, detail="Internal server error during generation")
+        events = []
+        for index in indices:
+            event = {"event": kind, "index": index, "company_name": requests[index].company_name}
+            if duplicates[index] is not None:
+                event["duplicate_of"] = duplicates[index]
+            if kind == COMPLETED:
+                event.update(
+                    folder=batch_folder(index, requests[index].company_name),
+                    size=len(result["zip"]),
+                    cached=result["cached"],
+                    **{key: value for key, value in result.items() if key.startswith("artifact_")}
+                )
+            elif kind == FAILED:
+                event.update(status_code=result.status_code, detail=result.detail)
+            if kind in outcomes:
+                outcomes[kind] += 1
+                BATCH_ENTRIES.inc(outcome="duplicate" if duplicates[index] is not None else kind)
+            events.append(event)
+        yield events, result["zip"] if kind == COMPLETED else None
+    
+    yield [{
+        "event": "done",
+        "completed": outcomes[COMPLETED],
+        "failed": outcomes[FAILED],
+        "seconds": round(time.time() - started_at, 3)
+    }], None
+
+
+async def batch_ndjson(batch: AsyncIterator[tuple]) -> AsyncIterator[bytes]:
+    """Batch events as NDJSON, with heartbeat lines while every site is still generating"""
+    async for item in iter_with_heartbeat(batch, STREAM_HEARTBEAT_INTERVAL):
+        events = [{"event": "heartbeat"}] if item is None else item[0]
+        for event in events:
+            yield (json.dumps(event) + "\n").encode()
+
+
+def unpack_zip(data: bytes) -> List[tuple]:
+    """(name, bytes) of every entry of a ZIP"""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        return [(info.filename, archive.read(info)) for info in archive.infolist()]
+
+
+async def batch_zip(batch: AsyncIterator[tuple]) -> AsyncIterator[bytes]:
+    """One ZIP with a folder per completed site, written as sites finish, and batch.json with every outcome last"""
+    writer = ZipStreamWriter(compression=ZIP_COMPRESSION, store_threshold=ZIP_STORE_THRESHOLD)
+    report = {}
+    summary = {}
+    async for events, zip_bytes in batch:
+        folders = [event["folder"] for event in events if event["event"] == COMPLETED]
+        if folders:
+            # Duplicates share the compressed entries of the one generated site
+            for name, data in await cpu_executor.run("zip_build", unpack_zip, zip_bytes):
+                method = writer.method_for(len(data))
+                payload, crc = await cpu_executor.run("zip_build", compress_entry, data, method, writer.level)
+                for folder in folders:
+                    yield writer.add_compressed(f"{folder}/{name}", payload, crc, len(data), method)
+        for event in events:
+            if event["event"] in (COMPLETED, FAILED):
+                report[event["index"]] = event
+            elif event["event"] == "done":
+                summary = event
+    
+    data = json.dumps({**summary, "sites": [report[index] for index in sorted(report)]}, indent=2).encode()
+    yield writer.add_file("batch.json", data)
+    yield writer.finish()
+
+
+async def read_body_limited(request: Request, max_bytes: int) -> bytes:
+    """Request body, or 413 once it exceeds max_bytes"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail="Request body too large")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise HTTPException(status_code=413, detail="Request body too large")
+    return bytes(body)
+
+
+@app.post("/generate/batch")
+async def generate_batch(
+    request: Request,
+    output: str = Query("ndjson"),
+    concurrency: Optional[int] = Query(None, ge=1),
+    api_key: Optional[str] = Depends(verify_api_key)
+):
+    """
+    Generate many websites from one request
+    
+    The body is a JSON array of /generate parameters (or {"sites": [...]}),
+    or NDJSON (application/x-ndjson) with one site per line. Identical sites
+    are generated once and at most `concurrency` sites of the batch are in
+    the shared job queue at a time. Each site is charged to the rate limit
+    when it is scheduled, waiting for the bucket to refill, and fails on its
+    own without failing the batch.
+    
+    - output=ndjson: progress events (batch, started, completed, failed, done)
+    - output=zip: one streaming ZIP with a folder per site and batch.json
+    """
+    if output not in ("ndjson", "zip"):
+        raise HTTPException(status_code=400, detail="Invalid output: use ndjson or zip")
+    body = await read_body_limited(request, BATCH_MAX_SITES * BATCH_BYTES_PER_SITE)
+    try:
+        entries = parse_batch_body(body, request.headers.get("content-type", ""), BATCH_MAX_SITES)
+    except BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    batch = iter_batch(request, entries, min(concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY), api_key)
+    if output == "zip":
+        return StreamingResponse(
+            batch_zip(batch),
+            media_type="application/zip",
+            headers={"Content-Disposition": "attachment; filename=websites_batch.zip"}
+        )
+    return StreamingResponse(batch_ndjson(batch), media_type="application/x-ndjson")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists etag (weak comparison, as RFC 9110 requires here)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+async def send_stored_file(request: Request, path: str, etag: str, media_type: str, headers: dict) -> Response:
+    """Serve a stored file from a memory map with ETag revalidation and single byte ranges"""
+    headers = {**headers, "ETag": etag, "Accept-Ranges": "bytes"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        mapped = await asyncio.to_thread(MappedFile, path)
+    except FileNotFoundError:
+        # Evicted between the lookup and the read
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range: only send part of the file if the client's copy is this exact version
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, mapped.size)
+        except RangeNotSatisfiable:
+            mapped.close()
+            raise HTTPException(
+                status_code=416,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{mapped.size}"}
+            )
+    
+    if byte_range is None:
+        start, end, status_code = 0, mapped.size - 1, 200
+    else:
+        (start, end), status_code = byte_range, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{mapped.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    # A plain iterator runs in the threadpool, so page faults never block the event loop
+    return StreamingResponse(mapped.iter_range(start, end + 1), status_code=status_code, media_type=media_type, headers=headers)
+
+
+async def load_artifact(artifact_id: str):
+    """Artifact by id or 404"""
+    if artifact_store is None:
+        raise HTTPException(status_code=404, detail="Artifact store is disabled")
+    try:
+        return await asyncio.to_thread(artifact_store.get, artifact_id)
+    except ArtifactNotFound:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+
+@app.get("/artifacts/stats")
+async def artifact_stats():
+    """Artifact store size, deduplication and eviction counters"""
+    if artifact_store is None:
+        return {"enabled": False}
+    return {"enabled": True, **artifact_store.stats()}
+
+
+@app.get("/artifacts/{artifact_id}")
+async def download_artifact(artifact_id: str, request: Request):
+    """Download a generated site as a ZIP; supports If-None-Match and Range (resumable downloads)"""
+    artifact = await load_artifact(artifact_id)
+    etag = artifact_store.zip_etag(artifact)
+    filename = artifact.filename or f"website_{artifact.id[:12]}.zip"
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Cache-Control": "no-cache"
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={**headers, "ETag": etag})
+    
+    try:
+        with STAGE_SECONDS.time(stage="artifact_zip"):
+            path = await asyncio.to_thread(artifact_store.zip_path, artifact)
+    except ArtifactNotFound:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return await send_stored_file(request, path, etag, "application/zip", headers)
+
+
+@app.get("/artifacts/{artifact_id}/files")
+async def list_artifact_files(artifact_id: str):
+    """Files of a generated site with their content hashes and sizes"""
+    artifact = await load_artifact(artifact_id)
+    return {
+        **artifact.to_dict(),
+        "zip_url": f"/artifacts/{artifact.id}",
+        "file_urls": {entry["name"]: f"/artifacts/{artifact.id}/files/{entry['name']}" for entry in artifact.files}
+    }
+
+
+@app.get("/artifacts/{artifact_id}/files/{name}")
+async def download_artifact_file(artifact_id: str, name: str, request: Request):
+    """A single generated file, served from its content-addressed blob"""
+    artifact = await load_artifact(artifact_id)
+    entry = artifact.file(name)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    headers = {
+        "Cache-Control": "public, max-age=31536000, immutable",
+        # Generated pages must not run scripts with this API's origin
+        "Content-Security-Policy": "sandbox",
+        "X-Content-Type-Options": "nosniff"
+    }
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    return await send_stored_file(request, artifact_store.blob_path(entry["sha256"]), f'"{entry["sha256"]}"', media_type, headers)
+
+
+# ============================================================================
+# Site edits: regenerate, add or remove one page of a stored site
+# ============================================================================
+
+def site_page_files(request: GenerateRequest, mode: str) -> List[tuple]:
+    """(page, filename) of a stored site, with the names the files have in its ZIP"""
+    if mode == "single":
+        pages = [("index", "index.html")] + [(page, f"{page}.html") for page in resolve_pages(request) if page != 'index']
+    else:
+        pages = plan_page_files(resolve_pages(request))
+    return [(page, safe_zip_name(filename)) for page, filename in pages]
+
+
+class StoredSite:
+    """A stored site opened for editing: its files and the request and mode it was generated with"""
+
+    def __init__(self, artifact, files: dict, request: GenerateRequest, mode: str):
+        self.artifact = artifact
+        self.files = files
+        self.request = request
+        self.mode = mode
+        self.page_files = site_page_files(request, mode)
+
+    def find_page(self, page: str) -> Optional[tuple]:
+        """(page, filename) for a page name or filename"""
+        key = page.strip().lower()
+        for name, filename in self.page_files:
+            if key in (name.lower(), filename.lower(), filename[:-len('.html')].lower()) and filename in self.files:
+                return name, filename
+        return None
+
+    @property
+    def nav(self) -> List[dict]:
+        """Navigation as the home page shows it (labels may have been chosen by the model)"""
+        nav = extract_nav(self.files.get("index.html", ""))
+        return nav or default_nav([(page, filename) for page, filename in self.page_files if filename in self.files])
+
+    @property
+    def css_classes(self) -> List[str]:
+        """Class vocabulary of the site's own stylesheet"""
+        return extract_css_classes(self.files.get("styles.css", "")) or CSS_CLASSES
+
+
+async def load_site(site_id: str) -> StoredSite:
+    """Stored site by artifact id, or 404 / 409 when it cannot be edited"""
+    artifact = await load_artifact(site_id)
+    site = artifact.metadata.get("site")
+    if not site:
+        raise HTTPException(status_code=409, detail="Site was stored without its generation request and cannot be edited")
+    
+    def read_files() -> dict:
+        return {entry["name"]: artifact_store.read_blob(entry["sha256"]).decode("utf-8") for entry in artifact.files}
+    
+    try:
+        files = await asyncio.to_thread(read_files)
+    except ArtifactNotFound:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return StoredSite(artifact, files, GenerateRequest(**site["request"]), site["mode"])
+
+
+def with_instructions(prompt: str, instructions: Optional[str]) -> str:
+    if not instructions:
+        return prompt
+    return f"{prompt}\n\nRequested changes for this page: {instructions}"
+
+
+async def generate_site_page(
+    site: StoredSite,
+    page: str,
+    filename: str,
+    nav: List[dict],
+    instructions: Optional[str] = None
+) -> str:
+    """One page built against the stored site's navigation and CSS vocabulary (a single model call)"""
+    request = site.request
+    if site.mode == "template":
+        # Same shell as the rest of the site; the model only writes <main>
+        content = await complete_ollama_chat(build_chat_payload(
+            with_instructions(build_body_prompt(request, page, filename, nav), instructions),
+            stream=True, system=BODY_SYSTEM_PROMPT, **reply_options(request, "body")
+        ), ("body", 1))
+        title = next((item["label"] for item in nav if item["href"] == filename), page.title())
+        return render_page(request.company_name, title, filename, nav, extract_main_content(content), request.description)
+    
+    plan = {"tagline": "", "sections": {}, "nav": nav, "css_classes": site.css_classes}
+    content = await complete_ollama_chat(build_chat_payload(
+        with_instructions(build_page_prompt(request, plan, page, filename), instructions),
+        stream=True, system=RAW_SYSTEM_PROMPT, **reply_options(request, "page")
+    ), ("page", 1))
+    page_html = strip_code_fences(content)
+    if not page_html:
+        raise HTTPException(status_code=502, detail="Empty response from AI model")
+    return page_html
+
+
+async def save_site_edit(site: StoredSite, files: dict, request: GenerateRequest, changed: List[str]) -> dict:
+    """Store the edited site as a new artifact; unchanged files are deduplicated against the old one"""
+    artifact_id = await store_artifact(files, request, site.mode)
+    if artifact_id is None:
+        raise HTTPException(status_code=503, detail="Could not store the edited site")
+    return {
+        "site_id": artifact_id,
+        "previous_site_id": site.artifact.id,
+        "changed": changed,
+        "pages": [filename for _, filename in site_page_files(request, site.mode) if filename in files],
+        **artifact_links(artifact_id),
+        "files_url": f"/artifacts/{artifact_id}/files"
+    }
+
+
+def check_edit_capacity() -> None:
+    """Page edits run inline, but still respect the job queue's backpressure"""
+    try:
+        job_queue.check_capacity()
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy. Please retry later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+def clean_instructions(instructions: Optional[str]) -> Optional[str]:
+    """Instructions sanitized like the request's text fields"""
+    if not instructions or not instructions.strip():
+        return None
+    if len(instructions) > MAX_DESCRIPTION_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Instructions exceed {MAX_DESCRIPTION_LENGTH} characters")
+    return re.sub(r'[<>\"\'&]', '', instructions.strip())
+
+
+@app.post("/sites/{site_id}/pages/{page}/regenerate")
+async def regenerate_site_page(
+    site_id: str,
+    page: str,
+    request: Request,
+    instructions: Optional[str] = Form(None),
+    api_key: Optional[str] = Depends(verify_api_key)
+):
+    """
+    Regenerate one page of a stored site
+    
+    The page is rebuilt against the site's navigation, CSS classes and theme
+    with a single model call; every other file is kept as is. Returns the id
+    of the edited site (a new artifact).
+    """
+    instructions = clean_instructions(instructions)
+    site = await load_site(site_id)
+    found = site.find_page(page)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Page not found")
+    await enforce_rate_limit(request, request_cost(1, 0), api_key)
+    check_edit_capacity()
+    
+    page_name, filename = found
+    logger.info(f"Regenerating {filename} of site {site.artifact.id}")
+    content = await generate_site_page(site, page_name, filename, site.nav, instructions)
+    return await save_site_edit(site, {**site.files, filename: content}, site.request, [filename])
+
+
+@app.post("/sites/{site_id}/pages", status_code=201)
+async def add_site_page(
+    site_id: str,
+    request: Request,
+    page: str = Form(...),
+    instructions: Optional[str] = Form(None),
+    api_key: Optional[str] = Depends(verify_api_key)
+):
+    """
+    Add a page to a stored site
+    
+    Generates only the new page; its link is added to the navigation and
+    footer of the other pages locally, without calling the model.
+    """
+    instructions = clean_instructions(instructions)
+    site = await load_site(site_id)
+    pages = resolve_pages(site.request)
+    if len(pages) >= MAX_PAGES:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_PAGES} pages allowed")
+    try:
+        new_request = GenerateRequest(**{**site.request.dict(), "pages": pages + [page.strip()]})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid page: {e}")
+    page_name, filename = site_page_files(new_request, site.mode)[-1]
+    if site.find_page(page) is not None or filename in site.files:
+        raise HTTPException(status_code=409, detail=f"{filename} already exists")
+    await enforce_rate_limit(request, request_cost(1, 0), api_key)
+    check_edit_capacity()
+    
+    label = default_nav([(page_name, filename)])[0]["label"]
+    logger.info(f"Adding {filename} to site {site.artifact.id}")
+    content = await generate_site_page(site, page_name, filename, site.nav + [{"label": label, "href": filename}], instructions)
+    files = {
+        name: add_nav_link(text, filename, label) if name.endswith(".html") else text
+        for name, text in site.files.items()
+    }
+    files[filename] = content
+    changed = [filename] + [name for name in site.files if files[name] != site.files[name]]
+    return await save_site_edit(site, files, new_request, changed)
+
+
+@app.delete("/sites/{site_id}/pages/{page}")
+async def remove_site_page(
+    site_id: str,
+    page: str,
+    api_key: Optional[str] = Depends(verify_api_key)
+):
+    """Remove a page from a stored site and its links from the other pages (no model call)
+
+    Navigation and footer entries are removed and other links to the page are
+    replaced by their text; files that still name it (e.g. a redirect in
+    script.js) are listed in still_linking.
+    """
+    site = await load_site(site_id)
+    found = site.find_page(page)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Page not found")
+    page_name, filename = found
+    if filename == "index.html":
+        raise HTTPException(status_code=400, detail="The home page cannot be removed")
+    
+    new_request = GenerateRequest(**{**site.request.dict(), "pages": [p for p in resolve_pages(site.request) if p != page_name]})
+    files = {
+        name: unlink_page(remove_nav_link(text, filename), filename) if name.endswith(".html") else text
+        for name, text in site.files.items() if name != filename
+    }
+    logger.info(f"Removed {filename} from site {site.artifact.id}")
+    result = await save_site_edit(site, files, new_request, [name for name in files if files[name] != site.files[name]])
+    return {**result, "still_linking": [name for name, text in files.items() if mentions_page(text, filename)]}
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -541,8 +2752,20 @@ async def root():
         "version": "1.0.0",
         "status": "running",
         "endpoints": {
-            "health": "/health",
-            "generate": "/generate (POST)"
+            "health": "/health, /health/live, /health/ready",
+            "generate": "/generate (POST)",
+            "generate_stream": "/generate/stream (POST, Server-Sent Events)",
+            "generate_batch": "/generate/batch (POST, JSON or NDJSON sites)",
+            "analyze_image": "/analyze-image (POST)",
+            "jobs": "/jobs (POST), /jobs/{job_id}, /jobs/{job_id}/result",
+            "artifacts": "/artifacts/{artifact_id}, /artifacts/{artifact_id}/files, /artifacts/stats",
+            "sites": "/sites/{site_id}/pages (POST), /sites/{site_id}/pages/{page}/regenerate (POST), /sites/{site_id}/pages/{page} (DELETE)",
+            "cache_stats": "/cache/stats",
+            "coalescing_stats": "/coalescing/stats",
+            "executor_stats": "/executor/stats",
+            "metrics": "/metrics",
+            "llm_stats": "/llm/stats",
+            "backend_stats": "/backends/stats"
         }
     }
 
@@ -0,0 +1,311 @@
+"""
+Pool of Ollama backends
+Routes each request to the healthy backend with the fewest outstanding requests
+that has the requested model, probes /api/tags and /api/ps in the background for
+health, latency and installed/loaded models (served as a cached snapshot), and
+trips a per-backend circuit breaker on repeated failures
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, List, Optional, Set
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class NoBackendAvailable(Exception):
+    """Raised when no healthy backend with the requested model can take a request"""
+
+    def __init__(self, model: Optional[str] = None):
+        super().__init__(f"No Ollama backend available{f' for {model}' if model else ''}")
+        self.model = model
+
+
+def normalize_model(name: str) -> str:
+    """Ollama treats "name" and "name:latest" as the same model"""
+    return name if ":" in name else f"{name}:latest"
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open trial after reset_timeout"""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._trial_in_flight = False
+
+    def allows(self, now: float) -> bool:
+        if self.state == "open" and now - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        if self.state == "half_open":
+            return not self._trial_in_flight
+        return self.state == "closed"
+
+    def on_acquire(self) -> None:
+        if self.state == "half_open":
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info("Circuit closed after successful trial request")
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self, now: float) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opens += 1
+            self.state = "open"
+            self.opened_at = now
+
+    def release(self) -> None:
+        """A trial request ended without a verdict (e.g. the client went away)"""
+        self._trial_in_flight = False
+
+
+class OllamaBackend:
+    """One Ollama instance with its own connection pool and routing state"""
+
+    def __init__(self, url: str, breaker: CircuitBreaker):
+        self.url = url.rstrip("/")
+        self.breaker = breaker
+        self.client: Optional[httpx.AsyncClient] = None
+        # None until the first probe: routable, with unknown models
+        self.healthy: Optional[bool] = None
+        self.models: Optional[Set[str]] = None
+        self.loaded_models: Optional[Set[str]] = None
+        self.latency: Optional[float] = None
+        self.last_probe: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.last_picked = 0.0
+
+    def has_model(self, model: Optional[str]) -> bool:
+        return model is None or self.models is None or normalize_model(model) in self.models
+
+    def routable(self, model: Optional[str], now: float) -> bool:
+        return self.healthy is not False and self.has_model(model) and self.breaker.allows(now)
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "circuit": self.breaker.state,
+            "circuit_opens": self.breaker.opens,
+            "consecutive_failures": self.breaker.failures,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "models": sorted(self.models) if self.models is not None else None,
+            "loaded_models": sorted(self.loaded_models) if self.loaded_models is not None else None,
+            "probe_latency_seconds": round(self.latency, 4) if self.latency is not None else None,
+            "last_probe_age_seconds": round(time.time() - self.last_probe, 1) if self.last_probe else None,
+            "last_error": self.last_error
+        }
+
+
+class Lease:
+    """A request in flight on a backend; call fail() to count it against the breaker"""
+
+    def __init__(self, backend: OllamaBackend):
+        self.backend = backend
+        self.failed = False
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self.backend.client
+
+    def fail(self) -> None:
+        self.failed = True
+
+
+class OllamaPool:
+    """Least-outstanding-requests routing over several Ollama backends"""
+
+    def __init__(
+        self,
+        urls: List[str],
+        client_factory: Callable[[str], httpx.AsyncClient],
+        probe_interval: float = 10,
+        probe_timeout: float = 10,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30
+    ):
+        if not urls:
+            raise ValueError("At least one Ollama backend URL is required")
+        self.client_factory = client_factory
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.backends = [OllamaBackend(url, CircuitBreaker(failure_threshold, reset_timeout)) for url in urls]
+        self._prober: Optional[asyncio.Task] = None
+        self._snapshot = {"checked_at": None, "age_seconds": None, "stale": True, "connected": False}
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def client_for(self, backend: OllamaBackend) -> httpx.AsyncClient:
+        if backend.client is None or backend.client.is_closed:
+            backend.client = self.client_factory(backend.url)
+        return backend.client
+
+    def pick(self, model: Optional[str] = None) -> OllamaBackend:
+        """Routable backend with the fewest outstanding requests (least recently picked on ties)"""
+        now = time.time()
+        candidates = [backend for backend in self.backends if backend.routable(model, now)]
+        if not candidates:
+            raise NoBackendAvailable(model)
+        backend = min(candidates, key=lambda b: (b.outstanding, b.last_picked))
+        backend.last_picked = time.monotonic()
+        return backend
+
+    @asynccontextmanager
+    async def acquire(self, model: Optional[str] = None) -> AsyncIterator[Lease]:
+        """Reserve a backend for one request; transport errors count as failures"""
+        backend = self.pick(model)
+        self.client_for(backend)
+        backend.breaker.on_acquire()
+        backend.outstanding += 1
+        backend.requests += 1
+        lease = Lease(backend)
+        verdict = None
+        try:
+            yield lease
+            verdict = not lease.failed
+        except httpx.TransportError:
+            verdict = False
+            raise
+        except Exception:
+            verdict = False if lease.failed else None
+            raise
+        finally:
+            backend.outstanding -= 1
+            if verdict is True:
+                backend.breaker.record_success()
+            elif verdict is False:
+                backend.failures += 1
+                backend.breaker.record_failure(time.time())
+                if backend.breaker.state == "open":
+                    logger.warning(f"Circuit open for Ollama backend {backend.url}")
+            else:
+                backend.breaker.release()
+
+    async def probe(self, backend: OllamaBackend) -> bool:
+        """GET /api/tags on one backend, recording health, latency and installed models"""
+        started = time.time()
+        try:
+            response = await self.client_for(backend).get(
+                "/api/tags", timeout=httpx.Timeout(self.probe_timeout)
+            )
+            healthy = response.status_code == 200
+            if healthy:
+                backend.models = {
+                    normalize_model(model["name"])
+                    for model in response.json().get("models", [])
+                    if isinstance(model, dict) and model.get("name")
+                }
+                backend.loaded_models = await self._loaded_models(backend)
+                backend.last_error = None
+            else:
+                backend.last_error = f"HTTP {response.status_code}"
+        except Exception as e:
+            healthy = False
+            backend.last_error = str(e) or type(e).__name__
+        backend.latency = time.time() - started
+        backend.last_probe = time.time()
+        if healthy != backend.healthy:
+            log = logger.info if healthy else logger.warning
+            log(f"Ollama backend {backend.url} is {'healthy' if healthy else 'unhealthy'}"
+                f"{'' if healthy else f': {backend.last_error}'}")
+        backend.healthy = healthy
+        return healthy
+
+    async def probe_all(self) -> bool:
+        """Probe every backend concurrently; True if at least one is healthy"""
+        results = await asyncio.gather(*(self.probe(backend) for backend in self.backends))
+        self._snapshot = self._build_snapshot()
+        return any(results)
+
+    def snapshot(self) -> dict:
+        """Result of the last probe round (no I/O); checked_at is None before the first one"""
+        snapshot = dict(self._snapshot)
+        if snapshot["checked_at"] is not None:
+            snapshot["age_seconds"] = round(time.time() - snapshot["checked_at"], 1)
+            snapshot["stale"] = snapshot["age_seconds"] > 3 * self.probe_interval + self.probe_timeout
+        return snapshot
+
+    def has_model(self, model: str) -> bool:
+        """Whether some healthy backend has the model installed"""
+        return any(backend.healthy and backend.has_model(model) for backend in self.backends)
+
+    async def start(self) -> None:
+        if self._prober is None or self._prober.done():
+            self._prober = asyncio.create_task(self._probe_loop())
+            logger.info(f"Probing {len(self.backends)} Ollama backends every {self.probe_interval}s")
+
+    async def stop(self) -> None:
+        if self._prober is not None:
+            self._prober.cancel()
+            await asyncio.gather(self._prober, return_exceptions=True)
+            self._prober = None
+        for backend in self.backends:
+            if backend.client is not None:
+                await backend.client.aclose()
+                backend.client = None
+
+    def stats(self) -> dict:
+        return {
+            "probe_interval_seconds": self.probe_interval,
+            "backends": [backend.to_dict() for backend in self.backends]
+        }
+
+    async def _loaded_models(self, backend: OllamaBackend) -> Optional[Set[str]]:
+        """Models currently in memory (/api/ps), or None if the backend does not report them"""
+        try:
+            response = await backend.client.get("/api/ps", timeout=httpx.Timeout(self.probe_timeout))
+            if response.status_code != 200:
+                return None
+            return {
+                normalize_model(model["name"])
+                for model in response.json().get("models", [])
+                if isinstance(model, dict) and model.get("name")
+            }
+        except Exception:
+            return None
+
+    def _build_snapshot(self) -> dict:
+        healthy = [backend for backend in self.backends if backend.healthy]
+        latencies = [backend.latency for backend in healthy if backend.latency is not None]
+        loaded = set()
+        for backend in healthy:
+            loaded |= backend.loaded_models or set()
+        return {
+            "checked_at": time.time(),
+            "age_seconds": 0.0,
+            "stale": False,
+            "connected": bool(healthy),
+            "healthy_backends": len(healthy),
+            "total_backends": len(self.backends),
+            "probe_latency_seconds": round(min(latencies), 4) if latencies else None,
+            "loaded_models": sorted(loaded)
+        }
+
+    async def _probe_loop(self) -> None:
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error(f"Ollama probe loop error: {e}")
+            await asyncio.sleep(self.probe_interval)
@@ -0,0 +1,196 @@
+"""
+Dominant color palette extraction
+Vectorized weighted k-means over a 5-bit color histogram of a thumbnail,
+plus WCAG contrast-checked text/background pairs
+"""
+
+import io
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image
+
+THUMBNAIL_SIZE = 256
+# Pixels more transparent than this are ignored
+ALPHA_THRESHOLD = 128
+KMEANS_ITERATIONS = 12
+# Clusters covering less than this share of the image are dropped
+MIN_COLOR_WEIGHT = 0.01
+# Palette colors closer than this (RGB distance) are merged across images
+MERGE_DISTANCE = 16
+# WCAG 2.x minimum contrast for normal text (AA)
+MIN_TEXT_CONTRAST = 4.5
+
+BLACK = np.array([0, 0, 0], dtype=np.float64)
+WHITE = np.array([255, 255, 255], dtype=np.float64)
+
+
+def load_pixels(image_data: bytes, size: int = THUMBNAIL_SIZE) -> np.ndarray:
+    """Decode an image to an (N, 3) array of opaque RGB pixels"""
+    img = Image.open(io.BytesIO(image_data))
+    # JPEG can decode straight at reduced scale
+    img.draft("RGB", (size, size))
+    img.thumbnail((size, size))
+
+    if img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = np.asarray(img.convert("RGBA")).reshape(-1, 4)
+        return rgba[rgba[:, 3] >= ALPHA_THRESHOLD, :3]
+
+    return np.asarray(img.convert("RGB")).reshape(-1, 3)
+
+
+def relative_luminance(rgb: np.ndarray) -> np.ndarray:
+    """WCAG relative luminance for an (..., 3) array of 0-255 colors"""
+    channel = rgb / 255.0
+    linear = np.where(channel <= 0.03928, channel / 12.92, ((channel + 0.055) / 1.055) ** 2.4)
+    return linear @ np.array([0.2126, 0.7152, 0.0722])
+
+
+def contrast_ratio(lum_a: np.ndarray, lum_b: np.ndarray) -> np.ndarray:
+    lighter = np.maximum(lum_a, lum_b)
+    darker = np.minimum(lum_a, lum_b)
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+def to_hex(rgb) -> str:
+    r, g, b = (int(round(c)) for c in rgb)
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def weighted_kmeans(points: np.ndarray, weights: np.ndarray, k: int) -> tuple:
+    """Weighted k-means with deterministic farthest-point initialization"""
+    k = min(k, len(points))
+    centers = [points[np.argmax(weights)]]
+    distances = ((points - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        # Favor heavy colors that are far from the current centers
+        centers.append(points[np.argmax(distances * weights)])
+        distances = np.minimum(distances, ((points - centers[-1]) ** 2).sum(axis=1))
+    centers = np.array(centers, dtype=np.float64)
+
+    for _ in range(KMEANS_ITERATIONS):
+        labels = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+        totals = np.bincount(labels, weights=weights, minlength=k)
+        new_centers = np.stack([
+            np.bincount(labels, weights=weights * points[:, channel], minlength=k)
+            for channel in range(3)
+        ], axis=1)
+        nonempty = totals > 0
+        new_centers[nonempty] /= totals[nonempty, None]
+        new_centers[~nonempty] = centers[~nonempty]
+        if np.allclose(new_centers, centers, atol=0.5):
+            centers = new_centers
+            break
+        centers = new_centers
+
+    return centers, totals
+
+
+def extract_palette(image_data: bytes, colors: int = 5) -> dict:
+    """Top dominant colors with weights and readable text/background pairs"""
+    pixels = load_pixels(image_data)
+    if len(pixels) == 0:
+        return {"colors": [], "primary_color": None, "pairs": [], "is_dark": False}
+
+    # Collapse to a 5-bit-per-channel histogram so k-means runs over unique bins,
+    # using each bin's mean color rather than its center
+    bins = (pixels.astype(np.uint32) >> 3)
+    bin_index = (bins[:, 0] << 10) | (bins[:, 1] << 5) | bins[:, 2]
+    counts = np.bincount(bin_index, minlength=1 << 15)
+    occupied = np.nonzero(counts)[0]
+    weights = counts[occupied].astype(np.float64)
+    points = np.stack([
+        np.bincount(bin_index, weights=pixels[:, channel], minlength=1 << 15)[occupied]
+        for channel in range(3)
+    ], axis=1) / weights[:, None]
+
+    centers, totals = weighted_kmeans(points, weights, colors)
+    order = np.argsort(-totals)
+    centers, totals = centers[order], totals[order]
+    # Drop specks (e.g. JPEG edge artifacts) unless nothing else is left
+    share = totals / totals.sum()
+    keep = share >= MIN_COLOR_WEIGHT
+    if not keep.any():
+        keep = share > 0
+    centers, totals = centers[keep], totals[keep] / totals[keep].sum()
+
+    palette = [
+        {"hex": to_hex(center), "rgb": [int(round(c)) for c in center], "weight": round(float(weight), 4)}
+        for center, weight in zip(centers, totals)
+    ]
+
+    luminance = relative_luminance(centers)
+    mean_luminance = float((luminance * totals).sum())
+    return {
+        "colors": palette,
+        "primary_color": palette[0]["hex"],
+        "pairs": contrast_pairs(centers, luminance),
+        "is_dark": mean_luminance < 0.18
+    }
+
+
+def contrast_pairs(centers: np.ndarray, luminance: Optional[np.ndarray] = None) -> List[dict]:
+    """For each palette color as background, the most readable text color"""
+    if luminance is None:
+        luminance = relative_luminance(centers)
+    candidates = np.vstack([centers, BLACK, WHITE])
+    candidate_lum = np.concatenate([luminance, relative_luminance(np.vstack([BLACK, WHITE]))])
+
+    ratios = contrast_ratio(luminance[:, None], candidate_lum[None, :])
+    pairs = []
+    for i, row in enumerate(ratios):
+        best = int(row.argmax())
+        ratio = float(row[best])
+        if ratio < MIN_TEXT_CONTRAST:
+            continue
+        pairs.append({
+            "background": to_hex(centers[i]),
+            "text": to_hex(candidates[best]),
+            "contrast": round(ratio, 2),
+            "wcag": "AAA" if ratio >= 7 else "AA"
+        })
+    return pairs
+
+
+def merge_palettes(palettes: List[dict], weights: Optional[List[float]] = None, colors: int = 5) -> dict:
+    """Combine several extract_palette results into one weighted palette"""
+    weights = weights or [1.0] * len(palettes)
+    rgb, share = [], []
+    for palette, weight in zip(palettes, weights):
+        for color in palette.get("colors", []):
+            rgb.append(color["rgb"])
+            share.append(color["weight"] * weight)
+    if not rgb:
+        return {"colors": [], "primary_color": None, "pairs": [], "is_dark": False}
+
+    points = np.array(rgb, dtype=np.float64)
+    point_weights = np.array(share, dtype=np.float64)
+    centers, totals = weighted_kmeans(points, point_weights, colors)
+    order = np.argsort(-totals)
+    keep = totals[order] > 0
+    centers, totals = centers[order][keep], totals[order][keep] / totals.sum()
+
+    # Fold near-identical colors from different images into the heavier one
+    merged_centers, merged_totals = [], []
+    for center, total in zip(centers, totals):
+        for i, existing in enumerate(merged_centers):
+            if ((existing - center) ** 2).sum() <= MERGE_DISTANCE ** 2:
+                merged_centers[i] = (existing * merged_totals[i] + center * total) / (merged_totals[i] + total)
+                merged_totals[i] += total
+                break
+        else:
+            merged_centers.append(center)
+            merged_totals.append(total)
+    order = np.argsort(-np.array(merged_totals))
+    centers, totals = np.array(merged_centers)[order], np.array(merged_totals)[order]
+
+    luminance = relative_luminance(centers)
+    return {
+        "colors": [
+            {"hex": to_hex(center), "rgb": [int(round(c)) for c in center], "weight": round(float(weight), 4)}
+            for center, weight in zip(centers, totals)
+        ],
+        "primary_color": to_hex(centers[0]),
+        "pairs": contrast_pairs(centers, luminance),
+        "is_dark": float((luminance * totals).sum()) < 0.18
+    }
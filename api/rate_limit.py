@@ -0,0 +1,264 @@
+"""
+Cost-weighted rate limiting with pluggable storage
+Token buckets refilled continuously; each request takes as many tokens as it
+costs, so a five-page request with images counts more than a one-page one.
+Buckets live in process memory, in a SQLite file shared by the workers of one
+host, or in Redis shared by every replica
+"""
+
+import asyncio
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+class RateLimited(Exception):
+    """Raised when a bucket does not hold enough tokens for the request"""
+
+    def __init__(self, scope: str, limit: "Limit", retry_after: float):
+        super().__init__(f"Rate limit exceeded for {scope} ({limit})")
+        self.scope = scope
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+class Limit:
+    """amount tokens per period seconds, with bursts up to capacity"""
+
+    def __init__(self, amount: float, period: float, burst: Optional[float] = None):
+        if amount <= 0 or period <= 0:
+            raise ValueError("Rate limit amount and period must be positive")
+        self.amount = amount
+        self.period = period
+        self.capacity = burst if burst is not None else amount
+        self.rate = amount / period
+
+    def __str__(self) -> str:
+        name = next((name for name, seconds in PERIODS.items() if seconds == self.period), f"{self.period:g}s")
+        return f"{self.amount:g}/{name}"
+
+
+def parse_limit(text: str) -> Limit:
+    """Parse "10", "10/minute", "10 per minute" or "1000/day" (per minute when no period is given)"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*(?:(?:/|per)\s*(second|minute|hour|day)s?)?\s*", text.lower())
+    if not match:
+        raise ValueError(f"Invalid rate limit: {text!r}")
+    return Limit(float(match.group(1)), PERIODS[match.group(2) or "minute"])
+
+
+class Decision:
+    """Outcome of taking tokens from a bucket"""
+
+    def __init__(self, allowed: bool, remaining: float, retry_after: float = 0.0):
+        self.allowed = allowed
+        self.remaining = remaining
+        self.retry_after = retry_after
+
+
+def take_tokens(tokens: Optional[float], updated: float, now: float, cost: float, limit: Limit) -> Tuple[float, Decision]:
+    """Refill a bucket up to now and take cost tokens from it; negative costs refund"""
+    tokens = limit.capacity if tokens is None else min(limit.capacity, tokens + max(0.0, now - updated) * limit.rate)
+    # A request costing more than the burst size still passes from a full bucket
+    cost = min(cost, limit.capacity)
+    if cost <= tokens:
+        tokens = min(limit.capacity, tokens - cost)
+        return tokens, Decision(True, tokens)
+    return tokens, Decision(False, tokens, (cost - tokens) / limit.rate)
+
+
+class MemoryBackend:
+    """Per-process buckets; each worker enforces the limit on its own"""
+
+    name = "memory"
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, cost: float, limit: Limit) -> Decision:
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (None, now))
+            tokens, decision = take_tokens(tokens, updated, now, cost, limit)
+            self._buckets[key] = (tokens, now)
+            # Evicted buckets simply start full again
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return decision
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteBackend:
+    """Buckets in a SQLite file, shared by every worker process on one host"""
+
+    name = "sqlite"
+    # Drop rows that have refilled completely every this many takes
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._takes = 0
+        self._longest_refill = 0.0
+
+    async def take(self, key: str, cost: float, limit: Limit) -> Decision:
+        return await asyncio.to_thread(self._take, key, cost, limit)
+
+    def _take(self, key: str, cost: float, limit: Limit) -> Decision:
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front so read-modify-write is atomic across processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens, decision = take_tokens(row[0] if row else None, row[1] if row else now, now, cost, limit)
+                self._conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now))
+                self._takes += 1
+                self._longest_refill = max(self._longest_refill, limit.capacity / limit.rate)
+                if self._takes % self.PRUNE_EVERY == 0:
+                    self._conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self._longest_refill,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return decision
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Same algorithm as take_tokens, run atomically on the Redis server with its own clock
+REDIS_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = math.min(tonumber(ARGV[3]), capacity)
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1])
+if tokens == nil then
+  tokens = capacity
+else
+  tokens = math.min(capacity, tokens + math.max(0, now - tonumber(state[2])) * rate)
+end
+local allowed = 0
+local retry_after = 0
+if cost <= tokens then
+  tokens = math.min(capacity, tokens - cost)
+  allowed = 1
+else
+  retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+class RedisBackend:
+    """Buckets in Redis, shared by every replica (requires the redis package)"""
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the redis package (pip install redis)") from e
+        self.url = url
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(REDIS_TAKE_SCRIPT)
+
+    async def take(self, key: str, cost: float, limit: Limit) -> Decision:
+        allowed, tokens, retry_after = await self._script(keys=[key], args=[limit.capacity, limit.rate, cost])
+        return Decision(bool(allowed), float(tokens), float(retry_after))
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def create_backend(name: str, storage_url: str = ""):
+    """Backend by name: memory, sqlite (storage_url is the file) or redis (storage_url is the server)"""
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        return SQLiteBackend(storage_url or "/tmp/webgen-ratelimit.sqlite3")
+    if name == "redis":
+        return RedisBackend(storage_url or "redis://redis:6379/0")
+    raise ValueError(f"Unknown rate limit backend: {name}")
+
+
+class RateLimiter:
+    """Takes a request's cost from several buckets at once (e.g. per client and per API key)"""
+
+    def __init__(self, backend, prefix: str = "webgen:ratelimit:"):
+        self.backend = backend
+        self.prefix = prefix
+        self.allowed: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+        self.cost: Dict[str, float] = {}
+        self.errors = 0
+
+    async def hit(self, checks: List[Tuple[str, str, Limit]], cost: float) -> Dict[str, Decision]:
+        """Take cost from each (scope, key, limit) bucket, or raise RateLimited and take nothing
+
+        Storage errors let the request through: an outage of the shared store
+        should not take the API down with it.
+        """
+        taken = []
+        decisions = {}
+        try:
+            for scope, key, limit in checks:
+                decision = await self.backend.take(f"{self.prefix}{scope}:{key}", cost, limit)
+                if not decision.allowed:
+                    # Give back what the earlier buckets already took
+                    for taken_scope, taken_key, taken_limit in taken:
+                        await self.backend.take(f"{self.prefix}{taken_scope}:{taken_key}", -cost, taken_limit)
+                    self.rejected[scope] = self.rejected.get(scope, 0) + 1
+                    raise RateLimited(scope, limit, decision.retry_after)
+                taken.append((scope, key, limit))
+                decisions[scope] = decision
+        except RateLimited:
+            raise
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Rate limit backend {self.backend.name} failed, allowing request: {e}")
+            return decisions
+        for scope, _, _ in checks:
+            self.allowed[scope] = self.allowed.get(scope, 0) + 1
+            self.cost[scope] = self.cost.get(scope, 0.0) + cost
+        return decisions
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "cost": {scope: round(cost, 2) for scope, cost in self.cost.items()},
+            "backend_errors": self.errors
+        }
+
+
+def retry_after_header(retry_after: float) -> str:
+    return str(max(1, math.ceil(retry_after)))
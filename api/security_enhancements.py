@@ -16,6 +16,8 @@ import httpx
 from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.responses import JSONResponse
 
+from content_scan import default_scanner, sanitize_html
+
 # Initialize logger
 logger = logging.getLogger(__name__)
 
@@ -148,21 +150,8 @@ def sanitize_filename(filename: str) -> str:
 
 
 def sanitize_html_output(html: str) -> str:
-    """Basic sanitization of generated HTML"""
-    # Remove potentially dangerous elements
-    dangerous_patterns = [
-        r'<script[^>]*>.*?</script>',
-        r'<iframe[^>]*>.*?</iframe>',
-        r'<embed[^>]*>',
-        r'<object[^>]*>.*?</object>',
-        r'javascript:',
-        r'on\w+\s*=',  # onclick, onerror, etc.
-    ]
-    
-    for pattern in dangerous_patterns:
-        html = re.sub(pattern, '', html, flags=re.IGNORECASE | re.DOTALL)
-    
-    return html
+    """Basic sanitization of generated HTML (script/iframe/object/embed, javascript:, on* handlers)"""
+    return sanitize_html(html)
 
 
 # ============================================================================
@@ -170,27 +159,11 @@ def sanitize_html_output(html: str) -> str:
 # ============================================================================
 
 def validate_generated_content(files: dict) -> bool:
-    """Validate generated content for security issues"""
-    dangerous_keywords = [
-        'eval(',
-        'exec(',
-        'Function(',
-        '__import__',
-        'subprocess',
-        '<script>alert',
-        'document.cookie',
-        'window.location',
-    ]
-    
-    for filename, content in files.items():
-        content_lower = content.lower()
-        
-        for keyword in dangerous_keywords:
-            if keyword.lower() in content_lower:
-                logger.warning(f"Dangerous keyword '{keyword}' found in {filename}")
-                return False
-    
-    return True
+    """Validate generated content for security issues (logs every finding)"""
+    findings = default_scanner.scan_files(files)
+    for finding in findings:
+        logger.warning(f"Dangerous keyword '{finding.rule}' found in {finding.filename} at offset {finding.offset}")
+    return not findings
 
 
 # ============================================================================
@@ -198,49 +171,9 @@ def validate_generated_content(files: dict) -> bool:
 # ============================================================================
 
 """
-For production with multiple instances, use Redis-backed rate limiting:
-
-from redis import Redis
-from slowapi.util import get_remote_address
-
-redis_client = Redis(host='redis', port=6379, decode_responses=True)
-
-def redis_rate_limit(key: str, limit: int, window: int) -> bool:
-    '''
-    Check rate limit using Redis
-    
-    Args:
-        key: Unique identifier (e.g., IP address)
-        limit: Maximum requests allowed
-        window: Time window in seconds
-    
-    Returns:
-        True if within limit, False otherwise
-    '''
-    current = redis_client.get(key)
-    
-    if current is None:
-        redis_client.setex(key, window, 1)
-        return True
-    
-    if int(current) < limit:
-        redis_client.incr(key)
-        return True
-    
-    return False
-
-@app.middleware("http")
-async def custom_rate_limit(request: Request, call_next):
-    client_ip = get_remote_address(request)
-    key = f"rate_limit:{client_ip}"
-    
-    if not redis_rate_limit(key, limit=10, window=60):
-        return JSONResponse(
-            status_code=429,
-            content={"detail": "Rate limit exceeded"}
-        )
-    
-    return await call_next(request)
+Implemented in rate_limit.py and used by main.py: cost-weighted token buckets
+with memory, SQLite or Redis storage (RATE_LIMIT_BACKEND), plus per-API-key
+quotas (API_KEYS, API_KEY_QUOTA, API_KEY_QUOTAS).
 """
 
 
@@ -303,7 +236,6 @@ async def global_exception_handler(request: Request, exc: Exception):
 Add to your generate endpoint:
 
 @app.post("/generate", dependencies=[Depends(verify_api_key)])
-@limiter.limit(RATE_LIMIT)
 async def generate_website(...):
     # Sanitize inputs
     company_name = sanitize_input(company_name)
@@ -0,0 +1,114 @@
+"""
+Request coalescing (single-flight) for identical in-flight work
+Concurrent callers with the same key share one execution; the shared task is
+only cancelled once every caller waiting on it has gone away. A shared call may
+also publish partial results, which every caller receives in order, including
+the ones published before it joined
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def coalesce_key(*parts: Any) -> str:
+    """Canonical hash of JSON-serializable key parts"""
+    canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.items: List[Any] = []
+        # Replaced on every publish, so a waiter never misses the wake-up for the item it waits for
+        self.changed = asyncio.Event()
+
+    def publish(self, item: Any) -> None:
+        self.items.append(item)
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[str, _Flight] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run func for key, or wait for the identical call already running"""
+        return await self.stream(key, lambda publish: func())
+
+    async def stream(
+        self,
+        key: str,
+        func: Callable[[Callable[[Any], None]], Awaitable[Any]],
+        on_item: Optional[Callable[[Any], Awaitable[None]]] = None
+    ) -> Any:
+        """Like do, with func(publish) publishing partial results that are passed to on_item"""
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None or flight.task.done():
+            flight = _Flight()
+            flight.task = asyncio.create_task(func(flight.publish))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, key=key, flight=flight: self._finished(key, flight))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"Coalesced {self.name} request onto in-flight call {key[:12]}")
+
+        flight.waiters += 1
+        try:
+            if on_item is not None:
+                delivered = 0
+                while True:
+                    changed = flight.changed
+                    while delivered < len(flight.items):
+                        await on_item(flight.items[delivered])
+                        delivered += 1
+                    if flight.task.done():
+                        break
+                    if changed is flight.changed:
+                        await changed.wait()
+            # Shield so one waiter disconnecting does not cancel the shared call
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)
+                self.cancelled += 1
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "in_flight": self.in_flight
+        }
+
+    def _finished(self, key: str, flight: _Flight) -> None:
+        # Wake callers waiting for items so they see the outcome
+        flight.changed.set()
+        self._forget(key, flight)
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -0,0 +1,158 @@
+"""
+Local edits of a generated site
+Reads the navigation and CSS class vocabulary back out of stored pages, and
+adds or removes a page's links in the navigation and footer of the other
+pages without calling the model. Works on whatever markup the model wrote:
+links are found inside <nav> and <footer>, and new ones are cloned from an
+existing link so they keep the site's own classes and structure. Links to a
+removed page elsewhere in the body are unwrapped to their text
+"""
+
+import html
+import re
+from typing import Callable, List
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_DECLARATIONS = re.compile(r"\{[^{}]*\}")
+_CLASS_SELECTOR = re.compile(r"\.(-?[A-Za-z_][\w-]*)")
+_BLOCKS = {
+    tag: re.compile(rf"(<{tag}\b[^>]*>)(.*?)(</{tag}>)", re.DOTALL | re.IGNORECASE)
+    for tag in ("nav", "footer")
+}
+_LIST_ITEM = re.compile(r"<li\b[^>]*>.*?</li>", re.DOTALL | re.IGNORECASE)
+_LINK = re.compile(r"<a\b([^>]*)>(.*?)</a>", re.DOTALL | re.IGNORECASE)
+_HREF = re.compile(r"""(\bhref\s*=\s*)(["'])(.*?)\2""", re.IGNORECASE)
+_TAG = re.compile(r"<[^>]+>")
+# Marks of the current page that a cloned link must not keep
+_ACTIVE_CLASS = re.compile(r"""(\bclass\s*=\s*["'][^"']*?)\s*(?<![\w-])active(?![\w-])""", re.IGNORECASE)
+_ARIA_CURRENT = re.compile(r"""\s+aria-current\s*=\s*["'][^"']*["']""", re.IGNORECASE)
+_PAGE_LINK = re.compile(r"[\w.-]+\.html")
+
+
+def is_page_link(href: str) -> bool:
+    """Whether href points to another page of the site (e.g. about.html)"""
+    return bool(_PAGE_LINK.fullmatch(href))
+
+
+def links_to(href: str, page_file: str) -> bool:
+    """Whether href points to page_file, also with a fragment or query (about.html#team)"""
+    href = href.strip()
+    href = href[2:] if href.startswith("./") else href
+    return re.split(r"[#?]", href, 1)[0] == page_file
+
+
+def mentions_page(text: str, page_file: str) -> bool:
+    """Whether any file text (HTML, CSS or JS) still refers to page_file by name"""
+    return re.search(rf"(?<![\w.-]){re.escape(page_file)}(?![\w-])", text) is not None
+
+
+def extract_css_classes(css: str) -> List[str]:
+    """Class names used in the selectors of a stylesheet, in order of appearance"""
+    selectors = _DECLARATIONS.sub(" ", _COMMENT.sub("", css))
+    return list(dict.fromkeys(match.group(1) for match in _CLASS_SELECTOR.finditer(selectors)))
+
+
+def _link_href(link: str) -> str:
+    match = _HREF.search(link)
+    return match.group(3) if match else ""
+
+
+def _page_links(block: str) -> List[str]:
+    """List items holding page links, or bare page links when the block has no list"""
+    items = [item for item in _LIST_ITEM.findall(block) if is_page_link(_link_href(item))]
+    if items:
+        return items
+    return [link.group(0) for link in _LINK.finditer(block) if is_page_link(_link_href(link.group(0)))]
+
+
+def extract_nav(page: str) -> List[dict]:
+    """Navigation entries ({"label", "href"}) of a page's <nav>, in order"""
+    block = _BLOCKS["nav"].search(page)
+    if not block:
+        return []
+    nav = []
+    for item in _page_links(block.group(2)):
+        href = _link_href(item)
+        link = _LINK.search(item)
+        label = html.unescape(_TAG.sub("", link.group(2))).strip() if link else ""
+        if label and all(entry["href"] != href for entry in nav):
+            nav.append({"label": label, "href": href})
+    return nav
+
+
+def _patch_blocks(page: str, patch: Callable[[str], str]) -> str:
+    for pattern in _BLOCKS.values():
+        page = pattern.sub(lambda match: match.group(1) + patch(match.group(2)) + match.group(3), page)
+    return page
+
+
+def _spans(block: str, items: List[str]) -> List[tuple]:
+    """(start, end) of each item in block, in order"""
+    spans = []
+    position = 0
+    for item in items:
+        start = block.index(item, position)
+        position = start + len(item)
+        spans.append((start, position))
+    return spans
+
+
+def _separator(block: str, spans: List[tuple], index: int) -> str:
+    """Text between item index - 1 and item index when it is only whitespace or a plain separator"""
+    if index <= 0 or index >= len(spans):
+        return ""
+    gap = block[spans[index - 1][1]:spans[index][0]]
+    return gap if "<" not in gap else ""
+
+
+def add_nav_link(page: str, href: str, label: str) -> str:
+    """Append a link to href after the last page link of the page's <nav> and <footer>"""
+
+    def patch(block: str) -> str:
+        items = _page_links(block)
+        if not items or any(_link_href(item) == href for item in items):
+            return block
+        spans = _spans(block, items)
+        clone = _HREF.sub(lambda match: f"{match.group(1)}{match.group(2)}{href}{match.group(2)}", items[-1], count=1)
+        clone = _LINK.sub(lambda match: f"<a{match.group(1)}>{html.escape(label)}</a>", clone, count=1)
+        clone = _ARIA_CURRENT.sub("", _ACTIVE_CLASS.sub(r"\1", clone))
+        # Same spacing (indentation or " | ") as between the existing links
+        separator = _separator(block, spans, len(spans) - 1)
+        if not separator and len(spans) == 1:
+            line = block[:spans[0][0]].rsplit("\n", 1)
+            separator = f"\n{line[1]}" if len(line) == 2 and not line[1].strip() else ""
+        end = spans[-1][1]
+        return block[:end] + separator + clone + block[end:]
+
+    return _patch_blocks(page, patch)
+
+
+def unlink_page(page: str, href: str) -> str:
+    """Replace every remaining link to href (e.g. a "Learn more" button in <main>) with its content"""
+    return _LINK.sub(lambda match: match.group(2) if links_to(_link_href(match.group(0)), href) else match.group(0), page)
+
+
+def remove_nav_link(page: str, href: str) -> str:
+    """Remove links to href (with their list items) from the page's <nav> and <footer>"""
+
+    def patch(block: str) -> str:
+        items = _page_links(block)
+        spans = _spans(block, items)
+        # Right to left, so earlier spans stay valid
+        for index in reversed(range(len(items))):
+            if _link_href(items[index]) != href:
+                continue
+            start, end = spans[index]
+            if _separator(block, spans, index):
+                start = spans[index - 1][1]
+            elif _separator(block, spans, index + 1):
+                end = spans[index + 1][0]
+            else:
+                # Take the line's indentation along with the item
+                line_start = block.rfind("\n", 0, start)
+                if line_start != -1 and not block[line_start + 1:start].strip():
+                    start = line_start
+            block = block[:start] + block[end:]
+        return block
+
+    return _patch_blocks(page, patch)
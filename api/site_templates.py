@@ -0,0 +1,392 @@
+"""
+Local templates for the deterministic parts of a generated site
+Theme stylesheet, mobile-menu script and the page shell (head, navigation,
+footer) are rendered from precompiled templates, so the code model only has to
+write each page's main content
+"""
+
+import html
+import re
+import time
+from functools import lru_cache
+from string import Template
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from palette import relative_luminance
+
+# Class vocabulary styled by STYLES_TEMPLATE; page prompts must stick to it
+CSS_CLASSES = [
+    "container", "site-header", "navbar", "nav-brand", "nav-menu", "nav-link",
+    "nav-toggle", "active", "hero", "hero-title", "hero-subtitle", "btn",
+    "btn-primary", "btn-secondary", "section", "section-title", "grid", "card",
+    "card-title", "card-text", "feature-icon", "contact-form", "form-group",
+    "form-error", "site-footer", "footer-links"
+]
+
+DEFAULT_FONTS = "system-ui, -apple-system, 'Segoe UI', Roboto, sans-serif"
+
+HEX_COLOR = re.compile(r"#[0-9a-fA-F]{6}")
+
+DARK_BACKGROUND = "#111827"
+DARK_SURFACE = "#1F2937"
+LIGHT_SURFACE = "#FFFFFF"
+DARK_TEXT = "#1F2937"
+LIGHT_TEXT = "#F9FAFB"
+
+STYLES_TEMPLATE = Template("""/* $theme theme */
+:root {
+  --color-primary: $primary;
+  --color-secondary: $secondary;
+  --color-accent: $accent;
+  --color-bg: $bg;
+  --color-surface: $surface;
+  --color-text: $text;
+  --color-muted: $muted;
+  --font-body: $fonts;
+  --radius: 0.75rem;
+  --shadow: 0 4px 14px rgba(0, 0, 0, $shadow_alpha);
+  --transition: 0.25s ease;
+}
+
+*, *::before, *::after { margin: 0; padding: 0; box-sizing: border-box; }
+
+html { scroll-behavior: smooth; }
+
+body {
+  font-family: var(--font-body);
+  background: var(--color-bg);
+  color: var(--color-text);
+  line-height: 1.6;
+}
+
+img { max-width: 100%; display: block; }
+
+a { color: var(--color-primary); }
+
+.container { width: 100%; max-width: 1200px; margin: 0 auto; padding: 0 1.25rem; }
+
+.site-header {
+  position: relative;
+  z-index: 10;
+  background: var(--color-surface);
+  box-shadow: var(--shadow);
+}
+
+.navbar { display: flex; flex-wrap: wrap; align-items: center; justify-content: space-between; min-height: 4rem; }
+
+.nav-brand { font-size: 1.25rem; font-weight: 700; color: var(--color-primary); text-decoration: none; }
+
+.nav-toggle {
+  background: none;
+  border: 2px solid var(--color-primary);
+  border-radius: 0.5rem;
+  color: var(--color-primary);
+  font-size: 1.25rem;
+  padding: 0.25rem 0.75rem;
+  cursor: pointer;
+}
+
+.nav-menu { display: none; list-style: none; width: 100%; padding: 0.5rem 0 1rem; }
+
+.nav-menu.open { display: block; }
+
+.nav-link {
+  display: block;
+  padding: 0.5rem 0.75rem;
+  border-radius: 0.5rem;
+  color: var(--color-text);
+  text-decoration: none;
+  transition: background var(--transition), color var(--transition);
+}
+
+.nav-link:hover, .nav-link:focus-visible, .nav-link.active { color: var(--color-primary); background: var(--color-bg); }
+
+.nav-link.active { font-weight: 600; }
+
+.hero {
+  padding: 5rem 0;
+  text-align: center;
+  color: #FFFFFF;
+  background: linear-gradient(135deg, var(--color-primary), var(--color-secondary));
+}
+
+.hero-title { font-size: clamp(2rem, 6vw, 3.5rem); line-height: 1.15; margin-bottom: 1rem; }
+
+.hero-subtitle { font-size: 1.15rem; max-width: 40rem; margin: 0 auto 2rem; opacity: 0.9; }
+
+.btn {
+  display: inline-block;
+  padding: 0.75rem 1.5rem;
+  border: 2px solid transparent;
+  border-radius: 999px;
+  font: inherit;
+  font-weight: 600;
+  text-decoration: none;
+  cursor: pointer;
+  transition: transform var(--transition), box-shadow var(--transition), background var(--transition);
+}
+
+.btn:hover, .btn:focus-visible { transform: translateY(-2px); box-shadow: var(--shadow); }
+
+.btn-primary { background: var(--color-accent); color: $accent_text; }
+
+.btn-secondary { background: transparent; border-color: currentColor; color: inherit; }
+
+.section { padding: 4rem 0; }
+
+.section:nth-of-type(even) { background: var(--color-surface); }
+
+.section-title { font-size: 2rem; text-align: center; margin-bottom: 2rem; color: var(--color-primary); }
+
+.grid { display: grid; grid-template-columns: 1fr; gap: 1.5rem; }
+
+.card {
+  background: var(--color-surface);
+  border-radius: var(--radius);
+  box-shadow: var(--shadow);
+  padding: 1.75rem;
+  opacity: 0;
+  transform: translateY(16px);
+  transition: opacity 0.5s ease, transform 0.5s ease;
+}
+
+.card.visible { opacity: 1; transform: none; }
+
+.card-title { font-size: 1.25rem; margin-bottom: 0.5rem; }
+
+.card-text { color: var(--color-muted); }
+
+.feature-icon { font-size: 2rem; margin-bottom: 1rem; color: var(--color-accent); }
+
+.contact-form { display: grid; gap: 1rem; max-width: 36rem; margin: 0 auto; }
+
+.form-group { display: grid; gap: 0.35rem; }
+
+.form-group input, .form-group textarea, .form-group select {
+  width: 100%;
+  padding: 0.75rem;
+  border: 1px solid var(--color-muted);
+  border-radius: 0.5rem;
+  background: var(--color-bg);
+  color: var(--color-text);
+  font: inherit;
+}
+
+.form-group input:focus, .form-group textarea:focus, .form-group select:focus { outline: 2px solid var(--color-accent); border-color: transparent; }
+
+.form-error { min-height: 1.25rem; color: #DC2626; font-size: 0.875rem; }
+
+.site-footer { padding: 2.5rem 0; margin-top: 2rem; background: var(--color-surface); color: var(--color-muted); }
+
+.site-footer .container { display: flex; flex-direction: column; gap: 1rem; align-items: center; text-align: center; }
+
+.footer-links { display: flex; flex-wrap: wrap; gap: 1rem; list-style: none; justify-content: center; }
+
+.footer-links a { color: inherit; text-decoration: none; }
+
+.footer-links a:hover { color: var(--color-primary); }
+
+@media (min-width: 768px) {
+  .nav-toggle { display: none; }
+  .nav-menu { display: flex; gap: 0.25rem; width: auto; padding: 0; }
+  .site-header { position: sticky; top: 0; }
+  .grid { grid-template-columns: repeat(2, 1fr); }
+  .site-footer .container { flex-direction: row; justify-content: space-between; text-align: left; }
+}
+
+@media (min-width: 1024px) {
+  .grid { grid-template-columns: repeat(3, 1fr); }
+  .hero { padding: 7rem 0; }
+}
+
+@media (min-width: 1280px) {
+  .container { padding: 0 2rem; }
+}
+
+@media (prefers-reduced-motion: reduce) {
+  html { scroll-behavior: auto; }
+  .card, .btn, .nav-link { transition: none; }
+  .card { opacity: 1; transform: none; }
+}
+""")
+
+SCRIPT = """// Mobile menu, smooth scrolling, form validation and card animations
+document.addEventListener('DOMContentLoaded', () => {
+  const toggle = document.querySelector('.nav-toggle');
+  const menu = document.querySelector('.nav-menu');
+  if (toggle && menu) {
+    toggle.addEventListener('click', () => {
+      const open = menu.classList.toggle('open');
+      toggle.setAttribute('aria-expanded', String(open));
+    });
+  }
+
+  document.querySelectorAll('a[href^="#"]').forEach((link) => {
+    link.addEventListener('click', (event) => {
+      const target = document.querySelector(link.getAttribute('href'));
+      if (target) {
+        event.preventDefault();
+        target.scrollIntoView({ behavior: 'smooth' });
+      }
+    });
+  });
+
+  document.querySelectorAll('.contact-form').forEach((form) => {
+    form.setAttribute('novalidate', '');
+    form.addEventListener('submit', (event) => {
+      let valid = true;
+      form.querySelectorAll('input, textarea, select').forEach((field) => {
+        const error = field.closest('.form-group')?.querySelector('.form-error');
+        const message = field.checkValidity() ? '' : field.validationMessage;
+        if (error) error.textContent = message;
+        if (message) valid = false;
+      });
+      event.preventDefault();
+      if (valid) {
+        form.reset();
+        const status = form.querySelector('.form-error');
+        if (status) status.textContent = 'Thank you! We will get back to you soon.';
+      }
+    });
+  });
+
+  const cards = document.querySelectorAll('.card');
+  if ('IntersectionObserver' in window) {
+    const observer = new IntersectionObserver((entries) => {
+      entries.forEach((entry) => {
+        if (entry.isIntersecting) {
+          entry.target.classList.add('visible');
+          observer.unobserve(entry.target);
+        }
+      });
+    }, { threshold: 0.1 });
+    cards.forEach((card) => observer.observe(card));
+  } else {
+    cards.forEach((card) => card.classList.add('visible'));
+  }
+});
+"""
+
+PAGE_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>$title | $company</title>
+  <meta name="description" content="$description">
+  <link rel="stylesheet" href="styles.css">
+  <script src="script.js" defer></script>
+</head>
+<body>
+  <header class="site-header">
+    <nav class="navbar container" aria-label="Main navigation">
+      <a class="nav-brand" href="index.html">$company</a>
+      <button class="nav-toggle" type="button" aria-expanded="false" aria-controls="nav-menu" aria-label="Toggle navigation">&#9776;</button>
+      <ul class="nav-menu" id="nav-menu">
+$nav_items
+      </ul>
+    </nav>
+  </header>
+  <main id="main">
+$body
+  </main>
+  <footer class="site-footer">
+    <div class="container">
+      <p>&copy; $year $company.$tagline</p>
+      <ul class="footer-links">
+$footer_items
+      </ul>
+    </div>
+  </footer>
+</body>
+</html>
+""")
+
+NAV_ITEM = Template('        <li><a class="nav-link$active" href="$href"$current>$label</a></li>')
+FOOTER_ITEM = Template('        <li><a href="$href">$label</a></li>')
+
+
+def is_dark(color: str) -> bool:
+    """Whether a #RRGGBB color needs light text on top of it"""
+    rgb = np.array([int(color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float64)
+    return float(relative_luminance(rgb)) < 0.18
+
+
+def first_hex_color(candidates: Iterable, default: str) -> str:
+    """First candidate that is a #RRGGBB color, else default (design hints are free-form model output)"""
+    for candidate in candidates:
+        if isinstance(candidate, str) and HEX_COLOR.fullmatch(candidate):
+            return candidate
+    return default
+
+
+@lru_cache(maxsize=64)
+def render_styles(
+    theme: str,
+    primary: str,
+    secondary: str,
+    accent: str,
+    bg: str,
+    dark_mode: bool = False,
+    fonts: str = DEFAULT_FONTS
+) -> str:
+    """Theme stylesheet covering every class in CSS_CLASSES"""
+    if dark_mode and not is_dark(bg):
+        bg = DARK_BACKGROUND
+    dark = is_dark(bg)
+    return STYLES_TEMPLATE.substitute(
+        theme=theme,
+        primary=primary,
+        secondary=secondary,
+        accent=accent,
+        bg=bg,
+        surface=DARK_SURFACE if dark else LIGHT_SURFACE,
+        text=LIGHT_TEXT if dark else DARK_TEXT,
+        muted="#9CA3AF" if dark else "#6B7280",
+        accent_text=DARK_TEXT if not is_dark(accent) else LIGHT_TEXT,
+        shadow_alpha="0.35" if dark else "0.08",
+        fonts=fonts
+    )
+
+
+def render_script() -> str:
+    """Shared script for the classes the page shell and styles use"""
+    return SCRIPT
+
+
+def render_page(
+    company_name: str,
+    title: str,
+    filename: str,
+    nav: List[dict],
+    body: str,
+    description: str = "",
+    tagline: Optional[str] = None
+) -> str:
+    """Wrap a page's main content in the shared head, navigation and footer"""
+    escape = html.escape
+    nav_items = "\n".join(
+        NAV_ITEM.substitute(
+            active=" active" if item["href"] == filename else "",
+            current=' aria-current="page"' if item["href"] == filename else "",
+            href=escape(item["href"]),
+            label=escape(item["label"])
+        )
+        for item in nav
+    )
+    footer_items = "\n".join(
+        FOOTER_ITEM.substitute(href=escape(item["href"]), label=escape(item["label"]))
+        for item in nav
+    )
+    return PAGE_TEMPLATE.substitute(
+        title=escape(title),
+        company=escape(company_name),
+        description=escape(description[:160]),
+        nav_items=nav_items,
+        body=body,
+        year=time.localtime().tm_year,
+        tagline=f" {escape(tagline)}" if tagline else "",
+        footer_items=footer_items
+    )
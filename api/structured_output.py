@@ -0,0 +1,117 @@
+"""
+Structured output for the code model
+JSON schemas passed as Ollama's "format" option, so decoding is constrained to
+a reply that parses, and a repair pass for replies that still do not (models
+or Ollama versions without schema support, or a reply cut off by num_predict):
+file values are located by their filename keys, so unescaped quotes, invalid
+escapes and an unterminated last string no longer lose the whole site
+"""
+
+import json
+import re
+from typing import Dict, Iterable, List, Optional
+
+# "name.ext": " at the start of a file value
+_FILE_KEY = re.compile(r'"([A-Za-z0-9_.-]+\.(?:html|css|js))"\s*:\s*"')
+# A valid JSON escape, or a lone backslash (e.g. "\d" in a JS regex) or quote that needs escaping
+_STRING_TOKEN = re.compile(r'\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})|\\|"')
+_ESCAPED = {"\\": "\\\\", '"': '\\"'}
+# Trailing incomplete escape sequence left by a truncated reply
+_INCOMPLETE_ESCAPE = re.compile(r'\\(u[0-9a-fA-F]{0,3})?$')
+# What may follow the last value: its closing quote, closing braces, a code fence
+_REPLY_END = re.compile(r'"\s*}?\s*}?\s*(?:```)?\s*$')
+
+
+def files_schema(filenames: Iterable[str]) -> dict:
+    """Schema for {"index.html": "...", ...} with exactly the given files"""
+    filenames = list(filenames)
+    return {
+        "type": "object",
+        "properties": {name: {"type": "string"} for name in filenames},
+        "required": filenames,
+        "additionalProperties": False
+    }
+
+
+def plan_schema(pages: Iterable[str]) -> dict:
+    """Schema for the parallel mode's site plan"""
+    pages = list(pages)
+    return {
+        "type": "object",
+        "properties": {
+            "tagline": {"type": "string"},
+            "fonts": {"type": "string"},
+            "sections": {
+                "type": "object",
+                "properties": {page: {"type": "array", "items": {"type": "string"}} for page in pages}
+            },
+            "nav_labels": {
+                "type": "object",
+                "properties": {page: {"type": "string"} for page in pages}
+            }
+        },
+        "required": ["tagline", "fonts", "sections", "nav_labels"]
+    }
+
+
+def ollama_format(mode: str, schema: dict) -> Optional[object]:
+    """Value of Ollama's "format" option for STRUCTURED_OUTPUT: schema | json | off"""
+    if mode == "schema":
+        return schema
+    if mode == "json":
+        return "json"
+    return None
+
+
+def is_valid_json(text: str) -> bool:
+    """Whether text (possibly fenced or wrapped in prose) holds a complete JSON object"""
+    start = text.find("{")
+    if start == -1:
+        return False
+    try:
+        json.JSONDecoder(strict=False).raw_decode(text, start)
+    except json.JSONDecodeError:
+        return False
+    return True
+
+
+def decode_loose_string(raw: str) -> str:
+    """Decode a JSON string body whose quotes and backslashes may not be escaped"""
+    raw = _INCOMPLETE_ESCAPE.sub("", raw)
+    raw = _STRING_TOKEN.sub(lambda m: _ESCAPED.get(m.group(), m.group()), raw)
+    return json.loads(f'"{raw}"', strict=False)
+
+
+def repair_files_json(text: str) -> Dict[str, str]:
+    """Recover {"filename": "content"} pairs from a reply that is not valid JSON
+
+    Each value runs from its key to the next filename key, or to the end of
+    the reply for the last one, so a stray quote inside the content cannot end
+    it early; a value missing its closing quote is kept as truncated.
+    """
+    keys: List[re.Match] = list(_FILE_KEY.finditer(text))
+    files = {}
+    for index, match in enumerate(keys):
+        if index + 1 < len(keys):
+            # Up to the comma and whitespace before the next key, then its closing quote
+            raw = text[match.end():keys[index + 1].start()].rstrip()
+            raw = raw[:-1].rstrip() if raw.endswith(",") else raw
+            raw = raw[:-1] if _ends_with_quote(raw) else raw
+        else:
+            raw = text[match.end():]
+            end = _REPLY_END.search(raw)
+            if end and _ends_with_quote(raw[:end.start() + 1]):
+                raw = raw[:end.start()]
+        try:
+            files[match.group(1)] = decode_loose_string(raw)
+        except json.JSONDecodeError:
+            continue
+    return files
+
+
+def _ends_with_quote(raw: str) -> bool:
+    """Whether raw ends with an unescaped quote"""
+    if not raw.endswith('"'):
+        return False
+    backslashes = len(raw) - 1 - len(raw[:-1].rstrip("\\"))
+    return backslashes % 2 == 0
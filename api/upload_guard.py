@@ -0,0 +1,190 @@
+"""
+Early rejection of multipart uploads
+An ASGI middleware that inspects multipart/form-data bodies as they arrive,
+before the form parser buffers them: it enforces the file count, per-file and
+total size and form field size limits byte by byte, sniffs image magic bytes
+from the start of each file, and aborts the request as soon as a limit is hit
+"""
+
+import logging
+from typing import Callable, Optional
+
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Bytes needed to recognise every supported format
+SNIFF_BYTES = 12
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Image format from its first bytes (JPEG, PNG, GIF or WEBP), or None"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "JPEG"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "PNG"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "GIF"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "WEBP"
+    return None
+
+
+class UploadRejected(HTTPException):
+    """A multipart body broke a limit; reason is a short label for metrics"""
+
+    def __init__(self, status_code: int, detail: str, reason: str):
+        super().__init__(status_code=status_code, detail=detail)
+        self.reason = reason
+
+
+class MultipartGuard:
+    """Feeds a multipart body through a parser only to check it; keeps a few bytes per part"""
+
+    def __init__(self, boundary: bytes, max_files: int, max_file_size: int, max_field_size: int, max_body_size: int):
+        self.max_files = max_files
+        self.max_file_size = max_file_size
+        self.max_field_size = max_field_size
+        self.max_body_size = max_body_size
+        self.received = 0
+        self.files = 0
+        # Set once the body is malformed: the form parser reports that error itself
+        self.malformed = False
+        self._header_field = b""
+        self._header_value = b""
+        self._filename: Optional[str] = None
+        self._size = 0
+        self._head = b""
+        self._sniffed = False
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end
+        })
+
+    def feed(self, chunk: bytes) -> None:
+        """Check the next piece of the body; raises UploadRejected"""
+        self.received += len(chunk)
+        if self.received > self.max_body_size:
+            raise UploadRejected(413, "Request body too large", "body_size")
+        if self.malformed:
+            return
+        try:
+            self._parser.write(chunk)
+        except MultipartParseError:
+            self.malformed = True
+
+    def _on_part_begin(self) -> None:
+        self._filename = None
+        self._size = 0
+        self._head = b""
+        self._sniffed = False
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            _, options = parse_options_header(self._header_value)
+            if b"filename" in options:
+                self._filename = options[b"filename"].decode("utf-8", "replace")
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        length = end - start
+        if self._filename is None:
+            self._size += length
+            if self._size > self.max_field_size:
+                raise UploadRejected(413, "Form field too large", "field_size")
+            return
+        if self._size == 0 and length:
+            # Counted on the first byte: browsers send empty parts for unused file inputs
+            self.files += 1
+            if self.files > self.max_files:
+                raise UploadRejected(400, f"Maximum {self.max_files} images allowed", "file_count")
+        self._size += length
+        if self._size > self.max_file_size:
+            raise UploadRejected(413, f"Image {self._filename} exceeds {self.max_file_size // (1024 * 1024)}MB", "file_size")
+        if not self._sniffed:
+            self._head += data[start:min(end, start + SNIFF_BYTES - len(self._head))]
+            if len(self._head) >= SNIFF_BYTES:
+                self._sniff()
+
+    def _on_part_end(self) -> None:
+        if self._filename is not None and self._size and not self._sniffed:
+            self._sniff()
+
+    def _sniff(self) -> None:
+        self._sniffed = True
+        if sniff_image_type(self._head) is None:
+            raise UploadRejected(415, f"{self._filename} is not a JPEG, PNG, GIF or WEBP image", "file_type")
+
+
+class UploadGuardMiddleware:
+    """Applies MultipartGuard to every multipart/form-data request"""
+
+    def __init__(
+        self,
+        app,
+        max_files: int,
+        max_file_size: int,
+        max_field_size: int = 64 * 1024,
+        max_body_size: Optional[int] = None,
+        on_reject: Optional[Callable[[str], None]] = None
+    ):
+        self.app = app
+        self.max_files = max_files
+        self.max_file_size = max_file_size
+        self.max_field_size = max_field_size
+        # Room for every file plus the text fields and multipart framing
+        self.max_body_size = max_body_size or max_files * max_file_size + 1024 * 1024
+        self.on_reject = on_reject
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.lower(): value for key, value in scope.get("headers", [])}
+        content_type, options = parse_options_header(headers.get(b"content-type", b""))
+        if content_type != b"multipart/form-data" or b"boundary" not in options:
+            await self.app(scope, receive, send)
+            return
+
+        # Declared too large: reject without reading a byte of the body
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body_size:
+            self._rejected("body_size", scope)
+            response = JSONResponse({"detail": "Request body too large"}, status_code=413, headers={"Connection": "close"})
+            await response(scope, receive, send)
+            return
+
+        guard = MultipartGuard(options[b"boundary"], self.max_files, self.max_file_size, self.max_field_size, self.max_body_size)
+
+        async def guarded_receive():
+            message = await receive()
+            if message["type"] == "http.request" and message.get("body"):
+                try:
+                    guard.feed(message["body"])
+                except UploadRejected as e:
+                    # Raised inside the form parser, so the app answers with a normal HTTP error
+                    self._rejected(e.reason, scope)
+                    raise
+            return message
+
+        await self.app(scope, guarded_receive, send)
+
+    def _rejected(self, reason: str, scope) -> None:
+        logger.warning(f"Rejected upload to {scope.get('path')}: {reason}")
+        if self.on_reject is not None:
+            self.on_reject(reason)
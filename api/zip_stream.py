@@ -0,0 +1,140 @@
+"""
+Streaming ZIP encoder
+Yields each entry's local file header and compressed data as soon as the entry
+is added, so an archive can be sent while later files are still being produced.
+Entries are complete when added, so their CRC and sizes go in the local header
+(no data descriptor, which streaming readers reject for stored entries). The
+central directory is written at the end.
+"""
+
+import struct
+import time
+import zlib
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+# General purpose flags: UTF-8 names (bit 11)
+FLAG_UTF8 = 0x0800
+
+VERSION_NEEDED = 20
+VERSION_MADE_BY = (3 << 8) | 20  # UNIX, spec 2.0
+EXTERNAL_ATTR = 0o100644 << 16  # regular file, rw-r--r--
+
+MAX_ENTRIES = 0xFFFF
+MAX_SIZE = 0xFFFFFFFF
+
+LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+END_OF_CENTRAL_DIRECTORY = struct.Struct("<IHHHHIIH")
+
+
+def dos_datetime(timestamp: float) -> Tuple[int, int]:
+    """(time, date) in MS-DOS format"""
+    t = time.localtime(timestamp)
+    year = max(t.tm_year, 1980)
+    return (
+        (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+        ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    )
+
+
+def compress_entry(data: bytes, method: int, level: int = 6) -> Tuple[bytes, int]:
+    """Compress one entry's data, returning (payload, crc32)"""
+    crc = zlib.crc32(data)
+    if method == ZIP_STORED:
+        return data, crc
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(), crc
+
+
+class ZipStreamWriter:
+    """Incremental ZIP writer; every method returns the bytes to send next"""
+
+    def __init__(self, compression: str = "deflate", level: int = 6, store_threshold: int = 0, timestamp: Optional[float] = None):
+        if compression not in ("deflate", "store", "auto"):
+            raise ValueError(f"Unknown compression: {compression}")
+        self.compression = compression
+        self.level = level
+        self.store_threshold = store_threshold
+        # Fixed modification time for every entry, so the same files always give the same bytes
+        self.timestamp = timestamp
+        self.offset = 0
+        self._entries: List[tuple] = []
+        self._names = set()
+
+    def has_entry(self, name: str) -> bool:
+        return name in self._names
+
+    def method_for(self, size: int) -> int:
+        """Compression method for an entry of the given size"""
+        if self.compression == "store":
+            return ZIP_STORED
+        if self.compression == "auto" and size < self.store_threshold:
+            return ZIP_STORED
+        return ZIP_DEFLATED
+
+    def add_compressed(self, name: str, payload: bytes, crc: int, size: int, method: int) -> bytes:
+        """Add an entry compressed elsewhere (e.g. by compress_entry in an executor)"""
+        if size > MAX_SIZE or len(payload) > MAX_SIZE or self.offset > MAX_SIZE:
+            raise ValueError("ZIP64 archives are not supported")
+        encoded_name = self._register(name)
+        dos_time, dos_date = dos_datetime(self.timestamp if self.timestamp is not None else time.time())
+        flags = FLAG_UTF8
+        self._entries.append((encoded_name, flags, method, dos_time, dos_date, crc, len(payload), size, self.offset))
+
+        header = LOCAL_HEADER.pack(
+            0x04034b50, VERSION_NEEDED, flags, method, dos_time, dos_date,
+            crc, len(payload), size, len(encoded_name), 0
+        ) + encoded_name
+        return self._emit(header + payload)
+
+    def add_file(self, name: str, data: bytes) -> bytes:
+        """Add a complete file and return its local header and data"""
+        method = self.method_for(len(data))
+        payload, crc = compress_entry(data, method, self.level)
+        return self.add_compressed(name, payload, crc, len(data), method)
+
+    def finish(self) -> bytes:
+        """Central directory and end record; call once after the last entry"""
+        directory_offset = self.offset
+        records = []
+        for encoded_name, flags, method, dos_time, dos_date, crc, compressed_size, size, header_offset in self._entries:
+            records.append(CENTRAL_HEADER.pack(
+                0x02014b50, VERSION_MADE_BY, VERSION_NEEDED, flags, method, dos_time, dos_date,
+                crc, compressed_size, size, len(encoded_name), 0, 0, 0, 0, EXTERNAL_ATTR, header_offset
+            ) + encoded_name)
+        directory = b"".join(records)
+        end = END_OF_CENTRAL_DIRECTORY.pack(
+            0x06054b50, 0, 0, len(self._entries), len(self._entries),
+            len(directory), directory_offset, 0
+        )
+        return self._emit(directory + end)
+
+    # Internal helpers
+
+    def _register(self, name: str) -> bytes:
+        if name in self._names:
+            raise ValueError(f"Duplicate ZIP entry: {name}")
+        if len(self._entries) >= MAX_ENTRIES:
+            raise ValueError("Too many ZIP entries")
+        self._names.add(name)
+        return name.encode("utf-8")
+
+    def _emit(self, data: bytes) -> bytes:
+        self.offset += len(data)
+        return data
+
+
+def iter_zip(
+    files: Iterable[Tuple[str, bytes]],
+    compression: str = "deflate",
+    store_threshold: int = 0,
+    timestamp: Optional[float] = None
+) -> Iterator[bytes]:
+    """Yield a complete archive entry by entry"""
+    writer = ZipStreamWriter(compression=compression, store_threshold=store_threshold, timestamp=timestamp)
+    for name, data in files:
+        yield writer.add_file(name, data)
+    yield writer.finish()
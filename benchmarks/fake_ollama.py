@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Fake Ollama server for offline benchmarks
+Answers /api/tags, /api/ps and /api/chat (streaming and non-streaming) with
+canned, variable-size content at a configurable latency and token rate, so the
+API can be load-tested without a GPU or a real model
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud "
+    "exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat. "
+)
+
+# Roughly four characters per token, as for English text with most tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def filler(size: int, rng: random.Random) -> str:
+    """Deterministic-looking text of about size characters"""
+    start = rng.randrange(len(LOREM))
+    text = (LOREM[start:] + LOREM * (size // len(LOREM) + 2))[:size]
+    return text
+
+
+def file_size(config: argparse.Namespace, rng: random.Random) -> int:
+    jitter = 1 + rng.uniform(-config.size_jitter, config.size_jitter)
+    return max(64, int(config.file_size * jitter))
+
+
+def html_page(title: str, size: int, rng: random.Random, fragment: bool = False) -> str:
+    body = f'<section class="section"><div class="container"><h2 class="section-title">{title}</h2><p>{filler(size, rng)}</p></div></section>'
+    if fragment:
+        return body
+    return (
+        f'<!DOCTYPE html><html lang="en"><head><meta charset="UTF-8"><title>{title}</title>'
+        f'<link rel="stylesheet" href="styles.css"></head><body><main>{body}</main>'
+        f'<script src="script.js" defer></script></body></html>'
+    )
+
+
+def site_files(prompt: str, config: argparse.Namespace, rng: random.Random) -> dict:
+    """Files named in the prompt (single mode lists them), each about file_size characters"""
+    match = re.search(r"- Files: ([^\n]+)", prompt)
+    names = [name.strip() for name in match.group(1).split(",")] if match else [
+        "index.html", "about.html", "contact.html", "styles.css", "script.js"
+    ]
+    files = {}
+    for name in names:
+        size = file_size(config, rng)
+        if name.endswith(".css"):
+            files[name] = f"/* styles */\nbody {{ margin: 0; }}\n/* {filler(size, rng)} */"
+        elif name.endswith(".js"):
+            files[name] = f"// script\nconsole.log('ready');\n// {filler(size, rng)}"
+        else:
+            files[name] = html_page(name, size, rng)
+    return files
+
+
+def reply_for(payload: dict, config: argparse.Namespace, rng: random.Random) -> str:
+    messages = payload.get("messages", [])
+    system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+    prompt = messages[-1]["content"] if messages else ""
+
+    if payload.get("model") == config.vision_model:
+        return json.dumps({"colors": ["#336699", "#F5F5F5"], "fonts": ["Inter"], "mood": "calm"})
+    if prompt.startswith("Plan a"):
+        return json.dumps({"tagline": "Benchmarks all the way down", "sections": {}, "nav_labels": {}})
+    if "valid JSON" in system:
+        return json.dumps(site_files(prompt, config, rng))
+    # Raw file content (parallel and template modes)
+    size = file_size(config, rng)
+    if "styles.css" in prompt.split("\n", 1)[0]:
+        return f"body {{ margin: 0; }}\n/* {filler(size, rng)} */"
+    if "script.js" in prompt.split("\n", 1)[0]:
+        return f"console.log('ready');\n// {filler(size, rng)}"
+    return html_page("Page", size, rng, fragment="main content" in prompt)
+
+
+def final_chunk(payload: dict, prompt_tokens: int, eval_tokens: int, prompt_seconds: float, eval_seconds: float) -> dict:
+    return {
+        "model": payload.get("model"),
+        "message": {"role": "assistant", "content": ""},
+        "done": True,
+        "total_duration": int((prompt_seconds + eval_seconds) * 1e9),
+        "load_duration": 0,
+        "prompt_eval_count": prompt_tokens,
+        "prompt_eval_duration": int(prompt_seconds * 1e9),
+        "eval_count": eval_tokens,
+        "eval_duration": int(eval_seconds * 1e9)
+    }
+
+
+def create_app(config: argparse.Namespace) -> FastAPI:
+    app = FastAPI(title="Fake Ollama")
+    rng = random.Random(config.seed)
+    models = [name.strip() for name in config.models.split(",") if name.strip()]
+    state = {"requests": 0, "in_flight": 0}
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": name} for name in models]}
+
+    @app.get("/api/ps")
+    async def ps():
+        return {"models": [{"name": name} for name in models]}
+
+    @app.get("/stats")
+    async def stats():
+        return state
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        payload = await request.json()
+        state["requests"] += 1
+        content = reply_for(payload, config, rng)
+        prompt_chars = sum(len(m.get("content", "")) for m in payload.get("messages", []))
+        prompt_tokens = max(1, prompt_chars // CHARS_PER_TOKEN)
+        eval_tokens = max(1, len(content) // CHARS_PER_TOKEN)
+        token_delay = 1 / config.tokens_per_second if config.tokens_per_second > 0 else 0
+        eval_seconds = eval_tokens * token_delay
+
+        if not payload.get("stream", True):
+            state["in_flight"] += 1
+            try:
+                await asyncio.sleep(config.ttft + eval_seconds)
+            finally:
+                state["in_flight"] -= 1
+            return JSONResponse({
+                **final_chunk(payload, prompt_tokens, eval_tokens, config.ttft, eval_seconds),
+                "message": {"role": "assistant", "content": content}
+            })
+
+        chunk_chars = config.chunk_tokens * CHARS_PER_TOKEN
+
+        async def stream():
+            state["in_flight"] += 1
+            try:
+                await asyncio.sleep(config.ttft)
+                started = time.perf_counter()
+                for pos in range(0, len(content), chunk_chars):
+                    piece = content[pos:pos + chunk_chars]
+                    yield json.dumps({"model": payload.get("model"), "message": {"role": "assistant", "content": piece}, "done": False}) + "\n"
+                    if token_delay:
+                        # Sleep against the wall clock so many small sleeps do not drift
+                        target = started + (pos + len(piece)) / CHARS_PER_TOKEN * token_delay
+                        await asyncio.sleep(max(0.0, target - time.perf_counter()))
+                yield json.dumps(final_chunk(payload, prompt_tokens, eval_tokens, config.ttft, eval_seconds)) + "\n"
+            finally:
+                state["in_flight"] -= 1
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    return app
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Fake Ollama server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft", type=float, default=0.2, help="Seconds before the first token (prompt evaluation)")
+    parser.add_argument("--tokens-per-second", type=float, default=400, help="Generation speed; 0 streams as fast as possible")
+    parser.add_argument("--chunk-tokens", type=int, default=4, help="Tokens per streamed chunk")
+    parser.add_argument("--file-size", type=int, default=4000, help="Approximate characters per generated file")
+    parser.add_argument("--size-jitter", type=float, default=0.3, help="Relative random variation of file sizes")
+    parser.add_argument("--models", default="qwen2.5-coder:7b,llama3.2-vision:latest")
+    parser.add_argument("--vision-model", default="llama3.2-vision")
+    parser.add_argument("--seed", type=int, default=1234)
+    return parser
+
+
+def main():
+    config = build_parser().parse_args()
+    uvicorn.run(create_app(config), host=config.host, port=config.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
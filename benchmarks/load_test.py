@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Load generator for /generate
+By default starts the fake Ollama server and the API locally (no GPU needed),
+then drives /generate at each concurrency level and reports p50/p95/p99
+latency, throughput and API memory per request
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from typing import List, Optional
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(os.path.dirname(BENCH_DIR), "api")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Resident set size of a process (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def sample_image(size: int) -> bytes:
+    """Noisy PNG so palette extraction does real work"""
+    import numpy as np
+    from PIL import Image
+
+    pixels = np.random.default_rng(size).integers(0, 256, (size, size, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def spawn(args: List[str], env: dict, verbose: bool) -> subprocess.Popen:
+    output = None if verbose else subprocess.DEVNULL
+    return subprocess.Popen(args, env=env, stdout=output, stderr=output)
+
+
+async def wait_ready(client: httpx.AsyncClient, url: str, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if (await client.get(url)).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def start_stack(config: argparse.Namespace) -> List[subprocess.Popen]:
+    """Fake Ollama plus the API, wired together on localhost"""
+    fake = spawn([
+        sys.executable, os.path.join(BENCH_DIR, "fake_ollama.py"),
+        "--port", str(config.fake_port),
+        "--ttft", str(config.ttft),
+        "--tokens-per-second", str(config.tokens_per_second),
+        "--file-size", str(config.file_size)
+    ], dict(os.environ), config.verbose)
+    env = dict(
+        os.environ,
+        OLLAMA_HOST=f"http://127.0.0.1:{config.fake_port}",
+        OLLAMA_PROBE_INTERVAL="2",
+        # Measure generation, not the cache or request coalescing
+        GENERATION_CACHE_SIZE="0",
+        RATE_LIMIT_PER_MINUTE="1000000/minute",
+        JOB_WORKERS=str(config.job_workers),
+        JOB_QUEUE_SIZE="10000",
+        GENERATION_MODE=config.mode
+    )
+    api = spawn([
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--app-dir", API_DIR,
+        "--host", "127.0.0.1",
+        "--port", str(config.api_port),
+        "--log-level", "warning"
+    ], env, config.verbose)
+    return [fake, api]
+
+
+def stop_stack(processes: List[subprocess.Popen]) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    config: argparse.Namespace,
+    concurrency: int,
+    images: List[bytes],
+    api_pid: Optional[int]
+) -> dict:
+    """Send config.requests requests with at most concurrency in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses = {}
+    sizes = []
+    rss_before = rss_bytes(api_pid) if api_pid else None
+    rss_peak = rss_before or 0
+    done = asyncio.Event()
+
+    async def sample_memory():
+        nonlocal rss_peak
+        while not done.is_set():
+            rss_peak = max(rss_peak, rss_bytes(api_pid) or 0)
+            await asyncio.sleep(0.05)
+
+    async def one(index: int):
+        # Unique company names so identical requests are not coalesced
+        data = {
+            "company_name": f"Bench {uuid.uuid4().hex[:8]}",
+            "description": "A company used to benchmark the website generator under load",
+            "theme_hint": config.theme,
+            "pages": config.pages,
+            "mode": config.mode,
+            "stream_zip": str(config.stream_zip).lower()
+        }
+        files = [("images", (f"image{i}.png", image, "image/png")) for i, image in enumerate(images)]
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"{config.api_url}/generate", data=data, files=files or None)
+                status = response.status_code
+                sizes.append(len(response.content))
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    sampler = asyncio.create_task(sample_memory()) if api_pid else None
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(config.requests)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    if sampler:
+        await sampler
+    rss_after = rss_bytes(api_pid) if api_pid else None
+
+    ok = statuses.get(200, 0)
+    result = {
+        "concurrency": concurrency,
+        "requests": config.requests,
+        "ok": ok,
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(ok / elapsed, 3) if elapsed else 0.0,
+        "p50_seconds": round(percentile(latencies, 50), 3),
+        "p95_seconds": round(percentile(latencies, 95), 3),
+        "p99_seconds": round(percentile(latencies, 99), 3),
+        "avg_response_bytes": int(sum(sizes) / len(sizes)) if sizes else 0
+    }
+    if rss_before is not None:
+        result.update({
+            "rss_before_mb": round(rss_before / 2**20, 1),
+            "rss_peak_mb": round(rss_peak / 2**20, 1),
+            "rss_after_mb": round((rss_after or 0) / 2**20, 1),
+            # Extra memory held per in-flight request at the peak
+            "rss_per_request_kb": round((rss_peak - rss_before) / concurrency / 1024, 1)
+        })
+    return result
+
+
+def print_table(results: List[dict]) -> None:
+    columns = [
+        ("concurrency", "conc"), ("ok", "ok"), ("requests", "total"), ("throughput_rps", "req/s"),
+        ("p50_seconds", "p50 s"), ("p95_seconds", "p95 s"), ("p99_seconds", "p99 s"),
+        ("rss_peak_mb", "peak MB"), ("rss_per_request_kb", "KB/req")
+    ]
+    print(" ".join(f"{title:>9}" for _, title in columns))
+    for result in results:
+        print(" ".join(f"{str(result.get(key, '-')):>9}" for key, _ in columns))
+
+
+async def run(config: argparse.Namespace) -> List[dict]:
+    processes = []
+    api_pid = None
+    if config.api_url is None:
+        processes = start_stack(config)
+        api_pid = processes[1].pid
+        config.api_url = f"http://127.0.0.1:{config.api_port}"
+
+    images = [sample_image(config.image_size) for _ in range(config.images)]
+    limits = httpx.Limits(max_connections=max(config.concurrency) + 10)
+    results = []
+    try:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(config.timeout), limits=limits) as client:
+            await wait_ready(client, f"{config.api_url}/health/ready", config.startup_timeout)
+            if config.warmup:
+                warmup = argparse.Namespace(**{**vars(config), "requests": config.warmup})
+                await run_level(client, warmup, 1, images, None)
+            for concurrency in config.concurrency:
+                result = await run_level(client, config, concurrency, images, api_pid)
+                results.append(result)
+                if not config.json:
+                    print(f"concurrency {concurrency}: {result['ok']}/{result['requests']} ok, "
+                          f"p95 {result['p95_seconds']}s, {result['throughput_rps']} req/s", file=sys.stderr)
+    finally:
+        if processes:
+            stop_stack(processes)
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load test /generate")
+    parser.add_argument("--api-url", help="Target a running API instead of starting one with the fake Ollama server")
+    parser.add_argument("--concurrency", default="1,4,16", type=lambda s: [int(c) for c in s.split(",")],
+                        help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=2, help="Sequential requests before measuring")
+    parser.add_argument("--mode", default="single", choices=["single", "parallel", "template", "auto"])
+    parser.add_argument("--pages", default="home,about,contact")
+    parser.add_argument("--theme", default="modern")
+    parser.add_argument("--images", type=int, default=0, help="Images attached to each request")
+    parser.add_argument("--image-size", type=int, default=512, help="Image width and height in pixels")
+    parser.add_argument("--stream-zip", action="store_true")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of the fake server and the API")
+    local = parser.add_argument_group("local stack")
+    local.add_argument("--api-port", type=int, default=18000)
+    local.add_argument("--fake-port", type=int, default=11435)
+    local.add_argument("--job-workers", type=int, default=16, help="JOB_WORKERS for the API (generations run concurrently)")
+    local.add_argument("--ttft", type=float, default=0.2)
+    local.add_argument("--tokens-per-second", type=float, default=400)
+    local.add_argument("--file-size", type=int, default=4000)
+    local.add_argument("--startup-timeout", type=float, default=30)
+    return parser
+
+
+def main():
+    config = build_parser().parse_args()
+    results = asyncio.run(run(config))
+    if config.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
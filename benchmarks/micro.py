@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the CPU-bound steps of a generation
+JSON extraction from the streamed reply, image palette analysis and ZIP
+creation, timed in-process; --compare exits non-zero when a benchmark got
+slower than a saved baseline, so it can gate CI
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api"))
+
+from json_stream import StreamingFilesParser  # noqa: E402
+from palette import extract_palette  # noqa: E402
+from zip_stream import iter_zip  # noqa: E402
+
+# Characters per streamed chunk; Ollama sends roughly one token per chunk
+STREAM_CHUNK_CHARS = 16
+
+
+def site_reply(pages: int, page_size: int) -> str:
+    """A single-mode model reply: JSON object of filename -> content, wrapped in a code fence"""
+    paragraph = "<p>Lorem ipsum dolor sit amet, \"quoted\" text &amp; more.</p>\n"
+    files = {f"page{i}.html": paragraph * (page_size // len(paragraph)) for i in range(pages)}
+    files["styles.css"] = "body { margin: 0; }\n" * (page_size // 20)
+    files["script.js"] = "console.log('ready');\n" * (page_size // 22)
+    return "```json\n" + json.dumps(files, indent=2) + "\n```"
+
+
+def sample_image(size: int, fmt: str) -> bytes:
+    """Gradient with noise, so k-means has structure to find"""
+    rng = np.random.default_rng(size)
+    x = np.linspace(0, 255, size, dtype=np.float64)
+    base = np.stack(np.broadcast_arrays(x[None, :], x[:, None], 255 - x[None, :]), axis=-1)
+    pixels = np.clip(base + rng.normal(0, 20, base.shape), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def parse_streamed(reply: str) -> dict:
+    parser = StreamingFilesParser()
+    for pos in range(0, len(reply), STREAM_CHUNK_CHARS):
+        parser.feed(reply[pos:pos + STREAM_CHUNK_CHARS])
+    return parser.finish()
+
+
+def build_zip(files: Dict[str, bytes], compression: str) -> bytes:
+    return b"".join(iter_zip(files.items(), compression, store_threshold=1024))
+
+
+def benchmarks(quick: bool) -> Dict[str, Callable[[], object]]:
+    pages, page_size = (3, 4000) if quick else (5, 12000)
+    reply = site_reply(pages, page_size)
+    site = {name: content.encode() for name, content in parse_streamed(reply).items()}
+    cases = {
+        "json_extraction.streamed": lambda: parse_streamed(reply),
+        "json_extraction.json_loads": lambda: json.loads(reply.strip("`").removeprefix("json")),
+        "zip_build.deflate": lambda: build_zip(site, "deflate"),
+        "zip_build.store": lambda: build_zip(site, "store"),
+        "zip_build.auto": lambda: build_zip(site, "auto")
+    }
+    for size in ((256, 1024) if quick else (256, 1024, 3000)):
+        for fmt in ("PNG", "JPEG"):
+            image = sample_image(size, fmt)
+            cases[f"image_analysis.{fmt.lower()}_{size}px"] = lambda image=image: extract_palette(image, 5)
+    return cases
+
+
+def measure(func: Callable[[], object], min_time: float, min_runs: int) -> dict:
+    """Repeat func for at least min_time seconds and min_runs runs"""
+    func()  # warm up caches and lazy imports
+    timings: List[float] = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < min_runs or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        "runs": len(timings),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 4),
+        "median_ms": round(statistics.median(timings) * 1000, 4),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 4),
+        "min_ms": round(timings[0] * 1000, 4)
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float, min_delta_ms: float) -> List[str]:
+    """Benchmarks whose median is more than tolerance (and min_delta_ms) slower than the baseline"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before or not before.get("median_ms"):
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1
+        if change > tolerance and result["median_ms"] - before["median_ms"] > min_delta_ms:
+            regressions.append(f"{name}: {before['median_ms']}ms -> {result['median_ms']}ms (+{change:.0%})")
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for JSON extraction, image analysis and ZIP creation")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds to spend per benchmark")
+    parser.add_argument("--min-runs", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs, for CI")
+    parser.add_argument("--save", help="Write results as JSON to this file (e.g. a baseline)")
+    parser.add_argument("--compare", help="Baseline JSON written by --save")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1, help="Ignore slowdowns smaller than this (timer noise)")
+    return parser
+
+
+def main():
+    config = build_parser().parse_args()
+    results = {}
+    for name, func in benchmarks(config.quick).items():
+        if config.filter not in name:
+            continue
+        results[name] = measure(func, config.min_time, config.min_runs)
+        result = results[name]
+        print(f"{name:<34} median {result['median_ms']:>10.3f} ms  p95 {result['p95_ms']:>10.3f} ms  ({result['runs']} runs)")
+
+    if config.save:
+        with open(config.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if config.compare:
+        with open(config.compare) as f:
+            regressions = compare(results, json.load(f), config.tolerance, config.min_delta_ms)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The API modules import each other as top-level modules (as uvicorn runs them from api/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api"))
+
+# Importing main must not create the default artifact store directory
+os.environ.setdefault("ARTIFACT_DIR", "")
@@ -0,0 +1,151 @@
+import io
+import threading
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from artifact_store import ArtifactNotFound, ArtifactStore, RangeNotSatisfiable, parse_range
+
+FILES = [("index.html", b"<html>" + b"x" * 4000 + b"</html>"), ("styles.css", b"body{}")]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path))
+
+
+def test_same_site_and_request_share_one_artifact(store):
+    first = store.put(FILES, "Acme_website.zip", {"site": {"company": "Acme"}})
+    second = store.put(FILES, "Acme_website.zip", {"site": {"company": "Acme"}})
+    assert first.id == second.id
+    assert store.stats()["artifacts_deduplicated"] == 1
+
+
+def test_same_files_for_another_request_keep_their_own_metadata(store):
+    acme = store.put(FILES, "Acme_website.zip", {"site": {"company": "Acme"}})
+    other = store.put(FILES, "Other_website.zip", {"site": {"company": "Other"}})
+
+    assert acme.id != other.id
+    assert store.get(acme.id).metadata == {"site": {"company": "Acme"}}
+    assert store.get(other.id).metadata == {"site": {"company": "Other"}}
+    assert store.get(other.id).filename == "Other_website.zip"
+    # The files themselves are still stored once
+    assert store.stats()["bytes_deduplicated"] == sum(len(data) for _, data in FILES)
+
+
+def test_zip_is_assembled_from_the_blobs(store):
+    artifact = store.put(FILES)
+    path = store.zip_path(artifact)
+    with zipfile.ZipFile(path) as z:
+        assert [(name, z.read(name)) for name in z.namelist()] == FILES
+    assert store.zip_path(artifact) == path
+
+
+def test_unknown_and_malformed_ids(store):
+    with pytest.raises(ArtifactNotFound):
+        store.get("0" * 32)
+    with pytest.raises(ArtifactNotFound):
+        store.get("../../etc/passwd")
+
+
+def test_collection_does_not_block_stats_or_writes(store, monkeypatch):
+    scanning = threading.Event()
+    release = threading.Event()
+    scan = store._scan
+
+    def slow_scan(folder, suffix):
+        scanning.set()
+        assert release.wait(5)
+        return scan(folder, suffix)
+
+    monkeypatch.setattr(store, "_scan", slow_scan)
+    collector = threading.Thread(target=store.collect)
+    collector.start()
+    try:
+        assert scanning.wait(5)
+        # The counters stay available while the disk scan runs, and a second collector skips
+        assert store.stats()["collections"] == 0
+        store.put(FILES)
+        assert store.stats()["artifacts_stored"] == 1
+        assert store.collect() == {"skipped": True}
+    finally:
+        release.set()
+        collector.join(5)
+    assert store.stats()["collections"] == 1
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=900-5000", (900, 999)),
+    (" bytes = 5 - 6 ", (5, 6)),
+    ("bytes=5-4", None),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header, size", [("bytes=1000-", 1000), ("bytes=-0", 1000), ("bytes=-1", 0)])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, size)
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    monkeypatch.setattr(main, "artifact_store", store)
+    return TestClient(main.app)
+
+
+def test_download_with_etag_revalidation(client, store):
+    artifact = store.put(FILES, "Acme_website.zip")
+    response = client.get(f"/artifacts/{artifact.id}")
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment; filename=Acme_website.zip"
+    assert zipfile.ZipFile(io.BytesIO(response.content)).read("styles.css") == b"body{}"
+    etag = response.headers["etag"]
+
+    revalidated = client.get(f"/artifacts/{artifact.id}", headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert client.get(f"/artifacts/{artifact.id}", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_range_and_if_range(client, store):
+    artifact = store.put(FILES)
+    full = client.get(f"/artifacts/{artifact.id}")
+    etag = full.headers["etag"]
+
+    partial = client.get(f"/artifacts/{artifact.id}", headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.content == full.content[10:20]
+    assert partial.headers["content-range"] == f"bytes 10-19/{len(full.content)}"
+
+    resumed = client.get(f"/artifacts/{artifact.id}", headers={"Range": "bytes=10-", "If-Range": etag})
+    assert resumed.status_code == 206 and resumed.content == full.content[10:]
+
+    # The client's copy is another version: send the whole file
+    changed = client.get(f"/artifacts/{artifact.id}", headers={"Range": "bytes=10-", "If-Range": '"old"'})
+    assert changed.status_code == 200 and changed.content == full.content
+
+    unsatisfiable = client.get(f"/artifacts/{artifact.id}", headers={"Range": f"bytes={len(full.content)}-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(full.content)}"
+
+
+def test_single_file_download(client, store):
+    artifact = store.put(FILES)
+    response = client.get(f"/artifacts/{artifact.id}/files/styles.css")
+    assert response.status_code == 200
+    assert response.content == b"body{}"
+    assert response.headers["content-security-policy"] == "sandbox"
+    assert client.get(f"/artifacts/{artifact.id}/files/styles.css", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    assert client.get(f"/artifacts/{artifact.id}/files/missing.js").status_code == 404
+    assert client.get(f"/artifacts/{'0' * 32}").status_code == 404
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import pytest
+
+import main
+from batch import COMPLETED, FAILED, STARTED, BatchError, BatchRunner, InvalidEntry, first_indices, parse_batch_body
+from generation_cache import GenerationCache
+
+NDJSON = "application/x-ndjson"
+
+
+def test_json_array_and_sites_object():
+    sites = [{"company_name": "Acme"}, {"company_name": "Beta"}]
+    assert parse_batch_body(json.dumps(sites).encode(), "application/json", 10) == sites
+    assert parse_batch_body(json.dumps({"sites": sites}).encode(), "application/json; charset=utf-8", 10) == sites
+
+
+def test_ndjson_invalid_lines_become_entries():
+    body = b'{"company_name": "Acme"}\n\n{"company_name": \n  \n[1, 2]\n{"company_name": "Beta"}\n'
+    entries = parse_batch_body(body, "application/x-ndjson; charset=utf-8", 10)
+
+    assert len(entries) == 4
+    assert entries[0] == {"company_name": "Acme"}
+    assert isinstance(entries[1], InvalidEntry) and entries[1].detail.startswith("Line 3 is not valid JSON")
+    assert isinstance(entries[2], InvalidEntry) and entries[2].detail == "Entry must be a JSON object"
+    assert entries[3] == {"company_name": "Beta"}
+
+
+def test_non_object_array_items_are_invalid():
+    entries = parse_batch_body(b'[{"company_name": "Acme"}, "Beta", null]', "application/json", 10)
+    assert entries[0] == {"company_name": "Acme"}
+    assert [isinstance(entry, InvalidEntry) for entry in entries[1:]] == [True, True]
+
+
+@pytest.mark.parametrize("body, content_type, message", [
+    (b"[]", "application/json", "empty"),
+    (b"\n \n", NDJSON, "empty"),
+    (b'{"company_name": "Acme"}', "application/json", "JSON array"),
+    (b"[{", "application/json", "not valid JSON"),
+    (b"\xff\xfe", "application/json", "UTF-8"),
+    (b"[{}, {}, {}]", "application/json", "Maximum 2"),
+    (b"{}\n{}\n{}\n", NDJSON, "Maximum 2"),
+])
+def test_unusable_bodies(body, content_type, message):
+    with pytest.raises(BatchError, match=message):
+        parse_batch_body(body, content_type, 2)
+
+
+def test_first_indices():
+    items = [(0, "a", None), (1, "b", None), (3, "a", None), (4, "a", None)]
+    assert first_indices(items) == {0: None, 1: None, 3: 0, 4: 0}
+
+
+def collect(runner, items, func):
+    async def run():
+        return [event async for event in runner.run(items, func)]
+    return asyncio.run(run())
+
+
+def test_runner_runs_duplicates_once():
+    calls = []
+
+    async def func(item):
+        calls.append(item)
+        await asyncio.sleep(0)
+        if item == "bad":
+            raise ValueError(item)
+        return item.upper()
+
+    events = collect(BatchRunner(2), [(0, "a", "a"), (1, "x", "bad"), (2, "a", "a"), (3, "b", "b")], func)
+
+    assert sorted(calls) == ["a", "b", "bad"]
+    assert sorted(indices for kind, indices, _ in events if kind == STARTED) == [[0, 2], [1], [3]]
+    outcomes = {tuple(indices): (kind, result) for kind, indices, result in events if kind != STARTED}
+    assert outcomes[(0, 2)] == (COMPLETED, "A")
+    assert outcomes[(3,)] == (COMPLETED, "B")
+    assert outcomes[(1,)][0] == FAILED and isinstance(outcomes[(1,)][1], ValueError)
+
+
+def test_runner_respects_concurrency():
+    running = []
+    peak = []
+
+    async def func(item):
+        running.append(item)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(item)
+        return item
+
+    events = collect(BatchRunner(2), [(index, str(index), index) for index in range(6)], func)
+
+    assert max(peak) == 2
+    assert sum(1 for kind, _, _ in events if kind == COMPLETED) == 6
+
+
+def test_cached_batch_sites_are_not_charged(monkeypatch):
+    charged = []
+
+    async def charge(request, gen_request, api_key):
+        charged.append(gen_request.company_name)
+
+    async def no_artifact(zip_bytes, gen_request):
+        return None
+
+    cache = GenerationCache()
+    monkeypatch.setattr(main, "generation_cache", cache)
+    monkeypatch.setattr(main, "charge_batch_site", charge)
+    monkeypatch.setattr(main, "store_cached_artifact", no_artifact)
+    gen_request = main.batch_generate_request({"company_name": "Acme", "description": "A test company description"})
+    asyncio.run(cache.set(main.generation_cache_key(gen_request, []), b"zip"))
+
+    result = asyncio.run(main.generate_batch_site(None, gen_request, None))
+
+    assert result == {"zip": b"zip", "cached": True}
+    assert charged == []
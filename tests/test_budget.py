@@ -0,0 +1,105 @@
+import pytest
+
+from budget import TokenBudget, parse_model_ladder, select_model
+
+LADDER = [("tiny", 1), ("small", 3)]
+
+
+def make_budget(**kwargs):
+    return TokenBudget({"site": (1536, 1280), "body": (900, 0)}, **kwargs)
+
+
+def test_prior_until_enough_samples():
+    budget = make_budget(min_samples=3)
+    assert budget.estimate("m", "site", 2) == 4096
+    assert budget.estimate("m", "body") == 1024  # rounded up to 256
+
+    for _ in range(2):
+        budget.record("m", "site", 2, 1000)
+    assert budget.estimate("m", "site", 2) == 4096
+
+    budget.record("m", "site", 2, 1000)
+    assert budget.estimate("m", "site", 2) == 1536  # 1000 * 1.3, rounded up
+
+
+def test_percentile_and_tier_headroom():
+    budget = make_budget(min_samples=1, percentile=0.9)
+    for tokens in range(100, 1100, 100):
+        budget.record("m", "body", 1, tokens)
+
+    # p90 of 100..1000 is 900
+    assert budget.estimate("m", "body", 1, "fast") == 1280  # 1035
+    assert budget.estimate("m", "body", 1, "balanced") == 1280  # 1170
+    assert budget.estimate("m", "body", 1, "quality") == 1536  # 1440
+    assert budget.estimate("m", "body", 1, "unknown") == 1280
+
+
+def test_minimum_and_maximum():
+    budget = make_budget(minimum=512, maximum=2048, min_samples=1)
+    budget.record("m", "body", 1, 10)
+    budget.record("m", "site", 5, 5000)
+    assert budget.estimate("m", "body") == 512
+    assert budget.estimate("m", "site", 5) == 2048
+    assert budget.estimate("other", "site", 5) == 2048  # the prior is capped too
+
+
+def test_truncated_replies_count_larger():
+    budget = make_budget(min_samples=1)
+    budget.record("m", "body", 1, 1000, truncated=True)
+    assert budget.estimate("m", "body", 1, "fast") == 1792  # 1500 * 1.15
+    assert budget.stats()["replies"]["m:body:1"]["truncated"] == 1
+
+
+def test_empty_replies_are_ignored():
+    budget = make_budget(min_samples=1)
+    budget.record("m", "body", 1, 0)
+    assert budget.stats()["replies"] == {}
+
+
+def test_models_learn_separately():
+    budget = make_budget(min_samples=1)
+    for _ in range(5):
+        budget.record("tiny", "site", 1, 3000, truncated=True)
+    budget.record("big", "site", 1, 1000)
+
+    assert budget.estimate("tiny", "site", 1) == 5888
+    assert budget.estimate("big", "site", 1) == 1536
+    assert budget.estimate("other", "site", 1) == 2816
+    assert set(budget.stats()["replies"]) == {"big:site:1", "tiny:site:1"}
+
+
+def test_stats():
+    budget = make_budget(min_samples=1)
+    budget.record("m", "site", 2, 2000)
+    reply = budget.stats()["replies"]["m:site:2"]
+    assert reply["samples"] == 1
+    assert reply["p50"] == reply["p90"] == 2000
+    assert reply["num_predict"] == {"fast": 2304, "balanced": 2816, "quality": 3328}
+
+
+def test_parse_model_ladder():
+    assert parse_model_ladder("") == []
+    assert parse_model_ladder(" qwen2.5-coder:1.5b@1, qwen2.5-coder:3b@3 ,") == [
+        ("qwen2.5-coder:1.5b", 1), ("qwen2.5-coder:3b", 3)
+    ]
+    with pytest.raises(ValueError, match="model@max_pages"):
+        parse_model_ladder("tiny")
+
+
+@pytest.mark.parametrize("pages, tier, expected", [
+    (1, "balanced", "tiny"),
+    (2, "balanced", "small"),
+    (3, "balanced", "small"),
+    (4, "balanced", "default"),
+    (5, "fast", "tiny"),
+    (1, "quality", "default"),
+])
+def test_select_model(pages, tier, expected):
+    assert select_model(LADDER, "default", pages, tier, lambda model: True) == expected
+
+
+def test_select_model_skips_unavailable_rungs():
+    assert select_model(LADDER, "default", 1, "balanced", lambda model: model != "tiny") == "small"
+    assert select_model(LADDER, "default", 5, "fast", lambda model: model != "tiny") == "small"
+    assert select_model(LADDER, "default", 1, "fast", lambda model: False) == "default"
+    assert select_model([], "default", 1, "fast", lambda model: True) == "default"
@@ -0,0 +1,69 @@
+import pytest
+
+from content_scan import ContentScanner, default_scanner, sanitize_html
+
+SCRIPT = """// Mobile menu and smooth scrolling
+document.addEventListener("DOMContentLoaded", function() {
+    const toggle = document.querySelector(".nav-toggle");
+    toggle.addEventListener("click", function () {
+        document.querySelector(".nav-menu").classList.toggle("open");
+    });
+    const scrollTo = function(target) {
+        target.scrollIntoView({ behavior: "smooth" });
+    };
+    document.querySelectorAll('a[href^="#"]').forEach(function(link) {
+        link.addEventListener("click", async function handler(event) {
+            event.preventDefault();
+            scrollTo(document.querySelector(link.getAttribute("href")));
+        });
+    });
+});
+"""
+
+
+def test_normal_script_has_no_findings():
+    assert default_scanner.scan(SCRIPT, "script.js") == []
+    assert default_scanner.scan_files({"script.js": SCRIPT, "index.html": f"<script>{SCRIPT}</script>"}) == []
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64])
+def test_normal_script_streamed_has_no_findings(size):
+    stream = default_scanner.stream()
+    for start in range(0, len(SCRIPT), size):
+        assert stream.feed(SCRIPT[start:start + size]) == []
+
+
+def test_new_function_is_case_sensitive():
+    findings = default_scanner.scan('const f = new Function("a", "return a"); new function() {}; NEW FUNCTION(1)')
+    assert [(finding.rule, finding.offset) for finding in findings] == [("new Function(", 10)]
+
+
+def test_other_rules_ignore_case():
+    findings = default_scanner.scan("EVAL(x); Document.Cookie; new Function(y)", "script.js")
+    assert [(finding.rule, finding.text, finding.offset) for finding in findings] == [
+        ("eval(", "EVAL(", 0), ("document.cookie", "Document.Cookie", 9), ("new Function(", "new Function(", 26)
+    ]
+    assert findings[0].to_dict()["filename"] == "script.js"
+
+
+def test_stream_finds_matches_split_across_chunks_once():
+    text = "a = new Function('x'); eval(b); window.location = c"
+    stream = default_scanner.stream()
+    findings = []
+    for start in range(0, len(text), 5):
+        findings.extend(stream.feed(text[start:start + 5]))
+    assert [(finding.rule, finding.offset) for finding in findings] == [
+        ("new Function(", 4), ("eval(", 23), ("window.location", 32)
+    ]
+    assert stream.findings == findings
+
+
+def test_scanner_needs_a_rule():
+    with pytest.raises(ValueError):
+        ContentScanner([], [])
+    assert ContentScanner([], ["new Function("]).scan("new Function(") != []
+
+
+def test_sanitize_html():
+    html = '<p onclick="x()">Hi</p><script>alert(1)</script><a href="javascript:void(0)">a</a><iframe src="x">'
+    assert sanitize_html(html) == '<p "x()">Hi</p><a href="void(0)">a</a>'
@@ -0,0 +1,44 @@
+import copy
+
+from main import merge_design_hints
+
+
+def analysis(primary, hints):
+    return {
+        "palette": {
+            "colors": [{"hex": primary, "rgb": [int(primary[i:i + 2], 16) for i in (1, 3, 5)], "weight": 1.0}],
+            "primary_color": primary,
+            "pairs": [],
+            "is_dark": False
+        },
+        "hints": hints,
+        "vision_ok": True
+    }
+
+
+def test_merge_does_not_modify_the_analyses():
+    first = analysis("#c81e1e", {"style": "modern", "keywords": ["bold"], "layout": {"sections": ["hero"]}})
+    second = analysis("#1428a0", {"style": "classic", "keywords": ["calm", "bold"]})
+    before = copy.deepcopy([first, second])
+
+    merged = merge_design_hints([first, second])
+    merged["keywords"].append("extra")
+    merged["layout"]["sections"].append("footer")
+
+    assert [first, second] == before
+    assert merge_design_hints([first, second])["keywords"] == ["bold", "calm"]
+
+
+def test_earlier_images_win_scalars_and_lists_are_unioned():
+    merged = merge_design_hints([
+        analysis("#c81e1e", {"style": "modern", "keywords": ["bold"]}),
+        analysis("#1428a0", {"style": "classic", "keywords": ["calm"], "mood": "warm"})
+    ])
+    assert merged["style"] == "modern"
+    assert merged["mood"] == "warm"
+    assert merged["keywords"] == ["bold", "calm"]
+    assert set(merged["extracted_palette"]) == {"#c81e1e", "#1428a0"}
+
+
+def test_no_analyses():
+    assert merge_design_hints([]) == {}
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+from generation_cache import GenerationCache
+from jobs import JobQueue
+
+FORM = {"company_name": "Acme", "description": "A test company description"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "job_queue", JobQueue(workers=1))
+    monkeypatch.setattr(main, "generation_cache", GenerationCache(max_entries=0))
+    monkeypatch.setattr(main, "artifact_store", None)
+    return TestClient(main.app)
+
+
+def sse_events(text):
+    events = []
+    for block in text.split("\n\n"):
+        lines = block.splitlines()
+        if lines and lines[0].startswith("event: "):
+            events.append((lines[0][len("event: "):], json.loads(lines[1][len("data: "):])))
+    return events
+
+
+def test_stream_relays_the_job_progress(client, monkeypatch):
+    async def run_generation(gen_request, image_payloads, cache_key, metadata=None, on_event=None):
+        await on_event("stage", {"stage": "generating"})
+        await on_event("file_complete", {"file": "index.html", "size": 6, "content": "<html>"})
+        # The final site repeats the files already completed
+        await on_event("file_complete", {"file": "index.html", "size": 6, "content": "<html>"})
+        await on_event("file_complete", {"file": "styles.css", "size": 0, "content": ""})
+        return b"zip"
+
+    monkeypatch.setattr(main, "run_generation", run_generation)
+    response = client.post("/generate/stream", data=FORM)
+
+    events = sse_events(response.text)
+    assert [event for event, _ in events] == ["start", "stage", "file_complete", "file_complete", "complete"]
+    assert events[2][1] == {"file": "index.html", "size": 6}
+    complete = events[-1][1]
+    assert complete["size"] == 3 and complete["cached"] is False
+    job = main.job_queue.get(complete["job_id"])
+    assert job.result == b"zip"
+    assert complete["result_url"] == f"/jobs/{job.id}/result"
+    assert main.job_queue.stats()["completed"] == 1
+
+
+def test_stream_reports_job_failures(client, monkeypatch):
+    async def run_generation(gen_request, image_payloads, cache_key, metadata=None, on_event=None):
+        await on_event("stage", {"stage": "generating"})
+        raise HTTPException(status_code=502, detail="AI model request failed")
+
+    monkeypatch.setattr(main, "run_generation", run_generation)
+    response = client.post("/generate/stream", data=FORM)
+
+    assert sse_events(response.text)[-1] == ("error", {"status_code": 502, "detail": "AI model request failed"})
+    assert main.job_queue.stats()["failed"] == 1
+
+
+def test_stream_is_rejected_when_the_queue_is_full(client, monkeypatch):
+    monkeypatch.setattr(main, "job_queue", JobQueue(workers=1, max_queue=0))
+    response = client.post("/generate/stream", data=FORM)
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
+
+
+@pytest.mark.parametrize("path", ["/generate", "/generate/stream", "/jobs"])
+def test_invalid_mode_is_400(client, path):
+    response = client.post(path, data={**FORM, "mode": "bogus"})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("mode: Value error, Invalid mode: bogus")
+
+
+@pytest.mark.parametrize("path", ["/generate", "/generate/stream", "/jobs"])
+def test_invalid_tier_is_400(client, path):
+    response = client.post(path, data={**FORM, "tier": "bogus"})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("tier: Value error, Invalid tier: bogus")
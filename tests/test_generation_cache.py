@@ -0,0 +1,80 @@
+import asyncio
+import os
+import time
+
+from generation_cache import GenerationCache, make_cache_key
+
+
+def test_cache_key_is_canonical():
+    a = make_cache_key({"x": 1, "y": [1, 2]}, "model", "v1", ["b", "a"])
+    b = make_cache_key({"y": [1, 2], "x": 1}, "model", "v1", ["a", "b"])
+    assert a == b
+    assert a != make_cache_key({"x": 1, "y": [1, 2]}, "other", "v1", ["a", "b"])
+
+
+def test_memory_tier_lru():
+    cache = GenerationCache(max_entries=2, max_bytes=1024)
+
+    async def scenario():
+        await cache.set("a", b"1")
+        await cache.set("b", b"2")
+        assert await cache.get("a") == b"1"
+        await cache.set("c", b"3")
+        return await cache.get("a"), await cache.get("b"), await cache.get("c")
+
+    assert asyncio.run(scenario()) == (b"1", None, b"3")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    asyncio.run(GenerationCache(disk_dir=str(tmp_path)).set("key", b"zip"))
+
+    cache = GenerationCache(max_entries=0, disk_dir=str(tmp_path))
+    assert asyncio.run(cache.get("key")) == b"zip"
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_drops_expired_files(tmp_path):
+    cache = GenerationCache(max_entries=0, ttl=60, disk_dir=str(tmp_path))
+    asyncio.run(cache.set("old", b"zip"))
+    stale = time.time() - 120
+    os.utime(tmp_path / "old.zip", (stale, stale))
+
+    assert cache.collect_disk()["bytes_freed"] == 3
+    assert not (tmp_path / "old.zip").exists()
+    assert asyncio.run(cache.get("old")) is None
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = GenerationCache(max_entries=0, disk_dir=str(tmp_path), disk_max_bytes=10 ** 6)
+
+    async def fill():
+        for index in range(4):
+            await cache.set(f"k{index}", b"x" * 100)
+
+    asyncio.run(fill())
+    now = time.time()
+    for index in range(4):
+        os.utime(tmp_path / f"k{index}.zip", (now - 100 + index, now - 100 + index))
+    # Reading the oldest entry makes it the most recently used
+    assert asyncio.run(cache.get("k0")) == b"x" * 100
+
+    cache.disk_max_bytes = 250
+    result = cache.collect_disk()
+
+    assert result["evicted"] == 2
+    assert result["size"] == 200
+    assert sorted(os.listdir(tmp_path)) == [".gc.lock", "k0.zip", "k3.zip"]
+
+
+def test_disk_writes_trigger_collection(tmp_path):
+    cache = GenerationCache(max_entries=0, disk_dir=str(tmp_path), disk_max_bytes=1000)
+
+    async def fill():
+        for index in range(20):
+            await cache.set(f"k{index}", b"x" * 100)
+
+    asyncio.run(fill())
+    size = sum(entry.stat().st_size for entry in os.scandir(tmp_path) if entry.name.endswith(".zip"))
+    assert size <= 1000
+    assert cache.stats()["disk_evictions"] > 0
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from jobs import COMPLETED, JobQueue, JobQueueFull
+
+
+def test_results_over_the_limit_are_dropped_least_recently_requested_first():
+    queue = JobQueue(max_result_bytes=250)
+    first = queue.add_completed(b"a" * 100)
+    second = queue.add_completed(b"b" * 100)
+    # Requesting the first result makes the second the least recently used
+    assert queue.get(first.id) is first
+
+    third = queue.add_completed(b"c" * 100)
+
+    assert second.result_dropped and second.result is None
+    assert second.status == COMPLETED and second.to_dict()["size"] == 100
+    assert first.result == b"a" * 100 and third.result == b"c" * 100
+    assert queue.stats()["result_bytes"] == 200
+    assert queue.stats()["dropped_results"] == 1
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(second.wait())
+    assert error.value.status_code == 410
+
+
+def test_newest_result_is_kept_even_alone_over_the_limit():
+    queue = JobQueue(max_result_bytes=10)
+    job = queue.add_completed(b"x" * 100)
+    assert asyncio.run(job.wait()) == b"x" * 100
+
+
+def test_expired_results_release_their_bytes():
+    queue = JobQueue(result_ttl=60)
+    job = queue.add_completed(b"x" * 100)
+    job.finished_at -= 120
+
+    assert queue.get(job.id) is None
+    assert queue.stats()["result_bytes"] == 0
+
+
+def test_worker_results_are_accounted():
+    async def scenario():
+        queue = JobQueue(workers=1, max_queue=1, max_result_bytes=150)
+
+        async def produce(data):
+            return data
+
+        jobs = []
+        for data in (b"a" * 100, b"b" * 100):
+            while True:
+                try:
+                    jobs.append(queue.submit(lambda data=data: produce(data)))
+                    break
+                except JobQueueFull:
+                    await asyncio.sleep(0.01)
+        assert await jobs[1].wait() == b"b" * 100
+        await queue.stop()
+        return queue, jobs
+
+    queue, jobs = asyncio.run(scenario())
+    assert jobs[0].result_dropped
+    assert queue.stats()["result_bytes"] == 100
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from json_stream import StreamingFilesParser
+
+FILES = {
+    "index.html": '<a href="about.html">Sobre \\ nosotros</a>\n\t<p>Año – ünïcode ✓</p>',
+    "styles.css": 'body { content: "\\201C"; }',
+    "script.js": "console.log('hi');",
+}
+REPLY = "Here is your site:\n```json\n" + json.dumps(FILES, indent=2) + "\n```\nEnjoy!"
+
+
+def feed_all(parser, text, size):
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return completed
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(REPLY)])
+def test_any_chunk_split_yields_the_same_files(size):
+    parser = StreamingFilesParser()
+    completed = feed_all(parser, REPLY, size)
+
+    assert completed == list(FILES.items())
+    assert parser.done
+    assert parser.finish() == FILES
+    assert not parser.truncated
+    assert parser.text == REPLY
+
+
+def test_split_inside_unicode_escape():
+    reply = '{"a.html": "caf\\u00e9 \\"q\\""}'
+    split = reply.index("u00e9") + 2
+    parser = StreamingFilesParser()
+    completed = parser.feed(reply[:split]) + parser.feed(reply[split:])
+    assert completed == [("a.html", 'café "q"')]
+
+
+def test_files_complete_as_soon_as_their_value_closes():
+    parser = StreamingFilesParser()
+    assert parser.feed('{"index.html": "<p>hi</p>", "styles.css": "bo') == [("index.html", "<p>hi</p>")]
+    assert parser.current_key == "styles.css"
+    assert parser.feed('dy{}"}') == [("styles.css", "body{}")]
+
+
+def test_raw_control_characters_are_tolerated():
+    parser = StreamingFilesParser()
+    assert parser.feed('{"a.html": "line1\nline2\tx"}') == [("a.html", "line1\nline2\tx")]
+
+
+def test_nested_files_object_and_non_string_values_are_skipped():
+    reply = '{"pages": ["index", {"x": "}"}], "count": 3, "files": {"index.html": "<p>}</p>"}, "ok": true}'
+    parser = StreamingFilesParser()
+    assert feed_all(parser, reply, 4) == [("index.html", "<p>}</p>")]
+    assert parser.done
+
+
+def test_brace_in_prose_before_the_object():
+    parser = StreamingFilesParser()
+    completed = parser.feed('Use {braces} wisely. {"a.html": "x"}')
+    assert completed == [("a.html", "x")]
+
+
+@pytest.mark.parametrize("tail, content", [
+    ('<p>cut', "<p>cut"),
+    ('<p>cut\\', "<p>cut"),
+    ('<p>caf\\u00', "<p>caf"),
+    ('<p>\\"q\\"', '<p>"q"'),
+])
+def test_truncated_value_is_recovered(tail, content):
+    parser = StreamingFilesParser()
+    parser.feed('{"index.html": "<p>done</p>", "about.html": "' + tail)
+
+    assert parser.finish() == {"index.html": "<p>done</p>", "about.html": content}
+    assert parser.truncated
+    assert parser.current_key is None
+
+
+def test_truncated_inside_key_keeps_completed_files():
+    parser = StreamingFilesParser()
+    parser.feed('{"index.html": "<p>x</p>", "abo')
+    assert parser.finish() == {"index.html": "<p>x</p>"}
+    assert parser.truncated
+
+
+def test_reply_without_object_is_not_truncated():
+    parser = StreamingFilesParser()
+    parser.feed("Sorry, I cannot help with that.")
+    assert parser.finish() == {}
+    assert not parser.truncated
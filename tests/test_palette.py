@@ -0,0 +1,86 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from palette import contrast_pairs, extract_palette, merge_palettes, relative_luminance, to_hex
+
+
+def image_bytes(stripes, size=(100, 100), mode="RGB", fmt="PNG"):
+    """An image of vertical stripes: [(color, fraction of the width), ...]"""
+    img = Image.new(mode, size)
+    x = 0
+    for color, fraction in stripes:
+        width = round(size[0] * fraction)
+        img.paste(color, (x, 0, x + width, size[1]))
+        x += width
+    buffer = io.BytesIO()
+    img.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def test_dominant_colors_in_weight_order():
+    data = image_bytes([((200, 30, 30), 0.6), ((20, 40, 160), 0.3), ((250, 250, 250), 0.1)])
+    palette = extract_palette(data)
+
+    assert [color["hex"] for color in palette["colors"]] == ["#c81e1e", "#1428a0", "#fafafa"]
+    assert [color["weight"] for color in palette["colors"]] == pytest.approx([0.6, 0.3, 0.1], abs=0.01)
+    assert palette["primary_color"] == "#c81e1e"
+    assert not palette["is_dark"]
+
+
+def test_specks_are_dropped():
+    data = image_bytes([((0, 0, 0), 0.995), ((255, 255, 0), 0.005)], size=(1000, 10))
+    palette = extract_palette(data)
+    assert [color["hex"] for color in palette["colors"]] == ["#000000"]
+    assert palette["is_dark"]
+
+
+def test_transparent_pixels_are_ignored():
+    data = image_bytes([((255, 0, 0, 255), 0.3), ((0, 255, 0, 0), 0.7)], mode="RGBA")
+    assert [color["hex"] for color in extract_palette(data)["colors"]] == ["#ff0000"]
+
+
+def test_fully_transparent_image():
+    data = image_bytes([((0, 0, 0, 0), 1.0)], mode="RGBA")
+    assert extract_palette(data) == {"colors": [], "primary_color": None, "pairs": [], "is_dark": False}
+
+
+def test_contrast_pairs_meet_wcag_aa():
+    centers = np.array([[255, 255, 255], [0, 0, 128], [119, 119, 119]], dtype=np.float64)
+    pairs = {pair["background"]: pair for pair in contrast_pairs(centers)}
+
+    assert pairs["#ffffff"]["text"] == "#000000" and pairs["#ffffff"]["wcag"] == "AAA"
+    assert pairs["#000080"]["text"] == "#ffffff"
+    for pair in pairs.values():
+        assert pair["contrast"] >= 4.5
+
+
+def test_relative_luminance_bounds():
+    assert relative_luminance(np.array([0, 0, 0])) == pytest.approx(0)
+    assert relative_luminance(np.array([255, 255, 255])) == pytest.approx(1)
+    assert to_hex([254.6, 0.4, 16]) == "#ff0010"
+
+
+def test_merge_palettes_folds_near_identical_colors():
+    red = extract_palette(image_bytes([((200, 30, 30), 0.8), ((255, 255, 255), 0.2)]))
+    near_red = extract_palette(image_bytes([((205, 32, 28), 0.5), ((10, 10, 10), 0.5)]))
+    merged = merge_palettes([red, near_red])
+
+    reds = [color for color in merged["colors"] if color["rgb"][0] > 150 and color["rgb"][1] < 100]
+    assert len(reds) == 1
+    assert merged["primary_color"] == reds[0]["hex"]
+    assert reds[0]["weight"] == pytest.approx(0.65, abs=0.01)
+    assert sum(color["weight"] for color in merged["colors"]) == pytest.approx(1, abs=0.01)
+
+
+def test_merge_palettes_respects_image_weights():
+    red = extract_palette(image_bytes([((200, 30, 30), 1.0)]))
+    blue = extract_palette(image_bytes([((20, 40, 160), 1.0)]))
+    assert merge_palettes([red, blue], weights=[1, 3])["primary_color"] == "#1428a0"
+    assert merge_palettes([red, blue], weights=[3, 1])["primary_color"] == "#c81e1e"
+
+
+def test_merge_palettes_without_colors():
+    assert merge_palettes([{"colors": []}, {}])["primary_color"] is None
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from rate_limit import Limit, MemoryBackend, RateLimited, RateLimiter, SQLiteBackend, parse_limit, take_tokens
+
+
+def test_parse_limit():
+    assert str(parse_limit("10")) == "10/minute"
+    assert str(parse_limit("5 per hour")) == "5/hour"
+    assert parse_limit("1000/days").period == 86400
+    with pytest.raises(ValueError):
+        parse_limit("ten a minute")
+
+
+def test_new_bucket_starts_full():
+    tokens, decision = take_tokens(None, 0, 0, 3, Limit(10, 60))
+    assert decision.allowed and tokens == 7 == decision.remaining
+
+
+def test_bucket_refills_continuously_up_to_capacity():
+    limit = Limit(60, 60)
+    tokens, _ = take_tokens(2.0, updated=100.0, now=105.0, cost=0, limit=limit)
+    assert tokens == pytest.approx(7.0)
+    tokens, _ = take_tokens(2.0, updated=100.0, now=1000.0, cost=0, limit=limit)
+    assert tokens == 60
+
+
+def test_rejection_reports_time_until_enough_tokens():
+    tokens, decision = take_tokens(1.0, updated=0.0, now=0.0, cost=4, limit=Limit(60, 60))
+    assert not decision.allowed
+    assert tokens == 1.0
+    assert decision.retry_after == pytest.approx(3.0)
+
+
+def test_cost_above_burst_passes_from_a_full_bucket():
+    limit = Limit(5, 60)
+    tokens, decision = take_tokens(None, 0, 0, 12, limit)
+    assert decision.allowed and tokens == 0
+
+
+def test_negative_cost_refunds_without_exceeding_capacity():
+    limit = Limit(10, 60)
+    assert take_tokens(4.0, 0, 0, -3, limit)[0] == 7.0
+    assert take_tokens(9.0, 0, 0, -3, limit)[0] == 10
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend()
+    return SQLiteBackend(str(tmp_path / "buckets.sqlite3"))
+
+
+def test_rejected_hit_refunds_the_buckets_already_charged(backend):
+    limiter = RateLimiter(backend)
+    client_limit = Limit(10, 3600)
+    key_limit = Limit(4, 3600)
+    checks = [("client", "1.2.3.4", client_limit), ("api_key", "k", key_limit)]
+
+    async def scenario():
+        await limiter.hit(checks, 3)
+        with pytest.raises(RateLimited) as error:
+            await limiter.hit(checks, 3)
+        # Only the client bucket was charged by the rejected hit, and it got its tokens back
+        decisions = await limiter.hit([("client", "1.2.3.4", client_limit)], 7)
+        await limiter.close()
+        return error.value, decisions
+
+    error, decisions = asyncio.run(scenario())
+    assert error.scope == "api_key"
+    assert error.retry_after == pytest.approx(2 * 900, rel=0.01)
+    assert decisions["client"].remaining == pytest.approx(0, abs=0.01)
+    assert limiter.stats()["rejected"] == {"api_key": 1}
+    assert limiter.stats()["allowed"] == {"client": 2, "api_key": 1}
+
+
+def test_backend_errors_let_requests_through():
+    class Broken:
+        name = "broken"
+
+        async def take(self, key, cost, limit):
+            raise ConnectionError("store down")
+
+    limiter = RateLimiter(Broken())
+    assert asyncio.run(limiter.hit([("client", "x", Limit(1, 60))], 1)) == {}
+    assert limiter.stats()["backend_errors"] == 1
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("key", work) for _ in range(3)))
+
+    assert asyncio.run(scenario()) == ["result"] * 3
+    assert len(calls) == 1
+    assert flights.stats()["coalesced"] == 2
+    assert flights.in_flight == 0
+
+
+def test_published_items_reach_every_caller_in_order():
+    flights = SingleFlight("test")
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def work(publish):
+            publish("a")
+            await gate.wait()
+            publish("b")
+            await asyncio.sleep(0)
+            publish("c")
+            return "done"
+
+        first, late = [], []
+
+        async def collect(into, item):
+            into.append(item)
+
+        first_call = asyncio.create_task(flights.stream("key", work, lambda item: collect(first, item)))
+        await asyncio.sleep(0.01)
+        # Joins after "a" was published: it is replayed
+        late_call = asyncio.create_task(flights.stream("key", work, lambda item: collect(late, item)))
+        await asyncio.sleep(0.01)
+        gate.set()
+        return await first_call, await late_call, first, late
+
+    first_result, late_result, first, late = asyncio.run(scenario())
+    assert first_result == late_result == "done"
+    assert first == late == ["a", "b", "c"]
+
+
+def test_errors_reach_streaming_callers():
+    flights = SingleFlight("test")
+
+    async def work(publish):
+        publish("a")
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    async def scenario():
+        items = []
+
+        async def collect(item):
+            items.append(item)
+
+        with pytest.raises(ValueError):
+            await flights.stream("key", work, collect)
+        return items
+
+    assert asyncio.run(scenario()) == ["a"]
+
+
+def test_shared_call_cancelled_when_every_caller_leaves():
+    flights = SingleFlight("test")
+    started = []
+
+    async def work(publish):
+        started.append(1)
+        await asyncio.sleep(10)
+
+    async def noop(item):
+        pass
+
+    async def scenario():
+        callers = [asyncio.create_task(flights.stream("key", work, noop)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        callers[0].cancel()
+        await asyncio.sleep(0.01)
+        assert flights.in_flight == 1
+        callers[1].cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert started == [1]
+    assert flights.in_flight == 0
+    assert flights.stats()["cancelled"] == 1
@@ -0,0 +1,93 @@
+from site_editor import (
+    add_nav_link, extract_css_classes, extract_nav, links_to, mentions_page, remove_nav_link, unlink_page
+)
+
+PAGE = """<html>
+<body>
+  <nav class="navbar">
+    <ul class="nav-menu">
+      <li><a class="nav-link active" href="index.html" aria-current="page">Inicio</a></li>
+      <li><a class="nav-link" href="about.html">Sobre nosotros</a></li>
+      <li><a class="nav-link" href="contact.html">Contacto</a></li>
+    </ul>
+  </nav>
+  <main>
+    <a class="btn btn-primary" href="about.html">Learn <strong>more</strong></a>
+    <a href="about.html#team">Team</a>
+    <a href="https://example.com/about.html">External</a>
+  </main>
+  <footer>
+    <p><a href="index.html">Inicio</a> | <a href="about.html">Sobre nosotros</a> | <a href="contact.html">Contacto</a></p>
+  </footer>
+</body>
+</html>"""
+
+
+def test_extract_nav():
+    assert extract_nav(PAGE) == [
+        {"label": "Inicio", "href": "index.html"},
+        {"label": "Sobre nosotros", "href": "about.html"},
+        {"label": "Contacto", "href": "contact.html"},
+    ]
+
+
+def test_add_nav_link_clones_an_existing_link():
+    page = add_nav_link(PAGE, "services.html", "Servicios & más")
+
+    assert '      <li><a class="nav-link" href="contact.html">Contacto</a></li>\n' \
+           '      <li><a class="nav-link" href="services.html">Servicios &amp; más</a></li>\n    </ul>' in page
+    assert '<a href="contact.html">Contacto</a> | <a href="services.html">Servicios &amp; más</a></p>' in page
+    assert [entry["href"] for entry in extract_nav(page)][-1] == "services.html"
+
+
+def test_add_nav_link_drops_the_current_page_marks():
+    page = PAGE.replace(
+        '<li><a class="nav-link" href="contact.html">Contacto</a></li>\n', ""
+    ).replace('<li><a class="nav-link" href="about.html">Sobre nosotros</a></li>\n', "")
+    page = add_nav_link(page, "about.html", "About")
+    assert '<li><a class="nav-link" href="about.html">About</a></li>' in page
+
+
+def test_add_nav_link_is_idempotent():
+    assert add_nav_link(PAGE, "contact.html", "Contacto") == PAGE
+
+
+def test_remove_nav_link_from_nav_and_footer():
+    page = remove_nav_link(PAGE, "about.html")
+
+    assert [entry["href"] for entry in extract_nav(page)] == ["index.html", "contact.html"]
+    assert '<a class="nav-link active" href="index.html" aria-current="page">Inicio</a></li>\n' \
+           '      <li><a class="nav-link" href="contact.html">' in page
+    assert '<p><a href="index.html">Inicio</a> | <a href="contact.html">Contacto</a></p>' in page
+    # Links in the body are left to unlink_page
+    assert 'href="about.html">Learn' in page
+
+
+def test_add_then_remove_restores_the_page():
+    assert remove_nav_link(add_nav_link(PAGE, "services.html", "Servicios"), "services.html") == PAGE
+
+
+def test_unlink_page_unwraps_body_links():
+    page = unlink_page(remove_nav_link(PAGE, "about.html"), "about.html")
+
+    assert "<main>\n    Learn <strong>more</strong>\n    Team\n" in page
+    assert 'href="https://example.com/about.html"' in page
+    assert not mentions_page(page.replace("https://example.com/about.html", ""), "about.html")
+    assert 'href="contact.html"' in page
+
+
+def test_links_to():
+    assert links_to("about.html", "about.html")
+    assert links_to("./about.html?x=1", "about.html")
+    assert not links_to("myabout.html", "about.html")
+    assert not links_to("https://example.com/about.html", "about.html")
+
+
+def test_mentions_page():
+    assert mentions_page("location.href = 'about.html';", "about.html")
+    assert not mentions_page("see myabout.html or about.htmlx", "about.html")
+
+
+def test_extract_css_classes():
+    css = "/* .ignored */ .btn, .btn-primary:hover { color: red } @media (x) { .card > .card-title { } }"
+    assert extract_css_classes(css) == ["btn", "btn-primary", "card", "card-title"]
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from main import GenerateRequest, generate_site_templated, resolve_theme
+from site_templates import CSS_CLASSES, first_hex_color, render_styles
+
+
+def templated_styles(design_hints):
+    request = GenerateRequest(company_name="Acme", description="A test company here", mode="template")
+
+    async def first_file():
+        files = generate_site_templated(request, design_hints)
+        try:
+            return await files.__anext__()
+        finally:
+            await files.aclose()
+
+    filename, css = asyncio.run(first_file())
+    assert filename == "styles.css"
+    return request, css
+
+
+def test_first_hex_color():
+    assert first_hex_color(["#12abEF"], "#000000") == "#12abEF"
+    assert first_hex_color([None, "blue", "#fff", "#1234567", ["#123456"], "#654321"], "#000000") == "#654321"
+    assert first_hex_color([], "#000000") == "#000000"
+
+
+@pytest.mark.parametrize("hint", [
+    ["#123456"],
+    {"hex": "#123456"},
+    "red; } body { background: url(//evil.example)",
+    "#12345",
+])
+def test_invalid_primary_color_hint_falls_back_to_the_palette(hint):
+    _, css = templated_styles({"primary_color": hint, "extracted_palette": ["#c81e1e", "#1428a0"]})
+    assert "--color-primary: #c81e1e;" in css
+    assert "evil.example" not in css
+
+
+def test_valid_primary_color_hint_is_used():
+    _, css = templated_styles({"primary_color": "#0a0b0c", "extracted_palette": ["#c81e1e"]})
+    assert "--color-primary: #0a0b0c;" in css
+
+
+def test_without_hints_the_theme_color_is_used():
+    request, css = templated_styles({"primary_color": 42})
+    _, theme = resolve_theme(request)
+    assert f"--color-primary: {theme['colors']['primary']};" in css
+
+
+def test_styles_cover_the_class_vocabulary():
+    css = render_styles("modern", "#112233", "#445566", "#778899", "#ffffff")
+    for css_class in CSS_CLASSES:
+        assert f".{css_class}" in css
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from structured_output import decode_loose_string, files_schema, is_valid_json, ollama_format, repair_files_json
+
+
+def test_valid_json_round_trips():
+    files = {"index.html": '<a href="x">"quoted"</a>\n', "script.js": "const re = /\\d+/;"}
+    assert repair_files_json(json.dumps(files)) == files
+
+
+def test_unescaped_quotes_inside_values():
+    reply = '{"index.html": "<a href="about.html" class="btn">Go</a>", "styles.css": "a::after { content: "›"; }"}'
+    assert not is_valid_json(reply)
+    assert repair_files_json(reply) == {
+        "index.html": '<a href="about.html" class="btn">Go</a>',
+        "styles.css": 'a::after { content: "›"; }'
+    }
+
+
+def test_lone_backslashes_are_kept_literally():
+    reply = '{"script.js": "const re = /\\d+\\.\\w/; const q = \\"ok\\";"}'
+    assert repair_files_json(reply) == {"script.js": 'const re = /\\d+\\.\\w/; const q = "ok";'}
+
+
+def test_fenced_reply_with_prose():
+    reply = 'Here you go:\n```json\n{\n  "index.html": "<p class="lead">Hi</p>",\n  "script.js": "1"\n}\n```\n'
+    assert repair_files_json(reply) == {"index.html": '<p class="lead">Hi</p>', "script.js": "1"}
+
+
+def test_last_value_ending_in_a_quote():
+    reply = '{"index.html": "<p>x</p>", "script.js": "alert("hi")"}'
+    assert repair_files_json(reply)["script.js"] == 'alert("hi")'
+
+
+@pytest.mark.parametrize("tail, content", [
+    ("body { color: red", "body { color: red"),
+    ("body { color: red }\\", "body { color: red }"),
+    ("content: \\u20", "content: "),
+    ('a[href="x', 'a[href="x'),
+])
+def test_truncated_reply_keeps_every_file(tail, content):
+    reply = '{"index.html": "<h1 class="t">Hi</h1>", "styles.css": "' + tail
+    assert repair_files_json(reply) == {"index.html": '<h1 class="t">Hi</h1>', "styles.css": content}
+
+
+def test_keys_that_are_not_filenames_stay_in_the_content():
+    reply = '{"index.html": "<p data-x="notes.txt">see "about"</p>"}'
+    assert repair_files_json(reply) == {"index.html": '<p data-x="notes.txt">see "about"</p>'}
+
+
+def test_reply_without_files():
+    assert repair_files_json("I can't help with that.") == {}
+
+
+def test_decode_loose_string():
+    assert decode_loose_string('say "hi" \\n') == 'say "hi" \n'
+
+
+def test_is_valid_json():
+    assert is_valid_json('Sure!\n```json\n{"a": "b\nc"}\n```')
+    assert not is_valid_json('{"a": "b')
+    assert not is_valid_json("no object")
+
+
+def test_schema_and_format():
+    schema = files_schema(["index.html", "styles.css"])
+    assert schema["required"] == ["index.html", "styles.css"]
+    assert schema["additionalProperties"] is False
+    assert ollama_format("schema", schema) is schema
+    assert ollama_format("json", schema) == "json"
+    assert ollama_format("off", schema) is None
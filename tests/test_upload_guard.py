@@ -0,0 +1,137 @@
+from typing import List
+
+import pytest
+from fastapi import FastAPI, File, Form, UploadFile
+from fastapi.testclient import TestClient
+
+from upload_guard import MultipartGuard, UploadGuardMiddleware, UploadRejected, sniff_image_type
+
+BOUNDARY = b"----guardtest"
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def multipart_body(fields=(), files=()):
+    parts = []
+    for name, value in fields:
+        parts.append(
+            b"--" + BOUNDARY + b"\r\nContent-Disposition: form-data; name=\"" + name.encode() + b"\"\r\n\r\n" + value + b"\r\n"
+        )
+    for name, filename, data in files:
+        parts.append(
+            b"--" + BOUNDARY + b"\r\nContent-Disposition: form-data; name=\"" + name.encode()
+            + b"\"; filename=\"" + filename.encode() + b"\"\r\nContent-Type: application/octet-stream\r\n\r\n" + data + b"\r\n"
+        )
+    return b"".join(parts) + b"--" + BOUNDARY + b"--\r\n"
+
+
+def check(body, chunk_size, max_files=3, max_file_size=1024, max_field_size=256, max_body_size=64 * 1024):
+    guard = MultipartGuard(BOUNDARY, max_files, max_file_size, max_field_size, max_body_size)
+    for start in range(0, len(body), chunk_size):
+        guard.feed(body[start:start + chunk_size])
+    return guard
+
+
+def rejection(body, chunk_size, **limits):
+    with pytest.raises(UploadRejected) as error:
+        check(body, chunk_size, **limits)
+    return error.value.status_code, error.value.reason
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_valid_upload_passes(chunk_size):
+    body = multipart_body([("company_name", b"Acme")], [("images", "a.png", PNG), ("images", "b.png", PNG)])
+    guard = check(body, chunk_size)
+    assert guard.files == 2
+    assert not guard.malformed
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_oversized_file_is_413(chunk_size):
+    body = multipart_body(files=[("images", "big.png", PNG + b"\x00" * 2048)])
+    assert rejection(body, chunk_size) == (413, "file_size")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4096])
+def test_oversized_field_is_413(chunk_size):
+    body = multipart_body([("description", b"x" * 1000)])
+    assert rejection(body, chunk_size) == (413, "field_size")
+
+
+def test_oversized_body_is_413():
+    body = multipart_body([("description", b"x" * 200)] * 10)
+    assert rejection(body, 4096, max_body_size=1024) == (413, "body_size")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+def test_non_image_file_is_415(chunk_size):
+    body = multipart_body(files=[("images", "evil.png", b"<?php echo 1; ?>" * 4)])
+    assert rejection(body, chunk_size) == (415, "file_type")
+
+
+def test_short_non_image_file_is_415():
+    body = multipart_body(files=[("images", "tiny.gif", b"GIF")])
+    assert rejection(body, 4096) == (415, "file_type")
+
+
+def test_too_many_files_is_400():
+    body = multipart_body(files=[("images", f"{i}.png", PNG) for i in range(4)])
+    assert rejection(body, 4096) == (400, "file_count")
+
+
+def test_empty_file_inputs_do_not_count():
+    body = multipart_body(files=[("images", "", b"")] * 5 + [("images", "a.png", PNG)])
+    assert check(body, 4096).files == 1
+
+
+def test_sniff_image_type():
+    assert sniff_image_type(b"\xff\xd8\xff\xe0") == "JPEG"
+    assert sniff_image_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "WEBP"
+    assert sniff_image_type(b"BM") is None
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    rejected = []
+
+    @app.post("/upload")
+    async def upload(name: str = Form(...), images: List[UploadFile] = File(default=[])):
+        return {"name": name, "images": len(images)}
+
+    app.add_middleware(
+        UploadGuardMiddleware, max_files=2, max_file_size=1024, max_field_size=256, on_reject=rejected.append
+    )
+    with TestClient(app) as test_client:
+        test_client.rejected = rejected
+        yield test_client
+
+
+def post(client, body):
+    return client.post(
+        "/upload", content=body, headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY.decode()}"}
+    )
+
+
+def test_middleware_accepts_valid_uploads(client):
+    response = post(client, multipart_body([("name", b"Acme")], [("images", "a.png", PNG)]))
+    assert response.status_code == 200
+    assert response.json() == {"name": "Acme", "images": 1}
+    assert client.rejected == []
+
+
+def test_middleware_answers_413_and_415(client):
+    response = post(client, multipart_body([("name", b"Acme")], [("images", "big.png", PNG + b"\x00" * 2048)]))
+    assert response.status_code == 413
+    response = post(client, multipart_body([("name", b"Acme")], [("images", "a.png", b"not an image at all")]))
+    assert response.status_code == 415
+    assert "not a JPEG" in response.json()["detail"]
+    assert client.rejected == ["file_size", "file_type"]
+
+
+def test_middleware_rejects_declared_oversized_bodies(client):
+    response = client.post(
+        "/upload", content=b"x" * 10,
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY.decode()}", "Content-Length": str(10 ** 9)}
+    )
+    assert response.status_code == 413
+    assert client.rejected == ["body_size"]
@@ -0,0 +1,90 @@
+import io
+import struct
+import zipfile
+import zlib
+
+import pytest
+
+from zip_stream import ZipStreamWriter, compress_entry, iter_zip
+
+FILES = [
+    ("index.html", b"<html>" + b"x" * 5000 + b"</html>"),
+    ("styles.css", b"body { color: red; }"),
+    ("página/ñandú.js", "console.log('ü');".encode("utf-8")),
+    ("empty.txt", b""),
+]
+
+
+@pytest.mark.parametrize("compression, threshold", [("deflate", 0), ("store", 0), ("auto", 100)])
+def test_iter_zip_round_trips_through_zipfile(compression, threshold):
+    archive = b"".join(iter_zip(FILES, compression=compression, store_threshold=threshold))
+    with zipfile.ZipFile(io.BytesIO(archive)) as z:
+        assert z.testzip() is None
+        assert [(info.filename, z.read(info)) for info in z.infolist()] == FILES
+        methods = {info.filename: info.compress_type for info in z.infolist()}
+
+    if compression == "store":
+        assert set(methods.values()) == {zipfile.ZIP_STORED}
+    elif compression == "auto":
+        assert methods["index.html"] == zipfile.ZIP_DEFLATED
+        assert methods["styles.css"] == zipfile.ZIP_STORED
+    else:
+        assert set(methods.values()) == {zipfile.ZIP_DEFLATED}
+
+
+def read_local_entries(archive):
+    """Entries as a streaming reader sees them, from the local headers alone"""
+    entries = []
+    offset = 0
+    while archive[offset:offset + 4] == b"PK\x03\x04":
+        _, _, flags, method, _, _, crc, compressed_size, size, name_length, extra_length = struct.unpack_from(
+            "<IHHHHHIIIHH", archive, offset
+        )
+        assert not flags & 0x0008, "entry uses a data descriptor"
+        offset += 30
+        name = archive[offset:offset + name_length].decode("utf-8")
+        offset += name_length + extra_length
+        payload = archive[offset:offset + compressed_size]
+        offset += compressed_size
+        data = payload if method == zipfile.ZIP_STORED else zlib.decompress(payload, -15)
+        assert len(data) == size and zlib.crc32(data) == crc
+        entries.append((name, data))
+    assert archive[offset:offset + 4] == b"PK\x01\x02"
+    return entries
+
+
+@pytest.mark.parametrize("compression", ["deflate", "store", "auto"])
+def test_local_headers_carry_crc_and_sizes(compression):
+    archive = b"".join(iter_zip(FILES, compression=compression, store_threshold=100))
+    assert read_local_entries(archive) == FILES
+
+
+def test_fixed_timestamp_gives_identical_bytes():
+    first = b"".join(iter_zip(FILES, timestamp=1_700_000_000))
+    second = b"".join(iter_zip(FILES, timestamp=1_700_000_000))
+    assert first == second
+
+
+def test_entries_compressed_elsewhere():
+    writer = ZipStreamWriter()
+    data = b"a" * 1000
+    method = writer.method_for(len(data))
+    payload, crc = compress_entry(data, method)
+    archive = writer.add_compressed("a.txt", payload, crc, len(data), method) + writer.finish()
+
+    assert len(archive) == writer.offset
+    with zipfile.ZipFile(io.BytesIO(archive)) as z:
+        assert z.read("a.txt") == data
+
+
+def test_duplicate_entries_are_rejected():
+    writer = ZipStreamWriter()
+    writer.add_file("a.txt", b"1")
+    assert writer.has_entry("a.txt")
+    with pytest.raises(ValueError):
+        writer.add_file("a.txt", b"2")
+
+
+def test_unknown_compression():
+    with pytest.raises(ValueError):
+        ZipStreamWriter(compression="bzip2")